@@ -0,0 +1,196 @@
+"""Compila y ejecuta muchos programas .ld en paralelo.
+
+Uso:
+    python batch.py programas/            todos los .ld del directorio
+    python batch.py "tareas/**/*.ld"      glob (con ** recursivo)
+    python batch.py --manifest lista.ndjson
+
+Cada linea del manifest es un JSON con "path" (relativo al manifest) o con
+"source" (el programa en linea), y opcionalmente "id". Por cada programa se
+escribe una linea JSON a stdout en el orden de entrada:
+
+    {"id", "path", "ok", "stage", "errors", "output", "executed",
+     "compile_ms", "run_ms", "cached"}
+
+stage es "compile" o "run" segun donde fallo (None si todo salio bien).
+Con --backend python los programas corren traducidos a Python (pybackend);
+ese backend no cuenta instrucciones (executed queda en 0) ni acepta limites.
+Con --cache los programas compilados se guardan en el cache de compilacion
+(compile_cache.py, compartido por todos los procesos); cached dice si el
+programa salio de ahi.
+
+Los procesos del pool se crean una sola vez y cargan las tablas del parser
+en su initializer, asi que cada programa solo paga compilar y ejecutar, no
+arrancar el interprete ni importar ply.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from compile_cache import CompileCache
+from compiler import CachedProgram, Compiler
+from parser_rules import get_parser
+from vm import ExecutionLimits, VirtualMachine
+
+# Estado por proceso del pool (se llena en init_worker)
+_compiler = None
+_limits = None
+_backend = 'vm'
+
+
+def init_worker(limits, opt_level=0, disabled=(), backend='vm', cache=False):
+    global _compiler, _limits, _backend
+    get_parser()   # tablas LALR cargadas antes del primer programa
+    _compiler = Compiler(opt_level, disabled, CompileCache() if cache else None)
+    _limits = limits
+    _backend = backend
+
+
+def run_job(job):
+    """Compila y ejecuta un programa; regresa el registro JSON"""
+    compiler = _compiler or Compiler()
+    result = {'id': job.get('id'), 'path': job.get('path'), 'ok': False, 'stage': 'compile',
+              'errors': [], 'output': [], 'executed': 0, 'compile_ms': 0.0, 'run_ms': 0.0,
+              'cached': False}
+    start = time.perf_counter()
+    try:
+        source = job.get('source')
+        if source is None:
+            with open(job['path'], encoding='utf-8') as f:
+                source = f.read()
+        program = compiler.compile(source)
+    except Exception as e:
+        result['errors'] = [f"{type(e).__name__}: {e}"]
+        return result
+    finally:
+        result['compile_ms'] = round((time.perf_counter() - start) * 1000, 3)
+
+    if not program.ok:
+        result['errors'] = program.errors or ["No quadruples generated"]
+        return result
+    result['cached'] = isinstance(program, CachedProgram)
+
+    result['stage'] = 'run'
+    output = result['output']
+    start = time.perf_counter()
+    try:
+        if _backend == 'python':
+            # solo lo importa el worker que lo usa, como Compiler.run
+            from pybackend import run_python
+            run_python(program.object_data, output=lambda value: output.append(str(value)))
+        else:
+            vm = VirtualMachine(limits=_limits, output=lambda value: output.append(str(value)))
+            vm.load_and_initialize_memory(program.object_data)
+            result['executed'] = vm.run()
+        result['ok'] = True
+        result['stage'] = None
+    except Exception as e:
+        # cualquier falla del programa queda en su linea; el lote sigue
+        result['errors'] = [f"{type(e).__name__}: {e}"]
+    finally:
+        result['run_ms'] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def find_sources(pattern):
+    if os.path.isdir(pattern):
+        return sorted(glob.glob(os.path.join(pattern, '**', '*.ld'), recursive=True))
+    if os.path.isfile(pattern):
+        return [pattern]
+    return sorted(glob.glob(pattern, recursive=True))
+
+
+def read_manifest(filename):
+    base = os.path.dirname(os.path.abspath(filename))
+    with open(filename, encoding='utf-8') as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if isinstance(entry, str):
+                entry = {'path': entry}
+            if 'source' not in entry and 'path' not in entry:
+                raise ValueError(f"{filename}:{lineno}: falta 'path' o 'source'")
+            if entry.get('path') is not None:
+                entry['path'] = os.path.join(base, entry['path'])
+            yield entry
+
+
+def iter_jobs(args):
+    for pattern in args.sources:
+        for path in find_sources(pattern):
+            yield {'id': path, 'path': path}
+    if args.manifest:
+        for i, entry in enumerate(read_manifest(args.manifest)):
+            entry.setdefault('id', entry.get('path') or str(i))
+            yield entry
+
+
+def run_batch(jobs, workers=None, limits=None, chunksize=8, opt_level=0, disabled=(),
+              backend='vm', cache=False):
+    """Regresa un iterador de resultados en el orden de `jobs`"""
+    if workers == 1:
+        init_worker(limits, opt_level, disabled, backend, cache)
+        return map(run_job, jobs)
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                   initargs=(limits, opt_level, disabled, backend, cache))
+    return _drain(executor, executor.map(run_job, jobs, chunksize=chunksize))
+
+
+def _drain(executor, results):
+    with executor:
+        yield from results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compila y ejecuta programas .ld en paralelo")
+    ap.add_argument('sources', nargs='*', help="archivos .ld, directorios o globs")
+    ap.add_argument('--manifest', help="archivo NDJSON con un programa por linea")
+    ap.add_argument('-j', '--jobs', type=int, default=None, help="procesos (default: CPUs)")
+    ap.add_argument('--chunksize', type=int, default=8, help="programas por envio a un proceso")
+    ap.add_argument('-O', '--opt-level', type=int, default=0, help="nivel de optimizacion")
+    ap.add_argument('--disable', action='append', default=[], metavar='NOMBRE',
+                    help="pasada o regla de peephole a no correr (se puede repetir)")
+    ap.add_argument('--backend', choices=('vm', 'python'), default='vm',
+                    help="ejecutar en la VM o traducido a Python")
+    ap.add_argument('--cache', action='store_true',
+                    help="usar el cache de compilacion en disco (LD_CACHE_DIR)")
+    ap.add_argument('--max-instructions', type=int, default=None)
+    ap.add_argument('--max-seconds', type=float, default=None)
+    ap.add_argument('--max-call-depth', type=int, default=None)
+    ap.add_argument('--max-memory-cells', type=int, default=None)
+    args = ap.parse_args(argv)
+    if not args.sources and not args.manifest:
+        ap.error("se necesita al menos un archivo, directorio, glob o --manifest")
+
+    limits = ExecutionLimits(max_instructions=args.max_instructions, max_seconds=args.max_seconds,
+                             max_call_depth=args.max_call_depth,
+                             max_memory_cells=args.max_memory_cells)
+    if args.backend == 'python' and (args.max_instructions or args.max_seconds
+                                     or args.max_call_depth or args.max_memory_cells):
+        ap.error("el backend python no soporta limites de ejecucion")
+
+    total = failed = cached = 0
+    start = time.perf_counter()
+    for result in run_batch(iter_jobs(args), args.jobs, limits, args.chunksize,
+                                args.opt_level, args.disable, args.backend, args.cache):
+        total += 1
+        failed += not result['ok']
+        cached += result['cached']
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + '\n')
+        sys.stdout.flush()
+    elapsed = time.perf_counter() - start
+    summary = f"{total} programas, {failed} con errores, {elapsed:.2f} s"
+    if args.cache:
+        summary += f", {cached} del cache"
+    print(summary, file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Benchmark del backend de Python contra la VM.
+
+Uso: python benchmarks/bench_backend.py [nivel] [iteraciones]     (default: 2 100000)
+
+Compila los programas de bench_vm.py y bench_opt.py con -O<nivel> y mide
+la ejecucion en la VM y con pybackend.run_python. Para el backend de Python
+reporta la primera corrida sin cache (traducir + compile + ejecutar) y la
+mejor de las siguientes, que toman el codigo ya compilado. Revisa que la
+salida de PRINT sea la misma en los dos backends.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pybackend
+from bench_opt import PROGRAMS
+from bench_vm import CALL_PROGRAM, LOOP_PROGRAM
+from compiler import Compiler, CompileError
+from vm import VirtualMachine
+
+
+def run_vm(object_data):
+    output = []
+    vm = VirtualMachine(output=output.append)
+    vm.load_and_initialize_memory(object_data)
+    start = time.perf_counter()
+    vm.run()
+    return time.perf_counter() - start, output
+
+
+def run_py(object_data, use_cache=True):
+    output = []
+    start = time.perf_counter()
+    pybackend.run_python(object_data, output=output.append, use_cache=use_cache)
+    return time.perf_counter() - start, output
+
+
+def bench(name, source, level, repeat=3):
+    program = Compiler(level).compile(source)
+    if not program.ok:
+        raise CompileError(program.errors)
+    object_data = program.object_data
+
+    vm_time, vm_output = min(run_vm(object_data) for _ in range(repeat))
+    pybackend._code_cache.clear()
+    cold_time, py_output = run_py(object_data, use_cache=False)
+    warm_time = min(run_py(object_data)[0] for _ in range(repeat))
+
+    check = '' if py_output == vm_output else '  SALIDA DISTINTA'
+    print(f"{name:<12} {vm_time * 1000:>10.2f}ms {cold_time * 1000:>10.2f}ms "
+          f"{warm_time * 1000:>10.2f}ms {vm_time / warm_time:>8.1f}x{check}")
+    return py_output == vm_output
+
+
+if __name__ == '__main__':
+    level = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    programs = {'loop': LOOP_PROGRAM.format(n=n), 'calls': CALL_PROGRAM.format(n=n)}
+    programs.update(PROGRAMS)
+
+    print(f"-O{level}")
+    print(f"{'programa':<12} {'vm':>12} {'py (frio)':>12} {'py':>12} {'speedup':>9}")
+    ok = all([bench(name, source, level) for name, source in programs.items()])
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,58 @@
+"""Benchmark del cache de compilacion (compile_cache.py).
+
+Uso: python benchmarks/bench_cache.py [cuadruplos ...]     (default: 1000 10000 100000)
+
+Por cada tamaño genera un programa (el mismo generador de bench_cfg.py) y
+mide compilar sin cache, la primera compilacion con cache (miss + guardar)
+y la mejor de las siguientes (hit, sin parsear). Revisa que el objeto del
+cache sea igual al de compilar de nuevo. Usa un directorio temporal.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_cfg import generate
+from compile_cache import CompileCache
+from compiler import CachedProgram, Compiler, CompileError
+
+
+def timed_compile(compiler, source):
+    start = time.perf_counter()
+    program = compiler.compile(source)
+    return program, (time.perf_counter() - start) * 1000
+
+
+def bench(target_quads, directory, repeat=5):
+    source = generate(target_quads)
+    fresh, plain_ms = timed_compile(Compiler(1), source)
+    if not fresh.ok:
+        raise CompileError(fresh.errors)
+
+    cache = CompileCache(directory)
+    compiler = Compiler(1, cache=cache)
+    _, miss_ms = timed_compile(compiler, source)
+    hit_ms = None
+    for _ in range(repeat):
+        program, elapsed = timed_compile(compiler, source)
+        hit_ms = elapsed if hit_ms is None else min(hit_ms, elapsed)
+
+    same = isinstance(program, CachedProgram) and program.object_data == fresh.object_data
+    print(f"{len(fresh.estructura.cuadruplos):>8} {len(source):>10} {plain_ms:>10.1f}ms "
+          f"{miss_ms:>10.1f}ms {hit_ms:>10.2f}ms {plain_ms / hit_ms:>8.0f}x"
+          + ('' if same else '  OBJETO DISTINTO'))
+    return same, cache
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    print(f"{'quads':>8} {'fuente':>10} {'sin cache':>12} {'miss':>12} {'hit':>12} {'speedup':>8}")
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            same, cache = bench(size, directory)
+            ok = ok and same
+        print(cache.stats())
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,92 @@
+"""Benchmark de cfg.py: tiempo de cada etapa con programas grandes.
+
+Uso: python benchmarks/bench_cfg.py [cuadruplos ...]     (default: 10000 100000)
+
+Genera un programa de mas o menos ese numero de cuadruplos (funciones,
+ciclos do-while e if/else anidados), lo compila sin optimizar y corre
+cfg.round_trip: CFG, dominadores, SSA, fuera de SSA y de vuelta a
+cuadruplos. Revisa que el codigo que regresa sea el mismo que entro.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import cfg
+from compiler import Compiler, CompileError
+
+INT_VARS = ['a', 'b', 'c', 'd', 'e', 'f']
+FLOAT_VARS = ['x', 'y', 'z']
+
+
+def statement(k, depth=0):
+    """Sentencia k del programa generado (determinista)"""
+    v = INT_VARS[k % len(INT_VARS)]
+    w = INT_VARS[(k * 7 + 3) % len(INT_VARS)]
+    u = FLOAT_VARS[k % len(FLOAT_VARS)]
+    kind = k % 6 if depth < 2 else k % 3
+    if kind == 0:
+        return [f"{v} = {v} + {w} * {k % 13} - {k % 5};"]
+    if kind == 1:
+        return [f"{u} = {u} * 0.5 + {w} / 2;"]
+    if kind == 2:
+        return [f"{v} = ({v} + {k % 17}) * ({w} - 1);"]
+    if kind == 3:
+        body = statement(k + 1, depth + 1) + statement(k + 2, depth + 1)
+        other = statement(k + 4, depth + 1)
+        return ([f"if ({v} > {w}) {{"] + body + ["} else {"] + other + ["};"])
+    if kind == 4:
+        body = statement(k + 1, depth + 1) + statement(k + 3, depth + 1)
+        return (["i = 0;", "do {"] + body + ["i = i + 1;", "} while (i < 3);"])
+    return ["helper(a, b);"]
+
+
+def generate(target_quads):
+    # cada sentencia da unos 8 cuadruplos en promedio
+    count = max(1, target_quads // 8)
+    lines = ["program grande;",
+             f"var {', '.join(INT_VARS)}, i : int;",
+             f"    {', '.join(FLOAT_VARS)} : float;",
+             "void helper(p : int, q : int)",
+             "[ var r : int;",
+             "  {",
+             "    r = p * q + 1;",
+             "    if (r > 10) { print(r); };",
+             "  }",
+             "];",
+             "main", "{",
+             "  a = 1; b = 2; c = 3; d = 4; e = 5; f = 6; x = 0.5; y = 1.5; z = 2.5;"]
+    for k in range(count):
+        lines.extend("  " + line for line in statement(k))
+    lines += ["  print(a, b, c, x);", "}", "end;"]
+    return "\n".join(lines)
+
+
+def bench(target_quads):
+    source = generate(target_quads)
+    start = time.perf_counter()
+    program = Compiler().compile(source)
+    compile_ms = (time.perf_counter() - start) * 1000
+    if not program.ok:
+        raise CompileError(program.errors)
+
+    estructura = program.estructura
+    before = [column.tobytes() for column in estructura.cuadruplos.columns()]
+    timings = cfg.round_trip(estructura)
+    after = [column.tobytes() for column in estructura.cuadruplos.columns()]
+
+    n = len(estructura.cuadruplos)
+    total = sum(timings.values())
+    print(f"{n} cuadruplos (compilar: {compile_ms:.0f}ms)")
+    for stage in cfg.STAGES:
+        print(f"  {stage:<12} {timings[stage]:>10.1f}ms")
+    print(f"  {'total':<12} {total:>10.1f}ms   {n / total:.0f} cuadruplos/ms")
+    print("  ida y vuelta: " + ("mismo codigo" if before == after else "CODIGO DISTINTO"))
+    return before == after
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    ok = all([bench(size) for size in sizes])
+    sys.exit(0 if ok else 1)
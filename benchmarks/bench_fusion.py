@@ -0,0 +1,91 @@
+"""Benchmark de las superinstrucciones de la VM (vm.FUSION_RULES).
+
+Uso: python benchmarks/bench_fusion.py [nivel] [iteraciones]     (default: 0 100000)
+
+1. Perfil: corre cada programa sin fusionar y cuenta los pares de opcodes
+   consecutivos que se ejecutan; los pares mas frecuentes son los que vale
+   la pena fusionar.
+2. Compara steps despachados y tiempo con y sin fusion, y revisa que la
+   salida de PRINT sea la misma.
+"""
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_opt import PROGRAMS
+from bench_vm import CALL_PROGRAM, LOOP_PROGRAM
+from compiler import Compiler, CompileError
+from ir import OPCODE_NAMES
+from vm import FUSION_RULES, VirtualMachine
+
+
+def compile_source(source, level):
+    program = Compiler(level).compile(source)
+    if not program.ok:
+        raise CompileError(program.errors)
+    return program.object_data
+
+
+def profile_pairs(object_data, counts):
+    """Suma a counts los pares (opcode anterior, opcode) ejecutados"""
+    vm = VirtualMachine(output=lambda value: None, fusion=())
+    obj = vm.load_and_initialize_memory(object_data)
+    last = [None]
+
+    def counted(step, opcode):
+        def profiled(pc):
+            counts[last[0], opcode] += 1
+            last[0] = opcode
+            return step(pc)
+        return profiled
+
+    opcodes = [opcode for _, opcode, _, _, _ in obj.quads()]
+    vm.program[:len(opcodes)] = [counted(step, opcode)
+                                 for step, opcode in zip(vm.program, opcodes)]
+    vm.run()
+
+
+def run(object_data, fusion, repeat=3):
+    best = None
+    for _ in range(repeat):
+        output = []
+        vm = VirtualMachine(output=output.append, fusion=fusion)
+        vm.load_and_initialize_memory(object_data)
+        start = time.perf_counter()
+        executed = vm.run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[1]:
+            best = (executed, elapsed, output, vm.fused)
+    return best
+
+
+if __name__ == '__main__':
+    level = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    programs = {'loop': LOOP_PROGRAM.format(n=n), 'calls': CALL_PROGRAM.format(n=n)}
+    programs.update(PROGRAMS)
+    objects = {name: compile_source(source, level) for name, source in programs.items()}
+
+    counts = Counter()
+    for object_data in objects.values():
+        profile_pairs(object_data, counts)
+    total = sum(counts.values())
+    print(f"-O{level}: pares de opcodes mas frecuentes ({total} cuadruplos)")
+    for (first, second), count in counts.most_common(12):
+        first = OPCODE_NAMES[first] if first is not None else '-'
+        print(f"  {first:>8} {OPCODE_NAMES[second]:<8} {count:>10} {count / total:>7.1%}")
+
+    print()
+    print(f"{'programa':<12} {'steps':>10} {'fusionado':>10} {'tiempo':>10} {'fusionado':>10}")
+    ok = True
+    for name, object_data in objects.items():
+        executed, elapsed, output, _ = run(object_data, ())
+        fused_executed, fused_elapsed, fused_output, fused = run(object_data, tuple(FUSION_RULES))
+        ok = ok and output == fused_output
+        check = '' if output == fused_output else '  SALIDA DISTINTA'
+        print(f"{name:<12} {executed:>10} {fused_executed:>10} {elapsed * 1000:>8.2f}ms "
+              f"{fused_elapsed * 1000:>8.2f}ms{check}")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,97 @@
+"""Benchmark de la compilacion incremental (incremental.py).
+
+Uso: python benchmarks/bench_incremental.py [funciones ...]     (default: 50 200 800)
+
+Genera un programa con ese numero de funciones (cada una con ciclos, if/else,
+floats, strings y llamadas a funciones anteriores) y mide: compilar todo con
+Compiler, la primera compilacion con IncrementalCompiler y recompilar despues
+de editar una constante en una funcion, en main o en la firma de la primera
+funcion (que cambia la llave de todas las siguientes). Revisa que cada objeto
+sea igual al de compilar todo con Compiler.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_cfg import FLOAT_VARS, INT_VARS, statement
+from compiler import Compiler, CompileError
+from incremental import IncrementalCompiler
+
+
+def function_lines(k, stamp=0, param='p'):
+    # las funciones solo ven sus variables: las de bench_cfg.statement son locales
+    lines = [f"void f{k}({param} : int, q : float)",
+             f"[ var {', '.join(INT_VARS)}, i, r : int;",
+             f"      {', '.join(FLOAT_VARS)}, s : float;",
+             "  {",
+             f"    a = {param}; b = 2; c = 3; d = 4; e = 5; f = 6; x = q; y = 1.5; z = 2.5;",
+             f"    r = {param} * {k % 7 + stamp} + 1;",
+             "    s = q / 2 + r;",
+             f"    if (s > {k % 11}.5) {{ print(\"f{k}\", r, s); }};"]
+    if k > 0:
+        lines.append(f"    if ({param} > 0) {{ f{(k * 5) % k}({param} - 1, s); }};")
+    for j in range(6):
+        lines.extend("    " + line for line in statement(k * 6 + j))
+    return lines + ["  }", "];"]
+
+
+def generate(functions, edited=None, stamp=0, main_stamp=0, first_param='p'):
+    lines = ["program incremental;",
+             f"var {', '.join(INT_VARS)}, i : int;",
+             f"    {', '.join(FLOAT_VARS)} : float;",
+             "void helper(p : int, q : int)",
+             "[ var r : int;",
+             "  {",
+             "    r = p * q + 1;",
+             "    if (r > 10) { print(r); };",
+             "  }",
+             "];"]
+    for k in range(functions):
+        lines.extend(function_lines(k, stamp if k == edited else 0,
+                                    first_param if k == 0 else 'p'))
+    lines += ["main", "{",
+              "  a = 1; b = 2; c = 3; d = 4; e = 5; f = 6; x = 0.5; y = 1.5; z = 2.5;",
+              f"  f{functions - 1}(3, {main_stamp}.25);",
+              "  print(a, b, c, x);", "}", "end;"]
+    return "\n".join(lines)
+
+
+def timed_compile(compiler, source):
+    start = time.perf_counter()
+    program = compiler.compile(source)
+    if not program.ok:
+        raise CompileError(program.errors)
+    return program, (time.perf_counter() - start) * 1000
+
+
+def bench(functions, level=1):
+    source = generate(functions)
+    _, full_ms = timed_compile(Compiler(level), source)
+    compiler = IncrementalCompiler(level)
+    _, first_ms = timed_compile(compiler, source)
+
+    edits = {'funcion': generate(functions, edited=functions // 2, stamp=1),
+             'main': generate(functions, edited=functions // 2, stamp=1, main_stamp=1),
+             'firma': generate(functions, edited=functions // 2, stamp=1, main_stamp=1,
+                               first_param='pp')}
+    results = []
+    ok = True
+    for name, edited in edits.items():
+        program, elapsed = timed_compile(compiler, edited)
+        fresh, _ = timed_compile(Compiler(level), edited)
+        same = program.object_data == fresh.object_data
+        ok = ok and same
+        results.append(f"{name} {elapsed:.1f}ms ({compiler.stats['reused']} reusadas)"
+                       + ('' if same else ' OBJETO DISTINTO'))
+    print(f"{functions:>6} {len(source):>9} {full_ms:>10.1f}ms {first_ms:>10.1f}ms  "
+          + ", ".join(results))
+    return ok
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [50, 200, 800]
+    print(f"{'funcs':>6} {'fuente':>9} {'completo':>12} {'primera':>12}  recompilar tras editar")
+    ok = all([bench(size) for size in sizes])
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,124 @@
+"""Benchmark del optimizador: cuadruplos generados y ejecutados por nivel.
+
+Uso: python benchmarks/bench_opt.py [nivel_maximo] [archivo.ld ...]
+
+Compila cada programa con -O0 .. -O<nivel_maximo>, lo corre en la VM y
+reporta cuadruplos estaticos, cuadruplos ejecutados (vm.run, sin
+superinstrucciones para que cuente cuadruplos) y tiempo.
+Tambien revisa que la salida de PRINT sea la misma en todos los niveles.
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from compiler import Compiler, CompileError
+from optimizer import PASSES
+from vm import VirtualMachine
+
+# Ciclo con expresiones constantes dentro del cuerpo
+CONST_LOOP_PROGRAM = """
+program bench_const;
+var counter, limit : int;
+    result, rate : float;
+main
+{
+  counter = 0;
+  limit = 1000 * 20;
+  do {
+    rate = 2.5 * 4 / 10;
+    result = result + rate * (60 * 60) - 3 * 1200;
+    counter = counter + 10 - 9;
+    if (2 > 1) {
+      result = result + 0.5;
+    } else {
+      result = result - 0.5;
+    };
+  } while(counter < limit);
+  print(counter, result);
+}
+end;
+"""
+
+# Subexpresiones repetidas dentro del cuerpo del ciclo
+CSE_LOOP_PROGRAM = """
+program bench_cse;
+var i, a, b, c, x, y : int;
+main
+{
+  i = 0; a = 3; b = 4; c = 5;
+  do {
+    x = (a * c + b) * (a * c - b);
+    y = (a * c + b) + (i - b) * (i - b);
+    a = a + 1;
+    x = x + a * c + (a * c) * 2;
+    i = i + 1;
+    a = a - 1;
+  } while(i < 20000);
+  print(x, y);
+}
+end;
+"""
+
+# Ciclos anidados con expresiones que no cambian adentro
+LICM_LOOP_PROGRAM = """
+program bench_licm;
+var i, j, n, k, s : int;
+    scale, acc : float;
+main
+{
+  i = 0; n = 200; k = 7; s = 0; scale = 0.5; acc = 0.0;
+  do {
+    j = 0;
+    do {
+      s = s + n * k - j;
+      acc = acc + scale * (n + k) + j;
+      j = j + 1;
+    } while(j < n / 2);
+    i = i + 1;
+  } while(i < n);
+  print(s, acc);
+}
+end;
+"""
+
+PROGRAMS = {
+    'const_loop': CONST_LOOP_PROGRAM,
+    'cse_loop': CSE_LOOP_PROGRAM,
+    'licm_loop': LICM_LOOP_PROGRAM,
+    'semantica': open(os.path.join(ROOT, 'semantica.ld')).read(),
+}
+
+
+def compile_and_run(source, level):
+    program = Compiler(level).compile(source)
+    if not program.ok:
+        raise CompileError(program.errors)
+    output = []
+    vm = VirtualMachine(output=output.append, fusion=())
+    vm.load_and_initialize_memory(program.object_data)
+    start = time.perf_counter()
+    executed = vm.run()
+    elapsed = time.perf_counter() - start
+    return len(program.estructura.cuadruplos), executed, elapsed, output
+
+
+if __name__ == '__main__':
+    max_level = int(sys.argv[1]) if len(sys.argv) > 1 else max(level for level, _ in PASSES)
+    programs = dict(PROGRAMS)
+    for filename in sys.argv[2:]:
+        with open(filename) as f:
+            programs[os.path.basename(filename)] = f.read()
+
+    print(f"{'programa':<14} {'nivel':>5} {'estaticos':>10} {'ejecutados':>12} {'tiempo':>10}")
+    for name, source in programs.items():
+        baseline = None
+        for level in range(max_level + 1):
+            static, executed, elapsed, output = compile_and_run(source, level)
+            if baseline is None:
+                baseline = output
+            check = '' if output == baseline else '  SALIDA DISTINTA'
+            print(f"{name:<14} {'-O' + str(level):>5} {static:>10} {executed:>12} "
+                  f"{elapsed * 1000:>8.2f}ms{check}")
@@ -0,0 +1,55 @@
+"""Benchmark de arranque: proceso nuevo que importa el compilador y compila
+debug.ld una vez (lo que paga cada proceso corto de compilacion).
+
+Uso: python benchmarks/bench_startup.py [corridas]
+
+Mide el tiempo total del proceso, el import y la primera compilacion, en modo
+normal (tablas en cache) y con LD_DEBUG_GRAMMAR=1. Nota: con
+PYTHONDONTWRITEBYTECODE=1 cada import recompila los .py y los tiempos suben.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+from compiler import Compiler
+t1 = time.perf_counter()
+with open({source!r}) as f:
+    source = f.read()
+Compiler().compile(source)
+t2 = time.perf_counter()
+print(json.dumps({{'import': t1 - t0, 'compile': t2 - t1}}))
+"""
+
+
+def run_mode(name, env, runs, source):
+    code = CHILD.format(root=ROOT, source=source)
+    walls, imports, compiles = [], [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                             capture_output=True, text=True).stdout
+        walls.append(time.perf_counter() - start)
+        result = json.loads(out.strip().splitlines()[-1])
+        imports.append(result['import'])
+        compiles.append(result['compile'])
+    print(f"{name:<10} process {statistics.median(walls) * 1000:7.1f} ms   "
+          f"import {statistics.median(imports) * 1000:6.1f} ms   "
+          f"first compile {statistics.median(compiles) * 1000:6.1f} ms")
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    source = os.path.join(ROOT, 'debug.ld')
+    env = dict(os.environ)
+    env.pop('LD_DEBUG_GRAMMAR', None)
+    run_mode('normal', env, runs, source)
+    run_mode('debug', dict(env, LD_DEBUG_GRAMMAR='1'), runs, source)
@@ -0,0 +1,89 @@
+"""Benchmark de la VM: steps por segundo en programas con ciclos.
+
+Uso: python benchmarks/bench_vm.py [iteraciones]
+
+Un step es un cuadruplo o una superinstruccion (ver vm.FUSION_RULES).
+
+Genera versiones escaladas del do-while de semantica.ld (y una variante con
+llamadas a funcion), las compila una vez y mide solo la ejecucion.
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from compiler import Compiler, CompileError
+from vm import VirtualMachine
+
+LOOP_PROGRAM = """
+program bench_loop;
+var counter : int;
+    result : float;
+main
+{{
+  counter = 1;
+  result = 0.0;
+  do {{
+    result = result + counter * 2.5;
+    counter = counter + 1;
+  }} while(counter <= {n});
+  print(result);
+}}
+end;
+"""
+
+CALL_PROGRAM = """
+program bench_calls;
+var counter : int;
+
+void add(a : int, b : int)
+[ var c : int;
+  {{
+    c = a * b;
+    c = c + a;
+  }}
+];
+
+main
+{{
+  counter = 1;
+  do {{
+    add(counter, 2);
+    counter = counter + 1;
+  }} while(counter <= {n});
+  print(counter);
+}}
+end;
+"""
+
+
+def compile_source(source):
+    program = Compiler().compile(source)
+    if not program.ok:
+        raise CompileError(program.errors)
+    return program.object_data
+
+
+def bench(name, source, repeat=3):
+    program_object = compile_source(source)
+    best = None
+    for _ in range(repeat):
+        vm = VirtualMachine()
+        with contextlib.redirect_stdout(io.StringIO()):
+            vm.load_and_initialize_memory(program_object)
+            start = time.perf_counter()
+            executed = vm.run()
+            elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[1]:
+            best = (executed, elapsed)
+    executed, elapsed = best
+    print(f"{name:<8} {executed:>10} steps  {elapsed:8.3f} s  {executed / elapsed:>12,.0f} steps/s")
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    bench('loop', LOOP_PROGRAM.format(n=n))
+    bench('calls', CALL_PROGRAM.format(n=n))
@@ -0,0 +1,222 @@
+"""Formato binario de objeto (.ldo) que escribe el compilador y carga la VM.
+
+Layout (little-endian):
+
+    header      MAGIC, version, numero de constantes/funciones/cuadruplos
+    segmentos   uint32 por segmento, en el orden de SEGMENTS
+    constantes  int:    direcciones (int32) + valores (int64)
+                float:  direcciones (int32) + valores (float64)
+                string: direcciones (int32) + longitudes (uint32) + bytes utf-8
+    funciones   registros (address, start_quad, param_count, local_var_count,
+                local_int, local_float, local_str) en int32 + longitudes de
+                nombre (uint32) + bytes utf-8
+    cuadruplos  cuatro columnas int32 (opcodes, arg1, arg2, resultados), las
+                mismas de ir.QuadBuffer
+
+Cada seccion se lee de un jalon con array.frombytes, sin partir texto.
+"""
+import struct
+import sys
+from array import array
+
+from ir import JUMP_OPS, OPCODE_NAMES, OPCODES, Op, QuadBuffer
+
+MAGIC = b'LDBC'
+VERSION = 3
+
+# magic, version, flags, n_int, n_float, n_str, n_funcs, n_quads
+HEADER = struct.Struct('<4sHHIIIII')
+
+# Orden fijo de la tabla de segmentos
+SEGMENTS = [
+    'global_int', 'global_float', 'global_str', 'global_void',
+    'local_int', 'local_float', 'local_str',
+    'temp_int', 'temp_float', 'temp_bool',
+    'cte_int', 'cte_float', 'cte_str',
+]
+
+FUNC_WIDTH = 7
+
+
+class BytecodeError(Exception):
+    pass
+
+
+class FunctionInfo:
+    def __init__(self, name, address, start_quad, param_count, local_var_count, frame_sizes):
+        self.name = name
+        self.address = address
+        self.start_quad = start_quad
+        self.param_count = param_count
+        self.local_var_count = local_var_count
+        self.frame_sizes = frame_sizes   # (local_int, local_float, local_str)
+
+
+class ObjectFile:
+    """Programa cargado: segmentos, constantes, funciones y codigo"""
+    def __init__(self, segment_sizes, constants, functions, code):
+        self.segment_sizes = segment_sizes   # {segmento: cantidad}
+        self.constants = constants           # {direccion: valor}
+        self.functions = functions           # {direccion: FunctionInfo}
+        self.code = code                     # ir.QuadBuffer
+
+    def __len__(self):
+        return len(self.code)
+
+    def quads(self):
+        """Regresa (num, opcode, arg1, arg2, resultado) para cada cuadruplo"""
+        return self.code.rows()
+
+
+def _to_le(arr):
+    if sys.byteorder != 'little':
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _encode_strings(values):
+    blobs = [v.encode('utf-8') for v in values]
+    return array('I', [len(b) for b in blobs]), b''.join(blobs)
+
+
+def write_object(cuadruplos, func_directory):
+    """Serializa los cuadruplos (QuadBuffer) y tablas del compilador al formato binario"""
+    mm = func_directory.memory_manager
+    functions = func_directory.functions
+
+    segment_sizes = array('I', [
+        mm.counters[seg] - mm.MEMORY_RANGES[seg][0] for seg in SEGMENTS
+    ])
+    # Los locales se numeran por funcion; el segmento mide lo del frame mas grande
+    for i, seg in enumerate(('local_int', 'local_float', 'local_str')):
+        segment_sizes[SEGMENTS.index(seg)] = max(
+            (func.frame_sizes()[i] for func in functions.values()), default=0)
+
+    # Pool de constantes separado por tipo segun el segmento de la direccion
+    int_addrs, int_vals = array('i'), array('q')
+    float_addrs, float_vals = array('i'), array('d')
+    str_addrs, str_vals = array('i'), []
+    for const_val, addr in sorted(mm.constants.items(), key=lambda x: x[1]):
+        if addr <= mm.MEMORY_RANGES['cte_int'][1]:
+            int_addrs.append(addr)
+            int_vals.append(int(const_val))
+        elif addr <= mm.MEMORY_RANGES['cte_float'][1]:
+            float_addrs.append(addr)
+            float_vals.append(float(const_val))
+        else:
+            str_addrs.append(addr)
+            str_vals.append(const_val[1:-1])  # quitar comillas
+    str_lens, str_blob = _encode_strings(str_vals)
+
+    func_records = array('i')
+    func_list = sorted(functions.values(), key=lambda f: f.address)
+    for func in func_list:
+        func_records.extend((func.address, func.start_quad, func.param_count, func.local_var_count))
+        func_records.extend(func.frame_sizes())
+    name_lens, name_blob = _encode_strings([f.name for f in func_list])
+
+    ops = cuadruplos.ops
+    if ops and (min(ops) < 0 or max(ops) >= len(OPCODE_NAMES)):
+        num = next(i for i, op in enumerate(ops, 1) if not 0 <= op < len(OPCODE_NAMES))
+        raise BytecodeError(f"Operador desconocido en cuadruplo {num}: {ops[num - 1]}")
+
+    parts = [
+        HEADER.pack(MAGIC, VERSION, 0, len(int_addrs), len(float_addrs),
+                    len(str_addrs), len(func_list), len(cuadruplos)),
+        _to_le(segment_sizes),
+        _to_le(int_addrs), _to_le(int_vals),
+        _to_le(float_addrs), _to_le(float_vals),
+        _to_le(str_addrs), _to_le(str_lens), str_blob,
+        _to_le(func_records), _to_le(name_lens), name_blob,
+    ]
+    parts.extend(_to_le(column) for column in cuadruplos.columns())
+    return b''.join(parts)
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def take(self, size):
+        if self.pos + size > len(self.data):
+            raise BytecodeError("Objeto truncado")
+        chunk = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return chunk
+
+    def array(self, typecode, count):
+        arr = array(typecode)
+        arr.frombytes(self.take(count * arr.itemsize))
+        if sys.byteorder != 'little':
+            arr.byteswap()
+        return arr
+
+    def strings(self, count):
+        lens = self.array('I', count)
+        blob = bytes(self.take(sum(lens)))
+        values = []
+        pos = 0
+        for n in lens:
+            values.append(blob[pos:pos + n].decode('utf-8'))
+            pos += n
+        return values
+
+
+def read_object(data):
+    """Carga un objeto binario generado por write_object"""
+    reader = _Reader(data)
+    magic, version, _, n_int, n_float, n_str, n_funcs, n_quads = HEADER.unpack(reader.take(HEADER.size))
+    if magic != MAGIC:
+        raise BytecodeError("No es un objeto .ldo")
+    if version != VERSION:
+        raise BytecodeError(f"Version de objeto no soportada: {version}")
+
+    segment_sizes = dict(zip(SEGMENTS, reader.array('I', len(SEGMENTS))))
+
+    constants = {}
+    constants.update(zip(reader.array('i', n_int), reader.array('q', n_int)))
+    constants.update(zip(reader.array('i', n_float), reader.array('d', n_float)))
+    str_addrs = reader.array('i', n_str)
+    constants.update(zip(str_addrs, reader.strings(n_str)))
+
+    records = reader.array('i', n_funcs * FUNC_WIDTH)
+    names = reader.strings(n_funcs)
+    functions = {}
+    for i, name in enumerate(names):
+        record = records[i * FUNC_WIDTH:(i + 1) * FUNC_WIDTH]
+        address, start_quad, param_count, local_var_count = record[:4]
+        functions[address] = FunctionInfo(name, address, start_quad, param_count,
+                                          local_var_count, tuple(record[4:]))
+
+    code = QuadBuffer(*(reader.array('i', n_quads) for _ in range(4)))
+    return ObjectFile(segment_sizes, constants, functions, code)
+
+
+def save_object(filename, data):
+    with open(filename, 'wb') as f:
+        f.write(data)
+
+
+def load_object(filename):
+    with open(filename, 'rb') as f:
+        return read_object(f.read())
+
+
+def disassemble(obj):
+    """Texto legible del objeto, para depurar"""
+    lines = []
+    for addr, value in sorted(obj.constants.items()):
+        lines.append(f"{addr} {value!r}")
+    lines.append("")
+    lines.extend(f"{seg} {count}" for seg, count in obj.segment_sizes.items())
+    lines.append("")
+    for func in obj.functions.values():
+        lines.append(f"func {func.name} @{func.address} start={func.start_quad} "
+                     f"params={func.param_count} locals={func.local_var_count} "
+                     f"frame={func.frame_sizes}")
+    lines.append("")
+    for num, op, arg1, arg2, res in obj.quads():
+        lines.append(f"{num} {OPCODE_NAMES[op].lower()} {arg1} {arg2} {res}")
+    return "\n".join(lines)
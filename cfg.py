@@ -0,0 +1,490 @@
+"""Bloques basicos, grafo de flujo (CFG) y forma SSA sobre los cuadruplos.
+
+    program = build_cfg(estructura)      un FunctionCFG por funcion y uno para main
+    for fn in program.functions:
+        compute_dominators(fn)
+        to_ssa(fn)
+        ...                               pasadas sobre fn.blocks
+        from_ssa(fn, memory_manager)
+    lower(program)                        de vuelta a estructura.cuadruplos
+
+En el CFG los saltos apuntan a bloques, no a numeros de cuadruplo; lower()
+acomoda los bloques otra vez y calcula los numeros. Un GOSUB termina su
+bloque pero la llamada no es una arista: el bloque sigue en el siguiente.
+
+En SSA cada escritura (asignacion, aritmetica, comparacion) crea una
+version nueva; los valores son tuplas (direccion, version) y la version 0 es
+lo que la direccion tenia al entrar a la funcion. Solo llevan phi las
+direcciones que algun bloque lee antes de escribirlas (SSA semi-podada),
+asi los temporales de una expresion nunca necesitan phi.
+
+round_trip(estructura) corre todas las etapas y regresa cuanto tardo cada
+una; benchmarks/bench_cfg.py la mide con programas de 10^5 cuadruplos.
+"""
+import time
+
+from ir import Op, QuadBuffer
+from optimizer import PURE_OPS, READS_ARG1, READS_ARG2
+
+# Terminan el bloque; los de BRANCH_OPS pueden seguir al siguiente bloque
+BRANCH_OPS = frozenset((Op.GOTOF, Op.GOTOT))
+EXIT_OPS = frozenset((Op.ENDFUNC, Op.RETURN, Op.END))
+BLOCK_END_OPS = BRANCH_OPS | EXIT_OPS | {Op.GOTO, Op.GOSUB}
+
+
+class Instr:
+    """Cuadruplo dentro de un bloque; en SSA los operandos son (direccion, version)"""
+    __slots__ = ('op', 'arg1', 'arg2', 'res')
+
+    def __init__(self, op, arg1=-1, arg2=-1, res=-1):
+        self.op = op
+        self.arg1 = arg1
+        self.arg2 = arg2
+        self.res = res
+
+    def __repr__(self):
+        return f"Instr({Op(self.op).name}, {self.arg1}, {self.arg2}, {self.res})"
+
+
+class Phi:
+    """res = phi(args[pred] por cada predecesor)"""
+    __slots__ = ('base', 'res', 'args')
+
+    def __init__(self, base):
+        self.base = base     # direccion original
+        self.res = base
+        self.args = {}       # BasicBlock predecesor -> valor
+
+    def __repr__(self):
+        args = ', '.join(f"B{pred.index}: {value}" for pred, value in self.args.items())
+        return f"Phi({self.res} <- {args})"
+
+
+class BasicBlock:
+    __slots__ = ('index', 'start', 'instrs', 'phis', 'target', 'fallthrough', 'preds')
+
+    def __init__(self, index, start):
+        self.index = index
+        self.start = start          # numero del primer cuadruplo (0 si es nuevo)
+        self.instrs = []
+        self.phis = []
+        self.target = None          # bloque destino del salto final
+        self.fallthrough = None     # bloque que sigue si no se salta
+        self.preds = []
+
+    @property
+    def succs(self):
+        succs = []
+        if self.fallthrough is not None:
+            succs.append(self.fallthrough)
+        if self.target is not None and self.target is not self.fallthrough:
+            succs.append(self.target)
+        return succs
+
+    def __repr__(self):
+        return f"BasicBlock({self.index}, start={self.start}, {len(self.instrs)} instrs)"
+
+
+class FunctionCFG:
+    """Bloques de una funcion (o de main); blocks[0] es la entrada"""
+    def __init__(self, name, func, blocks):
+        self.name = name
+        self.func = func            # semantic.Function, None para main
+        self.blocks = blocks
+        self.idom = None            # {bloque: dominador inmediato}, ver compute_dominators
+        self.in_ssa = False
+
+    @property
+    def entry(self):
+        return self.blocks[0]
+
+    def reverse_postorder(self):
+        """Bloques alcanzables desde la entrada, en postorden inverso"""
+        order = []
+        visited = {self.entry}
+        stack = [(self.entry, iter(self.entry.succs))]
+        while stack:
+            block, succs = stack[-1]
+            for succ in succs:
+                if succ not in visited:
+                    visited.add(succ)
+                    stack.append((succ, iter(succ.succs)))
+                    break
+            else:
+                stack.pop()
+                order.append(block)
+        order.reverse()
+        return order
+
+
+class ProgramCFG:
+    def __init__(self, estructura, functions):
+        self.estructura = estructura
+        self.functions = functions  # FunctionCFG en el orden del codigo
+
+
+# ---------------- Construccion ----------------
+
+def build_cfg(estructura):
+    """Parte los cuadruplos en regiones (cada funcion desde su start_quad y
+    main desde main_start_line) y cada region en bloques basicos."""
+    code = estructura.cuadruplos
+    n = len(code)
+    ops, args1, args2, results = code.columns()
+
+    regions = [(func.start_quad, func.name, func)
+               for func in estructura.func_directory.functions.values()]
+    regions.append((estructura.main_start_line, 'main', None))
+    regions.sort(key=lambda region: region[0])
+
+    leaders = {start for start, _, _ in regions}
+    for i in range(n):
+        if ops[i] in BLOCK_END_OPS or ops[i] == Op.GOTOMAIN:
+            leaders.add(i + 2)
+            if ops[i] in BRANCH_OPS or ops[i] == Op.GOTO:
+                leaders.add(results[i])
+
+    functions = []
+    for k, (start, name, func) in enumerate(regions):
+        end = regions[k + 1][0] - 1 if k + 1 < len(regions) else n
+        blocks = []
+        by_start = {}
+        for num in range(start, end + 1):
+            if num in leaders or not blocks:
+                block = BasicBlock(len(blocks), num)
+                blocks.append(block)
+                by_start[num] = block
+            i = num - 1
+            blocks[-1].instrs.append(Instr(ops[i], args1[i], args2[i], results[i]))
+
+        for block, next_block in zip(blocks, blocks[1:] + [None]):
+            last = block.instrs[-1]
+            if last.op == Op.GOTO or last.op in BRANCH_OPS:
+                block.target = by_start[last.res]
+            if last.op not in EXIT_OPS and last.op != Op.GOTO:
+                block.fallthrough = next_block
+        for block in blocks:
+            for succ in block.succs:
+                succ.preds.append(block)
+        functions.append(FunctionCFG(name, func, blocks))
+    return ProgramCFG(estructura, functions)
+
+
+# ---------------- Dominadores ----------------
+
+def compute_dominators(fn):
+    """Dominador inmediato de cada bloque alcanzable (Cooper, Harvey y
+    Kennedy: iterar sobre el postorden inverso hasta que no cambie)."""
+    order = fn.reverse_postorder()
+    position = {block: i for i, block in enumerate(order)}
+    idom = {fn.entry: fn.entry}
+
+    def intersect(a, b):
+        while a is not b:
+            while position[a] > position[b]:
+                a = idom[a]
+            while position[b] > position[a]:
+                b = idom[b]
+        return a
+
+    changed = True
+    while changed:
+        changed = False
+        for block in order[1:]:
+            new_idom = None
+            for pred in block.preds:
+                if pred in idom:
+                    new_idom = pred if new_idom is None else intersect(pred, new_idom)
+            if idom.get(block) is not new_idom:
+                idom[block] = new_idom
+                changed = True
+    fn.idom = idom
+    return idom
+
+
+def dominance_frontiers(fn):
+    """{bloque: bloques donde deja de dominar}"""
+    idom = fn.idom if fn.idom is not None else compute_dominators(fn)
+    frontiers = {block: set() for block in idom}
+    for block in idom:
+        preds = [pred for pred in block.preds if pred in idom]
+        if len(preds) < 2:
+            continue
+        for pred in preds:
+            runner = pred
+            while runner is not idom[block]:
+                frontiers[runner].add(block)
+                runner = idom[runner]
+    return frontiers
+
+
+def dominates(fn, a, b):
+    """True si el bloque a domina al bloque b"""
+    idom = fn.idom if fn.idom is not None else compute_dominators(fn)
+    while True:
+        if b is a:
+            return True
+        if b is fn.entry or b not in idom:
+            return False
+        b = idom[b]
+
+
+# ---------------- SSA ----------------
+
+def to_ssa(fn):
+    """Inserta phi y renombra cada escritura como una version nueva.
+    Los bloques que no se alcanzan desde la entrada no se tocan."""
+    idom = fn.idom if fn.idom is not None else compute_dominators(fn)
+    frontiers = dominance_frontiers(fn)
+
+    # direcciones escritas, donde se escriben y cuales se leen antes de escribirse
+    def_blocks = {}
+    upward_exposed = set()
+    for block in idom:
+        written = set()
+        for instr in block.instrs:
+            op = instr.op
+            if op in READS_ARG1 and instr.arg1 not in written:
+                upward_exposed.add(instr.arg1)
+            if op in READS_ARG2 and instr.arg2 not in written:
+                upward_exposed.add(instr.arg2)
+            if op in PURE_OPS:
+                written.add(instr.res)
+                def_blocks.setdefault(instr.res, set()).add(block)
+
+    for address, blocks in def_blocks.items():
+        if address not in upward_exposed:
+            continue
+        has_phi = set()
+        pending = list(blocks)
+        while pending:
+            block = pending.pop()
+            for frontier in frontiers[block]:
+                if frontier not in has_phi:
+                    has_phi.add(frontier)
+                    frontier.phis.append(Phi(address))
+                    if frontier not in blocks:
+                        pending.append(frontier)
+
+    # renombrar recorriendo el arbol de dominadores con una pila explicita
+    children = {block: [] for block in idom}
+    for block, parent in idom.items():
+        if block is not parent:
+            children[parent].append(block)
+    versions = {address: 0 for address in def_blocks}
+    current = {address: [(address, 0)] for address in def_blocks}
+
+    def new_version(address):
+        versions[address] += 1
+        value = (address, versions[address])
+        current[address].append(value)
+        return value
+
+    stack = [(fn.entry, None)]
+    while stack:
+        block, pushed = stack.pop()
+        if pushed is not None:
+            for address in pushed:
+                current[address].pop()
+            continue
+        pushed = []
+        for phi in block.phis:
+            phi.res = new_version(phi.base)
+            pushed.append(phi.base)
+        for instr in block.instrs:
+            op = instr.op
+            if op in READS_ARG1 and instr.arg1 in current:
+                instr.arg1 = current[instr.arg1][-1]
+            if op in READS_ARG2 and instr.arg2 in current:
+                instr.arg2 = current[instr.arg2][-1]
+            if op in PURE_OPS:
+                address = instr.res
+                instr.res = new_version(address)
+                pushed.append(address)
+        for succ in block.succs:
+            for phi in succ.phis:
+                phi.args[block] = current[phi.base][-1]
+        stack.append((block, pushed))
+        stack.extend((child, None) for child in children[block])
+    fn.in_ssa = True
+
+
+def from_ssa(fn, memory_manager):
+    """Quita las phi y regresa cada valor a su direccion.
+
+    Supone SSA convencional: dos versiones de una misma direccion nunca
+    estan vivas a la vez. to_ssa la deja asi, y una pasada que mueva usos
+    sobre la forma SSA debe conservarla (o escribir en otra direccion). Por
+    eso una phi que junta versiones de la misma direccion solo se quita.
+    Si no, se copian los valores al final de cada predecesor; si el
+    predecesor tiene otra salida, la arista se parte con un bloque nuevo.
+    Las copias de un mismo punto son paralelas; un ciclo entre ellas se
+    rompe con un lugar extra (ver cycle_slot).
+    """
+    split_blocks = []
+    for block in list(fn.blocks):
+        if not block.phis:
+            continue
+        for pred in list(block.preds):
+            copies = []
+            for phi in block.phis:
+                source = phi.args.get(pred, phi.base)
+                source = source[0] if isinstance(source, tuple) else source
+                if source != phi.base:
+                    copies.append((phi.base, source))
+            if not copies:
+                continue
+            instrs = sequence_copies(copies, memory_manager, fn.func)
+            last = pred.instrs[-1] if pred.instrs else None
+            if len(pred.succs) == 1 and (last is None or last.op not in BRANCH_OPS):
+                # antes del GOTO final, o al final (despues de un GOSUB tambien)
+                at = len(pred.instrs) - 1 if last is not None and last.op == Op.GOTO else len(pred.instrs)
+                pred.instrs[at:at] = instrs
+            else:
+                edge = BasicBlock(len(fn.blocks) + len(split_blocks), 0)
+                edge.instrs = instrs + [Instr(Op.GOTO)]
+                edge.target = block
+                edge.preds = [pred]
+                if pred.target is block:
+                    pred.target = edge
+                if pred.fallthrough is block:
+                    pred.fallthrough = edge
+                block.preds[block.preds.index(pred)] = edge
+                split_blocks.append(edge)
+        block.phis = []
+    fn.blocks.extend(split_blocks)
+
+    for block in fn.blocks:
+        for instr in block.instrs:
+            if isinstance(instr.arg1, tuple):
+                instr.arg1 = instr.arg1[0]
+            if isinstance(instr.arg2, tuple):
+                instr.arg2 = instr.arg2[0]
+            if isinstance(instr.res, tuple):
+                instr.res = instr.res[0]
+    fn.in_ssa = False
+
+
+def sequence_copies(copies, memory_manager, func=None):
+    """Copias paralelas [(destino, fuente)] -> ASSIGN en un orden valido.
+    func es la funcion donde quedan (None para main)."""
+    pending = dict(copies)
+    instrs = []
+    while pending:
+        ready = [dest for dest in pending if dest not in pending.values()]
+        if ready:
+            for dest in ready:
+                instrs.append(Instr(Op.ASSIGN, pending.pop(dest), -1, dest))
+            continue
+        # ciclo: guardar un destino en otro lugar y leerlo de ahi
+        dest = next(iter(pending))
+        temp = cycle_slot(memory_manager, func, address_type(memory_manager, dest))
+        instrs.append(Instr(Op.ASSIGN, dest, -1, temp))
+        for other, source in pending.items():
+            if source == dest:
+                pending[other] = temp
+    return instrs
+
+
+def cycle_slot(memory_manager, func, tipo):
+    """Direccion libre de tipo tipo para romper un ciclo de copias.
+
+    No hay segmento de temporales string, asi que un string va a una
+    variable nueva: local de func (su frame crece en uno) o global en main.
+    """
+    if tipo != 'string':
+        return memory_manager.allocate_temp(tipo)
+    if func is None:
+        return memory_manager.allocate_variable('string', 'global')
+    address = memory_manager.MEMORY_RANGES['local_str'][0] + func.frame_sizes()[2]
+    func.var_table.add_variable(f"$copia{address}", 'string', False, address)
+    func.local_var_count += 1
+    return address
+
+
+def address_type(memory_manager, address):
+    """'int', 'float', 'bool' o 'string' segun el segmento de la direccion"""
+    segment = memory_manager.temp_segment(address)
+    if segment is None:
+        for name, (start, end) in memory_manager.MEMORY_RANGES.items():
+            if start <= address <= end:
+                segment = name
+                break
+    kind = segment.split('_')[1] if segment else 'int'
+    return 'string' if kind == 'str' else kind
+
+
+# ---------------- De vuelta a cuadruplos ----------------
+
+def lower(program):
+    """Acomoda los bloques de cada funcion en orden y reescribe
+    estructura.cuadruplos, los inicios de funcion y main. Agrega un GOTO
+    cuando el bloque que sigue no es el que va despues en el codigo."""
+    estructura = program.estructura
+    if any(fn.in_ssa for fn in program.functions):
+        raise ValueError("lower() necesita que las funciones ya no esten en SSA")
+
+    # primera vuelta: numero de inicio de cada bloque
+    start = {}
+    layout = []
+    num = 2   # el 1 es GOTOMAIN
+    for fn in program.functions:
+        blocks = fn.blocks
+        for k, block in enumerate(blocks):
+            next_block = blocks[k + 1] if k + 1 < len(blocks) else None
+            extra_goto = block.fallthrough is not None and block.fallthrough is not next_block
+            start[block] = num
+            layout.append((block, extra_goto))
+            num += len(block.instrs) + extra_goto
+
+    entry_of = {fn.func.address: fn.entry for fn in program.functions if fn.func is not None}
+    main = next(fn for fn in program.functions if fn.func is None)
+
+    code = QuadBuffer()
+    code.append(Op.GOTOMAIN, -1, -1, start[main.entry])
+    for block, extra_goto in layout:
+        for instr in block.instrs:
+            res = instr.res
+            if instr.op == Op.GOTO or instr.op in BRANCH_OPS:
+                res = start[block.target]
+            elif instr.op == Op.GOSUB:
+                res = start[entry_of[instr.arg1]]
+            code.append(instr.op, instr.arg1, instr.arg2, res)
+        if extra_goto:
+            code.append(Op.GOTO, -1, -1, start[block.fallthrough])
+
+    for fn in program.functions:
+        if fn.func is not None:
+            fn.func.start_quad = start[fn.entry]
+    estructura.main_start_line = start[main.entry]
+    estructura.cuadruplos = code
+    estructura.linea = len(code)
+    return code
+
+
+# ---------------- Ida y vuelta con tiempos ----------------
+
+STAGES = ('build', 'dominators', 'to_ssa', 'from_ssa', 'lower')
+
+
+def round_trip(estructura):
+    """CFG -> dominadores -> SSA -> fuera de SSA -> cuadruplos.
+    Regresa {etapa: milisegundos} y deja el codigo nuevo en estructura."""
+    mm = estructura.func_directory.memory_manager
+    timings = dict.fromkeys(STAGES, 0.0)
+
+    start = time.perf_counter()
+    program = build_cfg(estructura)
+    timings['build'] = time.perf_counter() - start
+
+    for stage, work in (('dominators', compute_dominators), ('to_ssa', to_ssa),
+                        ('from_ssa', lambda fn: from_ssa(fn, mm))):
+        start = time.perf_counter()
+        for fn in program.functions:
+            work(fn)
+        timings[stage] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lower(program)
+    timings['lower'] = time.perf_counter() - start
+    return {stage: round(seconds * 1000, 3) for stage, seconds in timings.items()}
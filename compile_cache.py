@@ -0,0 +1,198 @@
+"""Cache en disco de programas compilados, por contenido.
+
+    cache = CompileCache()
+    compiler = Compiler(opt_level=1, cache=cache)
+    program = compiler.compile(source)     # la segunda vez no se parsea
+    cache.stats()                          # hits, misses, stores, evictions...
+
+La llave es el sha256 del codigo fuente, de las opciones del compilador
+(nivel y pasadas desactivadas) y de los archivos del compilador mismo
+(gramatica, acciones, optimizador, formato de objeto): si cambia cualquiera
+de ellos la llave cambia y nunca se lee un objeto viejo.
+
+Cada entrada es el objeto .ldo (cuadruplos, constantes, tamaños de segmento
+y funciones) con un encabezado y un crc32. Solo se guardan compilaciones sin
+errores.
+
+Varios procesos pueden usar el mismo directorio: cada escritor escribe a un
+temporal propio y lo publica con os.replace, asi nadie lee un archivo a
+medias; dos escritores de la misma llave escriben lo mismo. Un hit toca el
+mtime del archivo y al pasar de max_bytes se borran las entradas con el
+mtime mas viejo (LRU); si otro proceso ya las borro, no pasa nada.
+
+Para no recorrer el directorio en cada put, cada CompileCache lleva la
+cuenta de los bytes: lo que habia en el ultimo recorrido mas lo que ha
+escrito desde entonces. Solo se recorre cuando esa cuenta pasa de
+max_bytes o cada RESCAN_SECONDS (para ver lo que escribieron otros
+procesos).
+"""
+import hashlib
+import os
+import struct
+import threading
+import time
+import zlib
+
+from parser_rules import TABLE_CACHE_DIR
+
+# Archivos cuyo contenido cambia lo que produce el compilador
+COMPILER_FILES = ('lexer.py', 'parser_rules.py', 'semantic.py', 'optimizer.py',
+                  'bytecode.py', 'ir.py', 'compiler.py')
+
+ENTRY_MAGIC = b'LDCC'
+# magic, crc32 del objeto, longitud del objeto
+ENTRY_HEADER = struct.Struct('<4sII')
+ENTRY_SUFFIX = '.ldc'
+
+# un temporal con mas de esto es de un escritor que ya no existe
+STALE_TMP_SECONDS = 3600
+# cada cuanto se recorre el directorio aunque la cuenta propia no llegue
+# a max_bytes
+RESCAN_SECONDS = 60
+
+_compiler_digest = None
+
+
+def compiler_digest():
+    """sha256 de los archivos del compilador (una vez por proceso)"""
+    global _compiler_digest
+    if _compiler_digest is None:
+        import ply
+        digest = hashlib.sha256(ply.__version__.encode('ascii'))
+        base = os.path.dirname(os.path.abspath(__file__))
+        for name in COMPILER_FILES:
+            with open(os.path.join(base, name), 'rb') as f:
+                digest.update(f.read())
+        _compiler_digest = digest.hexdigest()
+    return _compiler_digest
+
+
+class CompileCache:
+    def __init__(self, directory=None, max_bytes=64 * 1024 * 1024):
+        self.directory = directory or os.path.join(TABLE_CACHE_DIR, 'programs')
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.scans = 0
+        # bytes del ultimo recorrido + los escritos despues (None: sin recorrer)
+        self._known_bytes = None
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+
+    def key(self, source, opt_level=0, disabled=()):
+        digest = hashlib.sha256(compiler_digest().encode('ascii'))
+        digest.update(f"\0{opt_level}\0{','.join(sorted(disabled))}\0".encode('utf-8'))
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """Objeto .ldo guardado con esa llave, o None"""
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            data = None
+        object_data = decode_entry(data) if data is not None else None
+        with self._lock:
+            if object_data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if object_data is not None:
+            try:
+                os.utime(path)   # lo mas reciente para el LRU
+            except OSError:
+                pass
+        return object_data
+
+    def put(self, key, object_data):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(ENTRY_HEADER.pack(ENTRY_MAGIC, zlib.crc32(object_data), len(object_data)))
+            f.write(object_data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.stores += 1
+            if self._known_bytes is not None:
+                # si reemplazo una entrada la cuenta sobra; solo adelanta el recorrido
+                self._known_bytes += ENTRY_HEADER.size + len(object_data)
+            scan = (self._known_bytes is None or self._known_bytes > self.max_bytes
+                    or time.monotonic() - self._scanned_at > RESCAN_SECONDS)
+        if scan:
+            self.evict()
+
+    def entries(self):
+        """[(mtime, tamaño, path)] de las entradas del directorio"""
+        found = []
+        now = time.time()
+        with self._lock:
+            self.scans += 1
+        try:
+            scan = list(os.scandir(self.directory))
+        except OSError:
+            return found
+        for entry in scan:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue   # otro proceso la borro
+            if entry.name.endswith(ENTRY_SUFFIX):
+                found.append((stat.st_mtime, stat.st_size, entry.path))
+            elif entry.name.endswith('.tmp') and now - stat.st_mtime > STALE_TMP_SECONDS:
+                _remove(entry.path)
+        return found
+
+    def evict(self):
+        """Borra las entradas menos usadas hasta quedar en max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if _remove(path):
+                    with self._lock:
+                        self.evictions += 1
+                total -= size
+        with self._lock:
+            self._known_bytes = total
+            self._scanned_at = time.monotonic()
+
+    def clear(self):
+        for _, _, path in self.entries():
+            _remove(path)
+        with self._lock:
+            self._known_bytes = 0
+
+    def stats(self):
+        entries = self.entries()
+        return {'hits': self.hits, 'misses': self.misses, 'stores': self.stores,
+                'evictions': self.evictions, 'scans': self.scans, 'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries)}
+
+
+def decode_entry(data):
+    """Objeto de una entrada del cache; None si esta danada"""
+    if len(data) < ENTRY_HEADER.size:
+        return None
+    magic, crc, length = ENTRY_HEADER.unpack_from(data)
+    object_data = data[ENTRY_HEADER.size:]
+    if magic != ENTRY_MAGIC or len(object_data) != length or zlib.crc32(object_data) != crc:
+        return None
+    return object_data
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,165 @@
+"""Compilador reentrante: compile(source) -> Program y run(Program).
+
+Cada compilacion crea su propia Estructura, su tokenizer y su parser (las
+tablas LALR se comparten, pero son de solo lectura), asi que se pueden
+compilar varios programas a la vez en hilos distintos del mismo proceso.
+
+Con Compiler(cache=compile_cache.CompileCache()) un programa que ya se
+compilo con las mismas opciones sale del cache sin parsear (CachedProgram).
+incremental.IncrementalCompiler recompila un documento que se edita
+parseando solo las funciones que cambiaron desde la compilacion anterior.
+"""
+from bytecode import write_object
+from lexer import PlyTokenizer
+from optimizer import optimize, recycle_temps
+from parser_rules import new_parser
+from semantic import Estructura
+from vm import test_interpreter
+
+
+class CompileError(Exception):
+    def __init__(self, errors):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+class Program:
+    """Resultado de una compilacion: arbol, tablas, errores y objeto binario"""
+    def __init__(self, source, estructura, parse_tree, lexical_errors, object_data):
+        self.source = source
+        self.estructura = estructura          # tablas y cuadruplos, para reportes
+        self.parse_tree = parse_tree
+        self.lexical_errors = lexical_errors  # (lineno, lexpos, char)
+        self.object_data = object_data        # bytes .ldo, None si hubo errores
+        self.opt_stats = None                 # resultado de optimizer.optimize
+
+    @property
+    def syntax_errors(self):
+        return self.estructura.syntax_errors
+
+    @property
+    def semantic_errors(self):
+        return self.estructura.semantic_errors
+
+    @property
+    def errors(self):
+        errors = [f"Lexer error: Unrecognized character '{char}' at line {lineno}, position {lexpos}"
+                  for lineno, lexpos, char in self.lexical_errors]
+        return errors + self.syntax_errors + self.semantic_errors
+
+    @property
+    def ok(self):
+        return self.object_data is not None
+
+
+class CachedProgram(Program):
+    """Program que salio del cache: ya tiene el objeto y no tuvo errores.
+    El arbol, las tablas y opt_stats solo existen si se compila de nuevo,
+    y eso se hace la primera vez que alguien los pide."""
+    def __init__(self, source, object_data, compiler):
+        self.source = source
+        self.object_data = object_data
+        self.lexical_errors = []
+        self._compiler = compiler
+        self._program = None
+
+    def _compiled(self):
+        if self._program is None:
+            self._program = self._compiler.build(self.source)
+        return self._program
+
+    @property
+    def estructura(self):
+        return self._compiled().estructura
+
+    @property
+    def parse_tree(self):
+        return self._compiled().parse_tree
+
+    @property
+    def opt_stats(self):
+        return self._compiled().opt_stats
+
+    @property
+    def syntax_errors(self):
+        return []
+
+    @property
+    def semantic_errors(self):
+        return []
+
+
+class Compiler:
+    def __init__(self, opt_level=0, disabled=(), cache=None):
+        # 0 = sin optimizar; ver optimizer.PASSES para lo que agrega cada nivel
+        self.opt_level = opt_level
+        # pasadas o reglas de peephole que no se corren (por nombre)
+        self.disabled = frozenset(disabled)
+        # compile_cache.CompileCache o None
+        self.cache = cache
+
+    def compile(self, source):
+        if self.cache is None:
+            return self.build(source)
+        key = self.cache.key(source, self.opt_level, self.disabled)
+        object_data = self.cache.get(key)
+        if object_data is not None:
+            return CachedProgram(source, object_data, self)
+        program = self.build(source)
+        if program.ok:
+            try:
+                self.cache.put(key, program.object_data)
+            except OSError:
+                pass   # sin cache escribible, solo se pierde el ahorro
+        return program
+
+    def build(self, source):
+        """Compila de verdad (lexer, parser, optimizador), sin cache"""
+        estructura = Estructura()
+        tokenizer = PlyTokenizer()
+        parse_tree = self.parse(source, estructura, tokenizer)
+
+        object_data = None
+        opt_stats = None
+        if (estructura.cuadruplos and not tokenizer.errors
+                and not estructura.syntax_errors and not estructura.semantic_errors):
+            if self.opt_level > 0:
+                opt_stats = optimize(estructura, self.opt_level, self.disabled)
+            if estructura.func_directory.memory_manager.overflow_temps:
+                # aun sin optimizar: si no, los temporales no caben
+                recycle_temps(estructura)
+            if not estructura.semantic_errors:
+                object_data = write_object(estructura.cuadruplos, estructura.func_directory)
+        program = Program(source, estructura, parse_tree, tokenizer.errors, object_data)
+        program.opt_stats = opt_stats
+        return program
+
+    def parse(self, source, estructura, tokenizer):
+        """Llena estructura con los cuadruplos sin optimizar; regresa el arbol"""
+        parser = new_parser(estructura)
+        return parser.parse(source, lexer=tokenizer.lexer)
+
+    def run(self, program, tracer=None, limits=None, output=None, backend='vm'):
+        """Ejecuta un Program compilado; regresa la memoria final de la VM.
+        output(value) recibe cada PRINT (por omision se imprime a stdout).
+        backend='python' lo ejecuta traducido a Python (ver pybackend); no
+        acepta tracer ni limits y regresa None."""
+        if not program.ok:
+            raise CompileError(program.errors or ["No quadruples generated"])
+        if backend == 'python':
+            if tracer is not None or limits is not None:
+                raise ValueError("El backend python no soporta tracer ni limits")
+            # se importa solo si se usa: un proceso corto de compilacion no lo paga
+            from pybackend import run_python
+            return run_python(program.object_data, output=output)
+        if backend != 'vm':
+            raise ValueError(f"Backend desconocido: {backend}")
+        return test_interpreter(program.object_data, tracer=tracer, limits=limits, output=output)
+
+
+def compile(source, opt_level=0):
+    return Compiler(opt_level).compile(source)
+
+
+def run(program, tracer=None, limits=None, output=None, backend='vm'):
+    return Compiler().run(program, tracer=tracer, limits=limits, output=output, backend=backend)
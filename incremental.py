@@ -0,0 +1,305 @@
+"""Compilacion incremental por funcion.
+
+    compiler = IncrementalCompiler(opt_level=1)
+    program = compiler.compile(source)     # completo
+    program = compiler.compile(edited)     # solo se parsean las funciones que cambiaron
+    compiler.stats                         # funciones reusadas / parseadas, lineas re-tokenizadas
+
+Cada funcion (void f(...) [ vars { cuerpo } ];) se identifica por el sha256
+de sus tokens, de los tokens de las variables globales y de las firmas de las
+funciones anteriores; su cuerpo no puede ver nada mas (solo se llama a
+funciones ya declaradas). Si esa llave salio en la compilacion anterior, al
+parser solo le llega "void f ( ) [ { } ] ;" y al cerrar la funcion
+(p_func_end) se repiten sus parametros y variables en el mismo orden (las
+mismas direcciones locales) y se pegan los cuadruplos guardados:
+
+- los saltos internos se recorren al nuevo inicio de la funcion;
+- ERA y GOSUB se resuelven por nombre (direccion e inicio nuevos);
+- temporales y constantes se piden otra vez a la MemoryManager en el orden
+  en que aparecen, que es el orden en que el parser los pidio, asi que los
+  contadores quedan igual y el objeto es el mismo que el de compilar todo.
+
+Ningun token cruza lineas, asi que tampoco se tokeniza todo: solo las lineas
+entre el principio y el final que no cambiaron desde la compilacion anterior.
+
+Los cuerpos se guardan antes de optimizar y solo de compilaciones sin
+errores; se conservan los de la ultima. En el arbol del Program las
+funciones reusadas quedan vacias y el tokenizer no llena symbol_table con
+las lineas que no se tokenizaron.
+"""
+import hashlib
+from itertools import accumulate, chain
+
+from compiler import Compiler
+from ir import Op
+from parser_rules import new_parser
+
+# tipo que se le pide a allocate_temp por segmento
+TEMP_TYPES = {'temp_int': 'int', 'temp_float': 'float', 'temp_bool': 'bool'}
+JUMPS = (Op.GOTO, Op.GOTOF, Op.GOTOT)
+CALLS = (Op.ERA, Op.GOSUB)
+
+
+class FunctionSpan:
+    """Una funcion en la lista de tokens: su llave y los tramos (inicio, fin)
+    que no se le pasan al parser si se reusa: parametros, variables y cuerpo"""
+    def __init__(self, name, key, skipped):
+        self.name = name
+        self.key = key
+        self.skipped = skipped
+
+
+def token_digest(tokens):
+    return hashlib.sha256('\0'.join([f"{tok.type}\1{tok.value!r}" for tok in tokens])
+                          .encode('utf-8')).digest()
+
+
+def split_functions(tokens):
+    """[FunctionSpan] de las funciones antes de main, en orden. Si algo no
+    tiene la forma de la gramatica se deja de buscar: lo que sigue se parsea
+    entero y el parser reporta el error."""
+    n = len(tokens)
+    i = 0
+    while i < n and tokens[i].type not in ('KEYWORD_VOID', 'KEYWORD_MAIN'):
+        i += 1
+    context = hashlib.sha256(token_digest(tokens[:i]))
+    spans = []
+    while (i + 2 < n and tokens[i].type == 'KEYWORD_VOID' and tokens[i + 1].type == 'ID'
+           and tokens[i + 2].type == 'LPAREN'):
+        bracket = i + 3
+        while bracket < n and tokens[bracket].type not in ('LBRACKET', 'LBRACE', 'KEYWORD_VOID'):
+            bracket += 1
+        brace = bracket
+        while brace < n and tokens[brace].type not in ('LBRACE', 'RBRACKET', 'KEYWORD_VOID'):
+            brace += 1
+        if (brace >= n or tokens[bracket].type != 'LBRACKET'
+                or tokens[bracket - 1].type != 'RPAREN' or tokens[brace].type != 'LBRACE'):
+            break
+        depth = 0
+        close = brace
+        while close < n:
+            kind = tokens[close].type
+            if kind == 'LBRACE':
+                depth += 1
+            elif kind == 'RBRACE':
+                depth -= 1
+                if depth == 0:
+                    break
+            close += 1
+        if (close + 2 >= n or tokens[close + 1].type != 'RBRACKET'
+                or tokens[close + 2].type != 'SEMICOLON'):
+            break
+        key = context.copy()
+        key.update(token_digest(tokens[i:close + 3]))
+        skipped = [(i + 3, bracket - 1), (bracket + 1, brace), (brace + 1, close)]
+        spans.append(FunctionSpan(tokens[i + 1].value, key.hexdigest(), skipped))
+        # lo que ven las funciones siguientes: la firma, no el cuerpo
+        context.update(token_digest(tokens[i:bracket]))
+        i = close + 3
+    return spans
+
+
+class SavedBody:
+    """Una funcion como salio del parser (cuadruplos del cuerpo sin su
+    ENDFUNC y variables), con lo necesario para pegarla en otra compilacion"""
+    def __init__(self, variables, start, quads, temps, constants, callees):
+        self.variables = variables   # [(nombre, tipo, es_parametro)] en orden
+        self.start = start           # cuadruplo donde empezaba la funcion
+        self.quads = quads           # [(op, arg1, arg2, res)]
+        self.temps = temps           # direccion -> segmento temp_*, en orden de aparicion
+        self.constants = constants   # direccion -> (valor, tipo), en orden de aparicion
+        self.callees = callees       # direccion de funcion -> nombre
+
+    def splice(self, estructura):
+        directory = estructura.func_directory
+        name = estructura.current_function
+        for var_name, tipo, is_param in self.variables:
+            directory.add_variable(var_name, tipo, name, is_param)
+
+        # en el orden en que los pidio el parser: temporales y constantes
+        # usan contadores distintos, solo importa el orden dentro de cada uno
+        mm = directory.memory_manager
+        mapped = {}
+        for address, segment in self.temps.items():
+            mapped[address] = mm.allocate_temp(TEMP_TYPES[segment])
+        estructura.counter_temporales += len(self.temps)
+        for address, (value, tipo) in self.constants.items():
+            mapped[address] = estructura.constant_address(value, tipo)
+
+        functions = directory.functions
+        shift = functions[name].start_quad - self.start
+        relocate = mapped.get
+        append = estructura.cuadruplos.append
+        for op, arg1, arg2, res in self.quads:
+            if op in JUMPS:
+                arg1 = relocate(arg1, arg1)
+                res += shift
+            elif op in CALLS:
+                callee = functions[self.callees[arg1]]
+                arg1 = callee.address
+                if op == Op.GOSUB:
+                    res = callee.start_quad
+            else:
+                arg1 = relocate(arg1, arg1)
+                arg2 = relocate(arg2, arg2)
+                res = relocate(res, res)
+            append(op, arg1, arg2, res)
+        estructura.linea = len(estructura.cuadruplos)
+
+
+def constant_value(key):
+    """(valor, tipo) de una llave de MemoryManager.constants"""
+    if key.startswith('"'):
+        return key[1:-1], 'string'
+    try:
+        return int(key), 'int'
+    except ValueError:
+        return float(key), 'float'
+
+
+def save_bodies(estructura, spans, reused):
+    """{llave: SavedBody} de las funciones de una compilacion sin errores;
+    las que se reusaron (reused: nombre -> SavedBody) se guardan tal cual"""
+    directory = estructura.func_directory
+    mm = directory.memory_manager
+    quads = estructura.cuadruplos
+    constants = {address: key for key, address in mm.constants.items()}
+    names = {function.address: name for name, function in directory.functions.items()}
+    ordered = sorted(directory.functions.values(), key=lambda function: function.start_quad)
+    ends = [function.start_quad for function in ordered[1:]] + [estructura.main_start_line]
+    bounds = {function.name: (function.start_quad, end - 1)
+              for function, end in zip(ordered, ends)}
+
+    bodies = {}
+    for span in spans:
+        if span.name in reused:
+            bodies[span.key] = reused[span.name]
+            continue
+        if span.name not in bounds:
+            continue
+        start, endfunc = bounds[span.name]
+        if endfunc < start or quads.ops[endfunc - 1] != Op.ENDFUNC:
+            continue
+        body = list(zip(quads.ops[start - 1:endfunc - 1], quads.arg1[start - 1:endfunc - 1],
+                        quads.arg2[start - 1:endfunc - 1], quads.res[start - 1:endfunc - 1]))
+        temps = {}
+        used_constants = {}
+        callees = {}
+        for op, arg1, arg2, res in body:
+            if op in CALLS:
+                callees[arg1] = names[arg1]
+                continue
+            operands = (arg1,) if op in JUMPS else (arg1, arg2, res)
+            for address in operands:
+                if address in temps or address in used_constants:
+                    continue
+                if address in constants:
+                    used_constants[address] = constant_value(constants[address])
+                else:
+                    segment = mm.temp_segment(address)
+                    if segment is not None:
+                        temps[address] = segment
+        variables = [(var.name, var.tipo, var.is_param)
+                     for var in directory.functions[span.name].var_table.variables.values()]
+        bodies[span.key] = SavedBody(variables, start, body, temps, used_constants, callees)
+    return bodies
+
+
+class IncrementalCompiler(Compiler):
+    """Compiler que recuerda los tokens y las funciones de la compilacion
+    anterior y solo tokeniza y parsea lo que cambio. Una instancia por
+    documento; no es para usarse desde varios hilos a la vez."""
+    def __init__(self, opt_level=0, disabled=(), cache=None):
+        super().__init__(opt_level, disabled, cache)
+        self.lines = None         # lineas de la ultima fuente sin errores lexicos
+        self.line_tokens = None   # tokens de cada una de esas lineas
+        self.bodies = {}
+        self.stats = {'reused': 0, 'parsed': 0, 'lexed_lines': 0}
+
+    def tokenize(self, source, tokenizer):
+        """Tokens de source; re-tokeniza solo las lineas que cambiaron"""
+        lines = source.split('\n')
+        old = self.lines or []
+        limit = min(len(lines), len(old))
+        prefix = 0
+        while prefix < limit and lines[prefix] == old[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and lines[-1 - suffix] == old[-1 - suffix]:
+            suffix += 1
+        end = len(lines) - suffix
+        offsets = [0] + list(accumulate(len(line) + 1 for line in lines))
+
+        line_tokens = self.line_tokens[:prefix] if prefix else []
+        changed = [[] for _ in range(prefix, end)]
+        lexer = tokenizer.lexer
+        lexer.lineno = prefix + 1
+        tokenizer.lean = True
+        tokenizer.lexpos_base = offsets[prefix]
+        lexer.input('\n'.join(lines[prefix:end]))
+        for tok in iter(lexer.token, None):
+            tok.lexpos += tokenizer.lexpos_base
+            changed[tok.lineno - prefix - 1].append(tok)
+        line_tokens.extend(changed)
+
+        if suffix:
+            old_end = len(old) - suffix
+            old_offsets = list(accumulate(len(line) + 1 for line in old[:old_end]))
+            line_shift = end - old_end
+            pos_shift = offsets[end] - (old_offsets[-1] if old_offsets else 0)
+            for toks in self.line_tokens[old_end:]:
+                for tok in toks:
+                    tok.lineno += line_shift
+                    tok.lexpos += pos_shift
+                line_tokens.append(toks)
+
+        if tokenizer.errors:
+            self.lines = self.line_tokens = None
+        else:
+            self.lines = lines
+            self.line_tokens = line_tokens
+        self.stats['lexed_lines'] = end - prefix
+        return list(chain.from_iterable(line_tokens))
+
+    def parse(self, source, estructura, tokenizer):
+        tokens = self.tokenize(source, tokenizer)
+        spans = split_functions(tokens) if not tokenizer.errors else []
+
+        reusable = []
+        seen = set()
+        for span in spans:
+            # un nombre repetido se parsea entero para dar los mismos errores
+            if span.key in self.bodies and span.name not in seen:
+                reusable.append(span)
+            seen.add(span.name)
+
+        parser = new_parser(estructura)
+        stream = self.token_stream(tokens, reusable, estructura)
+        parse_tree = parser.parse(lexer=tokenizer.lexer, tokenfunc=lambda: next(stream, None))
+
+        reused = estructura.reused_bodies
+        self.stats['reused'] = len(reused)
+        self.stats['parsed'] = len(spans) - len(reused)
+        if (estructura.cuadruplos and not tokenizer.errors
+                and not estructura.syntax_errors and not estructura.semantic_errors):
+            self.bodies = save_bodies(estructura, spans, reused)
+        return parse_tree
+
+    def token_stream(self, tokens, reusable, estructura):
+        """Los tokens que ve el parser: sin parametros, variables ni cuerpo de
+        las funciones reusables. Despues de un error de sintaxis ya no se
+        quita nada: la recuperacion del parser depende de los tokens y asi
+        los errores son los mismos que al compilar todo."""
+        position = 0
+        for span in reusable:
+            (start, end), *rest = span.skipped
+            yield from tokens[position:start]
+            position = start
+            if estructura.syntax_errors:
+                break
+            estructura.reused_bodies[span.name] = self.bodies[span.key]
+            position = end
+            for start, end in rest:
+                yield from tokens[position:start]
+                position = end
+        yield from tokens[position:]
@@ -0,0 +1,160 @@
+"""Representacion intermedia compacta: opcodes enteros y cuadruplos en columnas.
+
+Un QuadBuffer guarda cada campo del cuadruplo en su propio array('i')
+(ops, arg1, arg2, res), asi que un cuadruplo cuesta 16 bytes en vez de una
+tupla con cinco objetos. Las mismas columnas se escriben tal cual al .ldo
+(bytecode.py) y la VM las decodifica sin convertirlas.
+
+Todos los operandos son enteros: direcciones de memoria, numeros de
+cuadruplo (saltos), direcciones de funcion (ERA/GOSUB) o -1 si no se usa.
+"""
+from array import array
+from enum import IntEnum
+
+
+class Op(IntEnum):
+    # mismo orden que OPCODE_NAMES; el valor es el opcode del objeto binario
+    GOTOMAIN = 0
+    GOTO = 1
+    GOTOF = 2
+    GOTOT = 3
+    ERA = 4
+    PARAM = 5
+    GOSUB = 6
+    ENDFUNC = 7
+    RETURN = 8
+    ASSIGN = 9
+    ADD = 10
+    SUB = 11
+    MUL = 12
+    DIV = 13
+    UMINUS = 14
+    GT = 15
+    LT = 16
+    GE = 17
+    LE = 18
+    EQ = 19
+    NE = 20
+    PRINT = 21
+    INT_TO_FLOAT = 22
+    END = 23
+
+
+# Nombre de cada opcode como aparece en listados y en el codigo fuente
+OPCODE_NAMES = [
+    'GOTOMAIN', 'GOTO', 'GOTOF', 'GOTOT',
+    'ERA', 'PARAM', 'GOSUB', 'ENDFUNC', 'RETURN',
+    '=', '+', '-', '*', '/', 'UMINUS',
+    '>', '<', '>=', '<=', '==', '!=',
+    'PRINT', 'INT_TO_FLOAT', 'END',
+]
+OPCODES = {name: Op(code) for code, name in enumerate(OPCODE_NAMES)}
+
+JUMP_OPS = frozenset((Op.GOTOMAIN, Op.GOTO, Op.GOTOF, Op.GOTOT, Op.GOSUB))
+
+
+class Quad:
+    """Vista de un cuadruplo dentro de un QuadBuffer (no copia nada).
+
+    Se puede desempacar como la tupla de antes:
+        num, op, arg1, arg2, res = quad     # op como texto ('+', 'GOTOF', ...)
+    """
+    __slots__ = ('buffer', 'index')
+
+    def __init__(self, buffer, index):
+        self.buffer = buffer
+        self.index = index
+
+    @property
+    def num(self):
+        return self.index + 1
+
+    @property
+    def op(self):
+        return Op(self.buffer.ops[self.index])
+
+    @op.setter
+    def op(self, value):
+        self.buffer.ops[self.index] = value
+
+    @property
+    def arg1(self):
+        return self.buffer.arg1[self.index]
+
+    @arg1.setter
+    def arg1(self, value):
+        self.buffer.arg1[self.index] = value
+
+    @property
+    def arg2(self):
+        return self.buffer.arg2[self.index]
+
+    @arg2.setter
+    def arg2(self, value):
+        self.buffer.arg2[self.index] = value
+
+    @property
+    def res(self):
+        return self.buffer.res[self.index]
+
+    @res.setter
+    def res(self, value):
+        self.buffer.res[self.index] = value
+
+    @property
+    def name(self):
+        return OPCODE_NAMES[self.buffer.ops[self.index]]
+
+    def __iter__(self):
+        return iter((self.num, self.name, self.arg1, self.arg2, self.res))
+
+    def __repr__(self):
+        return f"Quad({self.num}, {self.name!r}, {self.arg1}, {self.arg2}, {self.res})"
+
+
+class QuadBuffer:
+    """Cuadruplos en cuatro columnas array('i'); el cuadruplo n esta en n-1"""
+    __slots__ = ('ops', 'arg1', 'arg2', 'res')
+
+    def __init__(self, ops=None, arg1=None, arg2=None, res=None):
+        self.ops = ops if ops is not None else array('i')
+        self.arg1 = arg1 if arg1 is not None else array('i')
+        self.arg2 = arg2 if arg2 is not None else array('i')
+        self.res = res if res is not None else array('i')
+
+    def append(self, op, arg1=-1, arg2=-1, res=-1):
+        """Agrega un cuadruplo y regresa su numero"""
+        self.ops.append(op)
+        self.arg1.append(arg1)
+        self.arg2.append(arg2)
+        self.res.append(res)
+        return len(self.ops)
+
+    def set_res(self, num, value):
+        """Cambia el resultado (destino de salto) del cuadruplo `num`"""
+        self.res[num - 1] = value
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.ops)
+        if not 0 <= index < len(self.ops):
+            raise IndexError(index)
+        return Quad(self, index)
+
+    def __iter__(self):
+        for index in range(len(self.ops)):
+            yield Quad(self, index)
+
+    def rows(self):
+        """(num, opcode, arg1, arg2, res) con el opcode entero"""
+        return zip(range(1, len(self.ops) + 1), self.ops, self.arg1, self.arg2, self.res)
+
+    def columns(self):
+        return self.ops, self.arg1, self.arg2, self.res
+
+    @property
+    def nbytes(self):
+        return sum(col.itemsize * len(col) for col in self.columns())
@@ -1,6 +1,5 @@
-# Importamos librerias necesarias
-import re
-import ply.lex as lex
+# ply.lex se importa hasta construir el lexer (ver base_lexer)
+import os
 
 
 # palabras reservadas
@@ -29,6 +28,22 @@ tokens = list(keywords.values()) + [
     #OP_MOD
 ]
 
+# Caracteres que se leen por bloque en iter_tokens
+CHUNK_SIZE = 1 << 20
+# Bytes minimos por bloque en iter_tokens_parallel
+PARALLEL_MIN_CHUNK = 256 * 1024
+
+# Lexer ya construido, compartido por el proceso. Cada PlyTokenizer usa un
+# clone ligado a su propia instancia para no reconstruir la regex maestra.
+_base_lexer = None
+
+def base_lexer():
+    global _base_lexer
+    if _base_lexer is None:
+        import ply.lex as lex
+        _base_lexer = lex.lex(module=PlyTokenizer())
+    return _base_lexer
+
 # Se define clase Lexer
 class PlyTokenizer:
     def __init__(self):
@@ -40,11 +55,21 @@ class PlyTokenizer:
         self.errors = []
         #guardar lineas formateadas para parser
         self.formatted_lines = []
+        # modo lean: sin copias por linea y una sola linea por identificador
+        self.lean = False
+        # posicion del bloque actual dentro del archivo (para lexpos global)
+        self.lexpos_base = 0
         self.keywords = keywords
         self.tokens = tokens
 
-        self.lexer = lex.lex(module=self)
-
+    def __getattr__(self, name):
+        # el lexer se crea al primer uso
+        if name == 'lexer':
+            self.lexer = base_lexer().clone(self)
+            # clone solo re-liga las tablas por estado; begin activa las nuevas
+            self.lexer.begin('INITIAL')
+            return self.lexer
+        raise AttributeError(name)
         
 #----------------------FUNCIONES LEXER -----------------
     # Regex de Tokens Literales
@@ -101,7 +126,7 @@ class PlyTokenizer:
         else:
             if t.value not in self.symbol_table: #si no se ha encontrado antes
                 self.symbol_table[t.value] = {'lines': [t.lineno]}
-            else:
+            elif not self.lean:
                 self.symbol_table[t.value]['lines'].append(t.lineno)
         return t
 
@@ -113,29 +138,158 @@ class PlyTokenizer:
     # Manejo de errores léxicos
     def t_error(self, t):
         error_substring = t.value[0]
-        self.errors.append((t.lineno, t.lexpos, error_substring))
+        self.errors.append((t.lineno, t.lexpos + self.lexpos_base, error_substring))
         t.lexer.skip(1)   
 
     # Función para tokenizar el contenido de un archivo
-    def tokenize_file(self, filename):
+    def tokenize_file(self, filename, lean=False):
+        for _ in self.iter_tokens(filename, lean):
+            pass
+
+    def iter_tokens(self, filename, lean=False, chunk_size=CHUNK_SIZE):
+        """Genera los tokens del archivo con lineno y lexpos del archivo completo.
+
+        El archivo se lee en bloques de chunk_size caracteres cortados en un
+        fin de linea (ningun token cruza lineas), asi que la memoria no depende
+        del tamaño del archivo. Con lean=True no se llenan tokens_by_line ni
+        formatted_lines y symbol_table guarda solo la primera linea de cada
+        identificador. Sirve como tokenfunc para el parser:
+            tokens = tokenizer.iter_tokens(path, lean=True)
+            parser.parse(lexer=tokenizer.lexer, tokenfunc=lambda: next(tokens, None))
+        """
         with open(filename, 'r') as f:
-            lines = f.readlines()
+            yield from self.iter_chunk_tokens(read_line_chunks(f, chunk_size), lean)
 
-        for line_number, line in enumerate(lines, 1):
-            self.lexer.input(line)
-            line_tokens = []
-            formatted_tokens = []
+    def iter_chunk_tokens(self, chunks, lean=False):
+        """Igual que iter_tokens pero sobre bloques de texto ya cortados en
+        fin de linea; la linea 1 y lexpos 0 son el inicio del primer bloque"""
+        lexer = self.lexer
+        lexer.lineno = 1
+        self.lean = lean
+        self.lexpos_base = 0
+        for chunk in chunks:
+            lexer.input(chunk)
+            if lean:
+                for tok in iter(lexer.token, None):
+                    tok.lexpos += self.lexpos_base
+                    yield tok
+            else:
+                first_line = lexer.lineno
+                lines = chunk.split('\n')
+                if chunk.endswith('\n'):
+                    lines.pop()
+                line_tokens = [[] for _ in lines]
+                for tok in iter(lexer.token, None):
+                    tok.lexpos += self.lexpos_base
+                    line_tokens[tok.lineno - first_line].append(tok)
+                    yield tok
+                for i, line in enumerate(lines):
+                    toks = line_tokens[i]
+                    self.tokens_by_line.append((first_line + i, line.rstrip(),
+                                                [(t.type, t.value, t.lexpos) for t in toks]))
+                    self.formatted_lines.append([[t.type, t.value] for t in toks])
+            self.lexpos_base += len(chunk)
+
+    def iter_tokens_parallel(self, filename, workers=None, lean=False,
+                             min_chunk_size=PARALLEL_MIN_CHUNK):
+        """Como iter_tokens, pero los bloques se tokenizan en un pool de procesos.
 
-            while True:
-                tok = self.lexer.token()
-                if not tok:
-                    break
-                line_tokens.append((tok.type, tok.value, tok.lexpos))
-                formatted_tokens.append([tok.type, tok.value])
+        El archivo se parte en bloques alineados a fin de linea (ningun token
+        cruza lineas) de al menos min_chunk_size bytes, ~4 por proceso. Cada
+        proceso tokeniza su bloque desde la linea 1 y aqui se juntan en orden,
+        sumando las lineas y caracteres de los bloques anteriores a lineno,
+        lexpos, errores, tokens_by_line y las lineas de symbol_table.
+        """
+        workers = workers or os.cpu_count() or 1
+        ranges = split_line_ranges(filename, workers * 4, min_chunk_size)
+        if len(ranges) <= 1:
+            yield from self.iter_tokens(filename, lean)
+            return
 
-            self.tokens_by_line.append((line_number, line.rstrip(), line_tokens))
-            self.formatted_lines.append(formatted_tokens)
+        from concurrent.futures import ProcessPoolExecutor
+        from ply.lex import LexToken
+        self.lean = lean
+        line_base = 0
+        pos_base = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=base_lexer) as executor:
+            jobs = [(filename, start, end, lean) for start, end in ranges]
+            for result in executor.map(lex_chunk, jobs):
+                toks, errors, symbols, by_line, n_lines, n_chars = result
+                for lineno, lexpos, char in errors:
+                    self.errors.append((lineno + line_base, lexpos + pos_base, char))
+                for name, lines in symbols.items():
+                    entry = self.symbol_table.get(name)
+                    if entry is None:
+                        self.symbol_table[name] = {'lines': [n + line_base for n in lines]}
+                    elif not lean:
+                        entry['lines'].extend(n + line_base for n in lines)
+                for lineno, line, line_toks in by_line:
+                    self.tokens_by_line.append((lineno + line_base, line,
+                                                [(t, v, p + pos_base) for t, v, p in line_toks]))
+                    self.formatted_lines.append([[t, v] for t, v, _ in line_toks])
+                for tok_type, value, lineno, lexpos in toks:
+                    tok = LexToken()
+                    tok.type = tok_type
+                    tok.value = value
+                    tok.lineno = lineno + line_base
+                    tok.lexpos = lexpos + pos_base
+                    yield tok
+                line_base += n_lines
+                pos_base += n_chars
 
     #getter para informacion dentro del constructor
     def get_formatted_lines(self):
-        return self.formatted_lines
\ No newline at end of file
+        return self.formatted_lines
+
+def read_line_chunks(f, chunk_size=CHUNK_SIZE):
+    """Bloques de ~chunk_size caracteres que siempre terminan en fin de linea"""
+    rest = ''
+    while True:
+        data = f.read(chunk_size)
+        if not data:
+            break
+        data = rest + data
+        cut = data.rfind('\n') + 1
+        if cut == 0:
+            rest = data   # linea mas larga que el bloque, seguir leyendo
+            continue
+        yield data[:cut]
+        rest = data[cut:]
+    if rest:
+        yield rest
+
+
+def split_line_ranges(filename, parts, min_chunk_size=PARALLEL_MIN_CHUNK):
+    """(inicio, fin) en bytes de hasta `parts` bloques que terminan en fin de linea"""
+    size = os.path.getsize(filename)
+    step = max(min_chunk_size, -(-size // max(parts, 1)))
+    ranges = []
+    start = 0
+    with open(filename, 'rb') as f:
+        while start < size:
+            end = start + step
+            if end < size:
+                f.seek(end)
+                f.readline()        # avanzar hasta despues del siguiente \n
+                end = f.tell()
+            end = min(end, size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def lex_chunk(job):
+    """Tokeniza un bloque del archivo en un proceso del pool; las lineas
+    (desde 1) y posiciones son relativas al inicio del bloque"""
+    filename, start, end, lean = job
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # mismos fines de linea que open(filename, 'r')
+    text = data.decode().replace('\r\n', '\n').replace('\r', '\n')
+    tokenizer = PlyTokenizer()
+    toks = [(t.type, t.value, t.lineno, t.lexpos)
+            for t in tokenizer.iter_chunk_tokens([text], lean)]
+    symbols = {name: entry['lines'] for name, entry in tokenizer.symbol_table.items()}
+    return (toks, tokenizer.errors, symbols, tokenizer.tokens_by_line,
+            text.count('\n'), len(text))
@@ -1,20 +1,20 @@
-from lexer import PlyTokenizer
-from parser_rules import parser, syntax_errors
+from compiler import Compiler
 from utils import print_tree
-from semantic import estructura, print_quadruples, print_symbol_table, print_memory_allocation, generate_function_data
-from vm import convert_quadruples_to_test, test_interpreter
+from semantic import print_quadruples, print_symbol_table, print_memory_allocation, generate_function_data
+from bytecode import save_object, read_object, disassemble
+from tracing import Tracer, FileSink, TRACE_MEMORY
 
 # Crear archivo ld
 input_text = """
 program complete_test;
 var counter : int;
-var result : float;
-var message : string;
+    result : float;
+    message : string;
 
 void math_operations(a : int, b : float, c : int)
 [ var temp : int;
-  var factor : float;
-  var output : string;
+      factor : float;
+      output : string;
   { 
     temp = a * c;
     factor = b + temp;
@@ -35,7 +35,7 @@ void math_operations(a : int, b : float, c : int)
 
 void string_processor(text : string, length : int)
 [ var processed : string;
-  var count : int;
+      count : int;
   {
     processed = text;
     count = length;
@@ -93,17 +93,16 @@ with open("semantica.ld", "r") as f:
     test_code = f.read()
 
 
-# ----------------LEXER------------------
-tokenizer = PlyTokenizer()
-
-syntax_errors = []
-
-estructura.__init__()  
+# ----------------COMPILAR------------------
+compiler = Compiler()
+program = None
+parse_tree = None
 
 try:
     # Parse
     print("Starting parse...")
-    parse_tree = parser.parse(test_code, lexer=tokenizer.lexer, debug=False)
+    program = compiler.compile(test_code)
+    parse_tree = program.parse_tree
     print(f"Parse completed. Tree type: {type(parse_tree)}")
     
   
@@ -111,7 +110,6 @@ except Exception as e:
     print(f"Exception during parsing: {e}")
     import traceback
     traceback.print_exc()
-    parse_tree = None
 
 print("\n--- PARSE TREE ---")
 if parse_tree is not None:
@@ -119,45 +117,51 @@ if parse_tree is not None:
 else:
     print("Parse tree is None - parsing failed")
 
+if program is None:
+    raise SystemExit(1)
+
+estructura = program.estructura
+
 print("\n--- Semantica  ---")
 print(f"Estado de funcion final: {estructura.current_function}")
 print(f"Contador de linea: {estructura.linea}")
 
-if estructura.cuadruplos:
-    print_quadruples()
-    print_symbol_table()
-    print_memory_allocation()
-    generate_function_data()
+if program.ok:
+    print_quadruples(estructura)
+    print_symbol_table(estructura)
+    print_memory_allocation(estructura)
+    generate_function_data(estructura)
 
-    test = convert_quadruples_to_test(estructura.cuadruplos)
+    # Objeto binario para la VM
+    save_object("semantica.ldo", program.object_data)
 
     print("\n---Representacion intermediaria ---")
-    print(test)
+    print(disassemble(read_object(program.object_data)))
 
     print("\n--- Ejecutar programa ---")
-    test_interpreter(test)
+    compiler.run(program, tracer=Tracer(TRACE_MEMORY, FileSink()))
 else:
     print("No quadruples generated - compilation failed")
 
-if tokenizer.errors:
+if program.lexical_errors:
     print("\n--- ERRORES DE LEXICO DETECTADOS ---")
-    for err in tokenizer.errors:
+    for err in program.lexical_errors:
         lineno, lexpos, char = err
         print(f"Lexer error: Unrecognized character '{char}' at line {lineno}, position {lexpos}")
 else:
     print("\n---NO SE DETECTARON ERRORES LÉXICOS ---")
 
 
-if syntax_errors:
+if program.syntax_errors:
     print("\n--- ERRORES DE SINTAXIS DETECTADOS ---")
-    for err in syntax_errors:
+    for err in program.syntax_errors:
         print(err)
 else:
     print("\n---NO SE DETECTARON ERRORES SINTÁCTICOS ---")
 
-if estructura.semantic_errors:
+if program.semantic_errors:
     print("\n--- ERRORES SEMÁNTICOS DETECTADOS ---")
-    for err in estructura.semantic_errors:
+    for err in program.semantic_errors:
         print(err)
 else:
     print("\n---NO SE DETECTARON ERRORES SEMÁNTICOS ---")
@@ -0,0 +1,854 @@
+"""Optimizacion de cuadruplos entre la generacion de codigo y la VM.
+
+optimize(estructura, level) corre sobre estructura.cuadruplos (ir.QuadBuffer)
+las pasadas con nivel <= level, en orden:
+
+    1  fold_constants   plegado de expresiones constantes y propagacion de
+                        constantes en codigo lineal (dentro de cada bloque)
+    2  eliminate_common_subexpressions
+                        numeracion de valores en cada bloque basico: una
+                        expresion ya calculada se reusa en vez de repetirse
+    2  hoist_loop_invariants
+                        saca de los ciclos do-while lo que no cambia
+                        dentro de ellos
+    1  eliminate_dead_code
+                        codigo inalcanzable, funciones sin llamadas,
+                        cuadruplos cuyo resultado nadie lee y constantes
+                        que ya no se usan
+    1  peephole         reglas locales: copias de temporales, cadenas de
+                        saltos, saltos al siguiente, GOTOF sobre GOTO
+    1  recycle_temps    reuso de direcciones de temporales segun su tiempo
+                        de vida (siempre al final)
+
+Las pasadas modifican las columnas en sitio o marcan cuadruplos para
+borrar; compact() los quita y renumera saltos, inicios de funcion y main.
+"""
+import bisect
+import operator
+
+from ir import JUMP_OPS, Op, QuadBuffer
+from semantic import TEMP_SEGMENTS
+
+# Lectura/escritura de operandos por opcode
+BINARY_OPS = {
+    Op.ADD: operator.add,
+    Op.SUB: operator.sub,
+    Op.MUL: operator.mul,
+    Op.DIV: operator.truediv,
+}
+COMPARE_OPS = {
+    Op.GT: operator.gt,
+    Op.LT: operator.lt,
+    Op.GE: operator.ge,
+    Op.LE: operator.le,
+    Op.EQ: operator.eq,
+    Op.NE: operator.ne,
+}
+UNARY_OPS = {
+    Op.UMINUS: operator.neg,
+    Op.INT_TO_FLOAT: float,
+}
+READS_ARG1 = frozenset(
+    [Op.ASSIGN, Op.PARAM, Op.PRINT, Op.GOTOF, Op.GOTOT]
+    + list(BINARY_OPS) + list(COMPARE_OPS) + list(UNARY_OPS))
+READS_ARG2 = frozenset(list(BINARY_OPS) + list(COMPARE_OPS))
+# Despues de estos el siguiente cuadruplo empieza bloque
+BLOCK_ENDS = JUMP_OPS | {Op.ENDFUNC, Op.RETURN, Op.END}
+# Terminan el flujo (ENDFUNC regresa al que llamo, que sigue despues del GOSUB)
+FLOW_ENDS = frozenset((Op.ENDFUNC, Op.RETURN, Op.END))
+# Sin efectos fuera de su resultado: se pueden borrar si nadie lo lee
+PURE_OPS = frozenset([Op.ASSIGN] + list(BINARY_OPS) + list(COMPARE_OPS) + list(UNARY_OPS))
+CONSTANT_SEGMENTS = ('cte_int', 'cte_float', 'cte_str')
+# a op b == b op a
+COMMUTATIVE_OPS = frozenset((Op.ADD, Op.MUL, Op.EQ, Op.NE))
+
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def optimize(estructura, level=1, disabled=()):
+    """Corre las pasadas hasta `level`; regresa cuantos cuadruplos habia y quedan.
+
+    disabled son nombres de pasadas o de reglas de peephole (PEEPHOLE_RULES)
+    que no se corren. Las pasadas que cuentan lo que hicieron dejan ese
+    conteo en el resultado bajo su nombre.
+    """
+    before = len(estructura.cuadruplos)
+    stats = {'level': level, 'quads_before': before}
+    for min_level, opt_pass in PASSES:
+        if level < min_level or opt_pass.__name__ in disabled:
+            continue
+        if opt_pass is peephole:
+            result = peephole(estructura, [name for name in PEEPHOLE_RULES if name not in disabled])
+        else:
+            result = opt_pass(estructura)
+        if result is not None:
+            stats[opt_pass.__name__] = result
+    stats['quads_after'] = len(estructura.cuadruplos)
+    return stats
+
+
+# ---------------- Utilidades ----------------
+
+def block_leaders(estructura):
+    """Numeros de cuadruplo donde empieza un bloque basico"""
+    code = estructura.cuadruplos
+    leaders = {1}
+    leaders.update(func.start_quad for func in estructura.func_directory.functions.values())
+    for num, op, arg1, arg2, res in code.rows():
+        if op in JUMP_OPS:
+            leaders.add(res)
+        if op in BLOCK_ENDS:
+            leaders.add(num + 1)
+    return leaders
+
+
+def jump_targets(estructura):
+    """Cuadruplos a los que se llega por salto, GOSUB o GOTOMAIN"""
+    ops, _, _, results = estructura.cuadruplos.columns()
+    targets = {results[i] for i in range(len(ops)) if ops[i] in JUMP_OPS}
+    targets.update(func.start_quad for func in estructura.func_directory.functions.values())
+    targets.add(estructura.main_start_line)
+    return targets
+
+
+def compact(estructura, keep):
+    """Quita los cuadruplos con keep[i] falso. Un salto a un cuadruplo borrado
+    pasa al siguiente que se conserva."""
+    code = estructura.cuadruplos
+    n = len(code)
+    # new_num[old] para old en 1..n+1 (n+1 = fin del programa); de atras
+    # para adelante, un borrado toma el numero del siguiente conservado
+    kept = sum(1 for flag in keep if flag)
+    new_num = [0] * (n + 2)
+    next_num = new_num[n + 1] = kept + 1
+    for old in range(n, 0, -1):
+        if keep[old - 1]:
+            next_num = kept
+            kept -= 1
+        new_num[old] = next_num
+
+    new_code = QuadBuffer()
+    for i, (num, op, arg1, arg2, res) in enumerate(code.rows()):
+        if not keep[i]:
+            continue
+        if op in JUMP_OPS and 1 <= res <= n + 1:
+            res = new_num[res]
+        new_code.append(op, arg1, arg2, res)
+
+    for func in estructura.func_directory.functions.values():
+        func.start_quad = new_num[func.start_quad]
+    estructura.main_start_line = new_num[estructura.main_start_line]
+    estructura.cuadruplos = new_code
+    estructura.linea = len(new_code)
+
+
+def constant_values(memory_manager):
+    """{direccion: valor} de las constantes numericas de la tabla"""
+    ranges = memory_manager.MEMORY_RANGES
+    values = {}
+    for key, address in memory_manager.constants.items():
+        if ranges['cte_int'][0] <= address <= ranges['cte_int'][1]:
+            values[address] = int(key)
+        elif ranges['cte_float'][0] <= address <= ranges['cte_float'][1]:
+            values[address] = float(key)
+    return values
+
+
+def successors(num, op, res, call_edges=True):
+    """Cuadruplos que pueden seguir a `num`. Con call_edges=False un GOSUB
+    solo sigue al siguiente (la llamada no toca el frame del que llama)."""
+    if op in FLOW_ENDS:
+        return ()
+    if op in (Op.GOTO, Op.GOTOMAIN):
+        return (res,)
+    if op in (Op.GOTOF, Op.GOTOT):
+        return (num + 1, res)
+    if op == Op.GOSUB and call_edges:
+        return (num + 1, res)
+    return (num + 1,)
+
+
+def is_temp(memory_manager, address):
+    return memory_manager.temp_segment(address) is not None
+
+
+# ---------------- Plegado y propagacion de constantes ----------------
+
+def fold_constants(estructura):
+    """Evalua en compilacion las operaciones con operandos constantes.
+
+    - Cada lectura de una variable o temporal con valor conocido se cambia
+      por la direccion de su constante (cte_int / cte_float).
+    - Una operacion aritmetica con ambos operandos constantes se calcula con
+      la misma semantica de la VM; el resultado se da de alta en la tabla de
+      constantes y el cuadruplo desaparece si ya nadie lee su temporal.
+    - Una comparacion constante no tiene segmento de constantes (no hay
+      cte_bool), pero decide su GOTOF/GOTOT: se vuelve GOTO o se quita.
+
+    Los valores de variables solo se conocen dentro de un bloque basico; los
+    temporales se asignan una sola vez, asi que su valor vale en todo el
+    programa. Un GOSUB olvida los valores de variables.
+    """
+    code = estructura.cuadruplos
+    mm = estructura.func_directory.memory_manager
+    values = constant_values(mm)
+    leaders = block_leaders(estructura)
+    ops, args1, args2, results = code.columns()
+
+    var_consts = {}    # variable -> direccion de constante
+    temp_consts = {}   # temporal -> direccion de constante
+    temp_bools = {}    # temporal bool -> valor conocido
+    folded = {}        # temporal -> indice del cuadruplo que lo calculaba
+    keep = [True] * len(code)
+
+    def constant_of(address):
+        return temp_consts.get(address) or var_consts.get(address)
+
+    def new_constant(value):
+        # None si ya no cabe (en su segmento o en int64): entonces esa
+        # operacion no se pliega y la VM la calcula con ints de Python
+        if isinstance(value, float):
+            address = mm.get_constant_address(value, 'float')
+        else:
+            address = mm.get_constant_address(value, 'int')
+        if address is not None:
+            values[address] = value
+        return address
+
+    for i in range(len(code)):
+        if i + 1 in leaders:
+            var_consts.clear()
+        op = ops[i]
+
+        # propagar: operandos con valor conocido -> su constante
+        if op in READS_ARG1 and op not in (Op.GOTOF, Op.GOTOT):
+            const = constant_of(args1[i])
+            if const:
+                args1[i] = const
+        if op in READS_ARG2:
+            const = constant_of(args2[i])
+            if const:
+                args2[i] = const
+
+        arg1, arg2, dest = args1[i], args2[i], results[i]
+        if op in BINARY_OPS or op in UNARY_OPS:
+            value = None
+            if op in UNARY_OPS:
+                if arg1 in values:
+                    value = UNARY_OPS[op](values[arg1])
+            elif arg1 in values and arg2 in values:
+                # la VM deja 0 al dividir entre cero; eso no se pliega
+                if not (op == Op.DIV and values[arg2] == 0):
+                    value = BINARY_OPS[op](values[arg1], values[arg2])
+            const = None
+            if value is not None and not (isinstance(value, int) and not INT64_MIN <= value <= INT64_MAX):
+                const = new_constant(value)
+            if const is not None:
+                if is_temp(mm, dest):
+                    temp_consts[dest] = const
+                    folded[dest] = i
+                    keep[i] = False
+                else:
+                    ops[i], args1[i], args2[i] = Op.ASSIGN, const, -1
+                    var_consts[dest] = const
+            else:
+                var_consts.pop(dest, None)
+        elif op in COMPARE_OPS:
+            if arg1 in values and arg2 in values:
+                temp_bools[dest] = COMPARE_OPS[op](values[arg1], values[arg2])
+                folded[dest] = i
+        elif op == Op.ASSIGN:
+            if arg1 in values:
+                var_consts[dest] = arg1
+            else:
+                var_consts.pop(dest, None)
+        elif op in (Op.GOTOF, Op.GOTOT) and arg1 in temp_bools:
+            taken = temp_bools[arg1] if op == Op.GOTOT else not temp_bools[arg1]
+            if taken:
+                ops[i], args1[i] = Op.GOTO, -1
+            else:
+                keep[i] = False
+        elif op == Op.GOSUB:
+            var_consts.clear()
+
+    # Un temporal plegado que alguien todavia lee conserva su cuadruplo
+    # (como asignacion de la constante si era aritmetica)
+    used = set()
+    for i in range(len(code)):
+        if keep[i]:
+            op = ops[i]
+            if op in READS_ARG1:
+                used.add(args1[i])
+            if op in READS_ARG2:
+                used.add(args2[i])
+    for temp, i in folded.items():
+        if temp in used:
+            if not keep[i]:
+                keep[i] = True
+                ops[i], args1[i], args2[i] = Op.ASSIGN, temp_consts[temp], -1
+        else:
+            keep[i] = False
+
+    if not all(keep):
+        compact(estructura, keep)
+
+
+# ---------------- Subexpresiones comunes ----------------
+
+def eliminate_common_subexpressions(estructura):
+    """Numeracion de valores local: dentro de un bloque basico, una operacion
+    (op, arg1, arg2) cuyos operandos tienen los mismos numeros de valor que
+    una anterior se vuelve una copia del resultado anterior.
+
+    Cada escritura a una variable le da un numero de valor nuevo, asi que
+    las expresiones que la leian dejan de coincidir. Todo se olvida al
+    empezar un bloque (incluye despues de cada GOSUB). PARAM escribe en el
+    frame de la funcion llamada, no en el actual, asi que no cuenta como
+    escritura. Las lecturas siguientes del temporal repetido, dentro del
+    bloque, pasan a leer el original; la copia que queda la quita
+    eliminate_dead_code si ya nadie la lee.
+    """
+    code = estructura.cuadruplos
+    mm = estructura.func_directory.memory_manager
+    ops, args1, args2, results = code.columns()
+    leaders = block_leaders(estructura)
+
+    value_of = {}     # direccion -> numero de valor que tiene ahora
+    available = {}    # (op, vn1, vn2) -> (direccion que lo tiene, su numero de valor)
+    copies = {}       # temporal repetido -> temporal original
+    next_vn = [0]
+
+    def new_value():
+        next_vn[0] += 1
+        return next_vn[0]
+
+    def value(address):
+        if address not in value_of:
+            value_of[address] = new_value()
+        return value_of[address]
+
+    applied = 0
+    for i in range(len(code)):
+        if i + 1 in leaders:
+            value_of.clear()
+            available.clear()
+            copies.clear()
+        op = ops[i]
+        if op in READS_ARG1 and args1[i] in copies:
+            args1[i] = copies[args1[i]]
+        if op in READS_ARG2 and args2[i] in copies:
+            args2[i] = copies[args2[i]]
+
+        dest = results[i]
+        if op == Op.ASSIGN:
+            value_of[dest] = value(args1[i])
+            continue
+        if op not in BINARY_OPS and op not in COMPARE_OPS and op not in UNARY_OPS:
+            continue
+
+        if op in READS_ARG2:
+            key = (op, value(args1[i]), value(args2[i]))
+            if op in COMMUTATIVE_OPS and key[1] > key[2]:
+                key = (op, key[2], key[1])
+        else:
+            key = (op, value(args1[i]), None)
+        holder, holder_vn = available.get(key, (None, None))
+        if holder is not None and value_of.get(holder) == holder_vn:
+            ops[i] = Op.ASSIGN
+            args1[i] = holder
+            args2[i] = -1
+            value_of[dest] = holder_vn
+            if is_temp(mm, dest) and is_temp(mm, holder):
+                copies[dest] = holder
+            applied += 1
+            continue
+        value_of[dest] = new_value()
+        available[key] = (dest, value_of[dest])
+    return applied
+
+
+# ---------------- Codigo invariante de ciclos ----------------
+
+def find_loops(estructura):
+    """Ciclos naturales (inicio, fin) por los saltos hacia atras, de adentro
+    hacia afuera. El codigo es estructurado, asi que el ciclo es el rango
+    inicio..fin; se descarta si alguien de fuera salta a la mitad."""
+    ops, _, _, results = estructura.cuadruplos.columns()
+    loops = []
+    for i in range(len(ops)):
+        if ops[i] in (Op.GOTO, Op.GOTOF, Op.GOTOT) and 1 <= results[i] <= i + 1:
+            loops.append((results[i], i + 1))
+    entries = [(i + 1, results[i]) for i in range(len(ops)) if ops[i] in JUMP_OPS]
+    valid = []
+    for head, end in loops:
+        if not any(head < target <= end and not head <= source <= end
+                   for source, target in entries):
+            valid.append((head, end))
+    valid.sort(key=lambda loop: loop[1] - loop[0])
+    return valid
+
+
+def hoist_loop_invariants(estructura):
+    """Mueve a un preencabezado, justo antes del ciclo, las operaciones
+    cuyos operandos no se escriben dentro del ciclo.
+
+    Solo se mueven operaciones que escriben un temporal: cada temporal se
+    escribe una vez y la VM no falla al calcular (dividir entre cero da 0),
+    asi que calcularlo aunque la rama que lo usaba no se tome no cambia
+    nada. Si el ciclo tiene un GOSUB, las globales cuentan como escritas, y
+    si la llamada puede volver a la misma funcion no se mueve nada: los
+    temporales son globales en la VM y la llamada recursiva escribiria el
+    que se saco del ciclo. Los ciclos de adentro van primero; lo que sacan puede volver a salir
+    del ciclo de afuera.
+    """
+    applied = 0
+    while True:
+        # lo que ya salio de un ciclo no vuelve a estar en el, asi que termina
+        for head, end in find_loops(estructura):
+            if calls_back(estructura, head, end):
+                continue
+            hoisted = loop_invariants(estructura, head, end)
+            if hoisted:
+                break
+        else:
+            return applied
+        move_to_preheader(estructura, head, end, hoisted)
+        applied += len(hoisted)
+
+
+def calls_back(estructura, head, end):
+    """True si un GOSUB del ciclo llega (directo o no) a la funcion del ciclo"""
+    ops, _, _, results = estructura.cuadruplos.columns()
+    main_start = estructura.main_start_line
+    starts = sorted(func.start_quad for func in estructura.func_directory.functions.values())
+    if head >= main_start or not starts:
+        return False   # main no se puede llamar
+    # cada funcion llega hasta donde empieza la siguiente (o main)
+    bounds = sorted(set(starts) | {main_start, len(ops) + 1})
+    own = starts[bisect.bisect_right(starts, head) - 1]
+
+    pending = [results[i] for i in range(head - 1, end) if ops[i] == Op.GOSUB]
+    seen = set()
+    while pending:
+        start = pending.pop()
+        if start == own:
+            return True
+        if start in seen:
+            continue
+        seen.add(start)
+        stop = bounds[bisect.bisect_right(bounds, start)]
+        pending.extend(results[i] for i in range(start - 1, stop - 1) if ops[i] == Op.GOSUB)
+    return False
+
+
+def loop_invariants(estructura, head, end):
+    """Indices (0-based) de los cuadruplos invariantes del ciclo head..end"""
+    mm = estructura.func_directory.memory_manager
+    ops, args1, args2, results = estructura.cuadruplos.columns()
+    body = range(head - 1, end)
+    written = {results[i] for i in body if ops[i] in PURE_OPS}
+    calls = any(ops[i] == Op.GOSUB for i in body)
+    global_start = mm.MEMORY_RANGES['global_int'][0]
+    global_end = mm.MEMORY_RANGES['global_str'][1]
+
+    def invariant(address):
+        if calls and global_start <= address <= global_end:
+            return False
+        return address not in written or address in hoisted_temps
+
+    hoisted = set()
+    hoisted_temps = set()
+    changed = True
+    while changed:
+        changed = False
+        for i in body:
+            op = ops[i]
+            if i in hoisted or op not in PURE_OPS:
+                continue
+            if not is_temp(mm, results[i]):
+                continue
+            if not invariant(args1[i]) or (op in READS_ARG2 and not invariant(args2[i])):
+                continue
+            hoisted.add(i)
+            hoisted_temps.add(results[i])
+            changed = True
+    return sorted(hoisted)
+
+
+def move_to_preheader(estructura, head, end, hoisted):
+    """Pone los cuadruplos `hoisted` antes de `head`. Los saltos de fuera a
+    head llegan al preencabezado; los de dentro, al ciclo."""
+    code = estructura.cuadruplos
+    n = len(code)
+    moved = set(hoisted)
+    rest = [i for i in range(head - 1, end) if i not in moved]
+    order = list(range(head - 1)) + list(hoisted) + rest + list(range(end, n))
+
+    # numero nuevo de cada cuadruplo del ciclo que se queda; uno movido que
+    # era destino de salto pasa al siguiente que se queda
+    inside = {}
+    next_num = head + len(hoisted) + len(rest)
+    for i in range(end - 1, head - 2, -1):
+        if i not in moved:
+            next_num -= 1
+        inside[i + 1] = next_num
+
+    new_code = QuadBuffer()
+    for i in order:
+        op, arg1, arg2, res = code.ops[i], code.arg1[i], code.arg2[i], code.res[i]
+        if op in JUMP_OPS and head <= res <= end:
+            from_inside = head <= i + 1 <= end
+            if from_inside or res != head:
+                res = inside[res]
+        new_code.append(op, arg1, arg2, res)
+    estructura.cuadruplos = new_code
+
+
+# ---------------- Eliminacion de codigo muerto ----------------
+
+def eliminate_dead_code(estructura):
+    """Quita lo que no cambia la salida del programa.
+
+    1. Alcance desde GOTOMAIN (los GOSUB alcanzan el inicio de la funcion):
+       lo no alcanzado se borra, y las funciones que nadie llama salen del
+       directorio, asi no cuentan para el tamaño del frame.
+    2. Vivacidad de temporales y variables por funcion: un cuadruplo puro
+       (asignacion, aritmetica, comparacion) cuyo destino no se lee despues
+       se borra. Los operandos de un cuadruplo muerto no cuentan como
+       lecturas, asi las cadenas muertas salen en una vuelta; se repite
+       hasta que ya no cambia nada.
+    3. Las constantes que ya nadie lee salen de la tabla y las demas se
+       renumeran seguidas en su segmento.
+
+    La vivacidad es intraprocedural: una funcion no ve las variables del que
+    la llama (solo sus parametros, que PARAM escribe en el frame nuevo) y los
+    temporales nunca viven a traves de una llamada, que es una sentencia.
+    """
+    remove_unreachable(estructura)
+    while remove_dead_quads(estructura):
+        pass
+    prune_constants(estructura)
+
+
+def remove_unreachable(estructura):
+    code = estructura.cuadruplos
+    n = len(code)
+    ops, _, _, results = code.columns()
+    reached = [False] * n
+    pending = [1]
+    while pending:
+        num = pending.pop()
+        if not 1 <= num <= n or reached[num - 1]:
+            continue
+        reached[num - 1] = True
+        pending.extend(successors(num, ops[num - 1], results[num - 1]))
+
+    functions = estructura.func_directory.functions
+    for name in [name for name, func in functions.items()
+                 if not 1 <= func.start_quad <= n or not reached[func.start_quad - 1]]:
+        del functions[name]
+    if not all(reached):
+        compact(estructura, reached)
+
+
+def live_out_sets(estructura, tracked=None, strong=False):
+    """Direcciones vivas a la salida de cada cuadruplo (indice = num - 1).
+
+    Vivacidad hacia atras sobre el flujo de cada funcion: un GOSUB solo
+    sigue al cuadruplo siguiente y ENDFUNC/END no tienen sucesores.
+    tracked(address) limita las direcciones que se siguen.
+    strong=True: un cuadruplo puro cuyo destino esta muerto no hace vivos
+    sus operandos, asi una cadena de asignaciones muertas (x = x + 1 sin
+    nadie que lea x) sale completa en una sola vuelta.
+    """
+    code = estructura.cuadruplos
+    n = len(code)
+    ops, args1, args2, results = code.columns()
+
+    uses = []
+    for i in range(n):
+        op = ops[i]
+        used = ()
+        if op in READS_ARG2:
+            used = (args1[i], args2[i])
+        elif op in READS_ARG1:
+            used = (args1[i],)
+        if tracked is not None:
+            used = tuple(address for address in used if tracked(address))
+        uses.append(used)
+
+    succ = [successors(i + 1, ops[i], results[i], call_edges=False) for i in range(n)]
+    live_in = [frozenset()] * (n + 2)
+    changed = True
+    while changed:
+        changed = False
+        for i in range(n - 1, -1, -1):
+            live = set()
+            for s in succ[i]:
+                live |= live_in[s]
+            if ops[i] not in PURE_OPS:
+                live.update(uses[i])
+            elif not strong or results[i] in live:
+                live.discard(results[i])
+                live.update(uses[i])
+            if live != live_in[i + 1]:
+                live_in[i + 1] = frozenset(live)
+                changed = True
+
+    live_out = []
+    for i in range(n):
+        live = set()
+        for s in succ[i]:
+            live |= live_in[s]
+        live_out.append(live)
+    return live_out
+
+
+def remove_dead_quads(estructura):
+    """Una vuelta de vivacidad; regresa True si borro algo"""
+    code = estructura.cuadruplos
+    ops, _, _, results = code.columns()
+    # las constantes nunca se escriben: seguirlas solo infla los conjuntos
+    constants = set(estructura.func_directory.memory_manager.constants.values())
+    live_out = live_out_sets(estructura, tracked=lambda address: address not in constants,
+                             strong=True)
+    keep = [ops[i] not in PURE_OPS or results[i] in live_out[i] for i in range(len(code))]
+    if all(keep):
+        return False
+    compact(estructura, keep)
+    return True
+
+
+def prune_constants(estructura):
+    """Tabla de constantes solo con las que leen los cuadruplos, sin huecos"""
+    code = estructura.cuadruplos
+    mm = estructura.func_directory.memory_manager
+    ops, args1, args2, _ = code.columns()
+    referenced = set()
+    for i in range(len(code)):
+        if ops[i] in READS_ARG1:
+            referenced.add(args1[i])
+        if ops[i] in READS_ARG2:
+            referenced.add(args2[i])
+
+    remap = {}
+    for segment in CONSTANT_SEGMENTS:
+        start, end = mm.MEMORY_RANGES[segment]
+        addresses = sorted(addr for addr in mm.constants.values()
+                           if start <= addr <= end and addr in referenced)
+        for k, address in enumerate(addresses):
+            remap[address] = start + k
+        mm.counters[segment] = start + len(addresses)
+    mm.constants = {key: remap[address] for key, address in mm.constants.items()
+                    if address in remap}
+
+    for i in range(len(code)):
+        if ops[i] in READS_ARG1 and args1[i] in remap:
+            args1[i] = remap[args1[i]]
+        if ops[i] in READS_ARG2 and args2[i] in remap:
+            args2[i] = remap[args2[i]]
+
+
+# ---------------- Peephole ----------------
+
+def peephole(estructura, rules=None):
+    """Aplica las reglas de PEEPHOLE_RULES (o solo las de `rules`) hasta que
+    ninguna cambia nada; regresa {regla: veces que se aplico}."""
+    rules = list(PEEPHOLE_RULES) if rules is None else list(rules)
+    counts = dict.fromkeys(rules, 0)
+    changed = True
+    while changed:
+        changed = False
+        for name in rules:
+            applied = PEEPHOLE_RULES[name](estructura)
+            counts[name] += applied
+            changed = changed or applied > 0
+    return counts
+
+
+def retarget_temp_copy(estructura):
+    """`op a b t` + `= t x` -> `op a b x` si t no se lee en ningun otro lado"""
+    code = estructura.cuadruplos
+    mm = estructura.func_directory.memory_manager
+    ops, args1, args2, results = code.columns()
+    targets = jump_targets(estructura)
+    reads = {}
+    for i in range(len(code)):
+        if ops[i] in READS_ARG1:
+            reads[args1[i]] = reads.get(args1[i], 0) + 1
+        if ops[i] in READS_ARG2:
+            reads[args2[i]] = reads.get(args2[i], 0) + 1
+
+    keep = [True] * len(code)
+    applied = 0
+    for i in range(len(code) - 1):
+        temp = results[i]
+        if (ops[i] in PURE_OPS and ops[i + 1] == Op.ASSIGN and args1[i + 1] == temp
+                and i + 2 not in targets and keep[i] and is_temp(mm, temp)
+                and reads.get(temp) == 1):
+            results[i] = results[i + 1]
+            keep[i + 1] = False
+            applied += 1
+    if applied:
+        compact(estructura, keep)
+    return applied
+
+
+def thread_jumps(estructura):
+    """Un salto a un GOTO va directo al destino final de la cadena"""
+    code = estructura.cuadruplos
+    ops, _, _, results = code.columns()
+    n = len(code)
+
+    def final_target(target):
+        seen = set()
+        while 1 <= target <= n and ops[target - 1] == Op.GOTO and target not in seen:
+            seen.add(target)
+            target = results[target - 1]
+        return target
+
+    applied = 0
+    for i in range(n):
+        if ops[i] in (Op.GOTOMAIN, Op.GOTO, Op.GOTOF, Op.GOTOT):
+            target = final_target(results[i])
+            if target != results[i]:
+                results[i] = target
+                applied += 1
+    return applied
+
+
+def remove_jump_to_next(estructura):
+    """GOTO/GOTOF/GOTOT al cuadruplo siguiente no hacen nada"""
+    code = estructura.cuadruplos
+    ops, _, _, results = code.columns()
+    keep = [not (ops[i] in (Op.GOTO, Op.GOTOF, Op.GOTOT) and results[i] == i + 2)
+            for i in range(len(code))]
+    applied = keep.count(False)
+    if applied:
+        compact(estructura, keep)
+    return applied
+
+
+def invert_branch_over_goto(estructura):
+    """`GOTOF c L` + `GOTO M` + `L:` -> `GOTOT c M` (y al reves con GOTOT)"""
+    code = estructura.cuadruplos
+    ops, _, _, results = code.columns()
+    targets = jump_targets(estructura)
+    inverse = {Op.GOTOF: Op.GOTOT, Op.GOTOT: Op.GOTOF}
+    keep = [True] * len(code)
+    applied = 0
+    for i in range(len(code) - 1):
+        if (ops[i] in inverse and ops[i + 1] == Op.GOTO and results[i] == i + 3
+                and keep[i] and i + 2 not in targets):
+            ops[i] = inverse[ops[i]]
+            results[i] = results[i + 1]
+            keep[i + 1] = False
+            applied += 1
+    if applied:
+        compact(estructura, keep)
+    return applied
+
+
+# nombre -> regla, en el orden en que se prueban
+PEEPHOLE_RULES = {
+    'retarget_temp_copy': retarget_temp_copy,
+    'thread_jumps': thread_jumps,
+    'remove_jump_to_next': remove_jump_to_next,
+    'invert_branch_over_goto': invert_branch_over_goto,
+}
+
+
+# ---------------- Reuso de temporales ----------------
+
+def recycle_temps(estructura):
+    """Reasigna las direcciones de temporales segun su tiempo de vida.
+
+    Dos temporales interfieren si uno se escribe mientras el otro sigue vivo;
+    a cada temporal, en orden de definicion, le toca la direccion mas baja de
+    su segmento que no use ninguno con el que interfiere. Asi cada segmento
+    temp_* mide el maximo de temporales vivos a la vez y no el total.
+
+    Los temporales son globales (no van en el frame), asi que uno que sigue
+    vivo a traves de un GOSUB no comparte direccion con ningun otro.
+
+    Corre al final: las otras pasadas suponen que cada temporal se escribe
+    una sola vez. Si aun asi un segmento no alcanza, queda un error semantico.
+    """
+    code = estructura.cuadruplos
+    mm = estructura.func_directory.memory_manager
+    ops, args1, args2, results = code.columns()
+    live_out = live_out_sets(estructura, tracked=mm.temp_segment)
+
+    # orden de definicion e interferencias
+    order = []
+    interferes = {}
+    pinned = set()
+    for i in range(len(code)):
+        op = ops[i]
+        if op == Op.GOSUB:
+            pinned.update(live_out[i])
+        if op not in PURE_OPS or mm.temp_segment(results[i]) is None:
+            continue
+        temp = results[i]
+        if temp not in interferes:
+            interferes[temp] = set()
+            order.append(temp)
+        for other in live_out[i]:
+            if other != temp:
+                interferes[temp].add(other)
+                interferes.setdefault(other, set()).add(temp)
+    for i in range(len(code)):
+        # leidos sin definicion (no deberia pasar): conservan su propio lugar
+        for address in (args1[i], args2[i]):
+            if address not in interferes and mm.temp_segment(address) is not None:
+                interferes[address] = set()
+                pinned.add(address)
+
+    slots = {}
+    used = {segment: 0 for segment in TEMP_SEGMENTS}
+    for temp in order:
+        if temp in pinned:
+            continue
+        segment = mm.temp_segment(temp)
+        taken = {slots[other] for other in interferes[temp]
+                 if other in slots and mm.temp_segment(other) == segment}
+        slot = 0
+        while slot in taken:
+            slot += 1
+        slots[temp] = slot
+        used[segment] = max(used[segment], slot + 1)
+    for temp in sorted(pinned, key=lambda t: (t not in order, t)):
+        segment = mm.temp_segment(temp)
+        slots[temp] = used[segment]
+        used[segment] += 1
+
+    remap = {temp: mm.MEMORY_RANGES[mm.temp_segment(temp)][0] + slot
+             for temp, slot in slots.items()}
+    for i in range(len(code)):
+        op = ops[i]
+        if op in READS_ARG1 and args1[i] in remap:
+            args1[i] = remap[args1[i]]
+        if op in READS_ARG2 and args2[i] in remap:
+            args2[i] = remap[args2[i]]
+        if op in PURE_OPS and results[i] in remap:
+            results[i] = remap[results[i]]
+
+    for segment in TEMP_SEGMENTS:
+        start, end = mm.MEMORY_RANGES[segment]
+        if used[segment] > end - start + 1:
+            estructura.semantic_errors.append(
+                f"Demasiados temporales vivos a la vez en {segment}: "
+                f"{used[segment]}, caben {end - start + 1}")
+        mm.counters[segment] = start + min(used[segment], end - start + 1)
+    mm.overflow_temps.clear()
+
+
+# (nivel minimo, pasada) en el orden en que corren
+PASSES = [
+    (1, fold_constants),
+    (2, eliminate_common_subexpressions),
+    (2, hoist_loop_invariants),
+    (1, eliminate_dead_code),
+    (1, peephole),
+    (1, recycle_temps),
+]
@@ -1,8 +1,26 @@
-from lexer import PlyTokenizer
-from semantic import estructura, get_operand_and_type
-import ply.yacc as yacc
+import copy
+import functools
+import marshal
+import os
+import sys
+import zlib
+
+from ir import Op
+from semantic import CteString
 from lexer import tokens
 
+# ply.yacc se importa y el parser se construye hasta el primer get_parser().
+# En modo normal las tablas LALR se leen de un marshal versionado por la firma
+# de la gramatica y nunca se escribe parser.out; LD_DEBUG_GRAMMAR=1 regresa al
+# modo de desarrollo (regenera parsetab.py y parser.out si la gramatica cambia;
+# son generados y no se versionan).
+#
+# Las acciones no usan estado global: cada compilacion tiene su propio parser
+# (new_parser) que carga su Estructura, y las acciones la leen de p.parser.
+DEBUG_GRAMMAR = os.environ.get('LD_DEBUG_GRAMMAR') == '1'
+TABLE_CACHE_DIR = os.environ.get('LD_CACHE_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '__ldcache__')
+
 # agregar presedence para evitar warnings
 precedence = (
     ('left', 'COMMA'),
@@ -12,24 +30,19 @@ precedence = (
 
 def p_programa(p):
     'Programa : KEYWORD_PROGRAM ID SEMICOLON vars_opt funcs_opt main_marker LBRACE body RBRACE KEYWORD_END SEMICOLON'
+    estructura = p.parser.estructura
     
-    # gotomain al principio
-    estructura.cuadruplos.insert(0, (1, 'GOTOMAIN', -1, -1, estructura.main_start_line + 1)) # mas dos por shift
-    
-    for i in range(1, len(estructura.cuadruplos)):
-        old_quad = estructura.cuadruplos[i]
-        estructura.cuadruplos[i] = (old_quad[0] + 1,) + old_quad[1:]
-    
-    estructura.linea += 1
-    estructura.cuadruplos.append((estructura.linea + 1, 'END', -1, -1, -1))
+    # el cuadruplo 1 (GOTOMAIN) se reservo al inicio; solo falta su destino
+    estructura.fill_jump(1, estructura.main_start_line)
+    estructura.add_quad(Op.END, -1, -1, -1)
     
     estructura.current_function = 'global'
     p[0] = ('Programa', [('program', p[2]), p[4], p[5], ('main', p[8]), ('end', ';')])
 
 def p_main_marker(p):
     'main_marker : KEYWORD_MAIN'
+    estructura = p.parser.estructura
     estructura.main_start_line = estructura.linea + 1
-    print(f"DEBUG: Main starts at line {estructura.main_start_line}")
     p[0] = ('main_marker', p[1])
 
 def p_vars_opt(p):
@@ -42,6 +55,7 @@ def p_vars_opt(p):
 
 def p_var_block(p):
     '''var_block : KEYWORD_VAR var_lines'''
+    estructura = p.parser.estructura
     decls = []
     for var_decl in p[2]:
         ids = var_decl[1]['ids']
@@ -120,11 +134,11 @@ def p_FUNCS(p):
 
 def p_func_start(p):
     'func_start :'
+    estructura = p.parser.estructura
     func_name = p[-1]
     
     try:
-        estructura.linea += 1
-        start_quad = estructura.linea
+        start_quad = estructura.linea + 1
         estructura.func_directory.add_function(func_name, start_quad)
         estructura.current_function = func_name
     except Exception as e:
@@ -132,8 +146,12 @@ def p_func_start(p):
 
 def p_func_end(p):
     'func_end :'
-    estructura.linea += 1
-    estructura.cuadruplos.append((estructura.linea, 'ENDFUNC', -1, -1, -1))
+    estructura = p.parser.estructura
+    # funcion que no cambio desde la compilacion anterior (ver incremental.py)
+    reused = estructura.reused_bodies.get(estructura.current_function)
+    if reused is not None:
+        reused.splice(estructura)
+    estructura.add_quad(Op.ENDFUNC, -1, -1, -1)
     estructura.current_function = 'global'
 
 def p_parametros_opt(p):
@@ -147,6 +165,7 @@ def p_parametros_opt(p):
 def p_parametros(p):
     '''parametros : parametros COMMA ID COLON type
                   | ID COLON type'''
+    estructura = p.parser.estructura
     
     if len(p) == 6:
         var_id = p[3]
@@ -222,6 +241,7 @@ def p_statement(p):
 
 def p_assign(p):
     'assign : ID ASSIGN_SIGN expresion SEMICOLON'
+    estructura = p.parser.estructura
     
     if not estructura.stack_operandos:
         estructura.semantic_errors.append("Error: No hay operando para asignación.")
@@ -243,13 +263,13 @@ def p_assign(p):
     var_address = estructura.get_operand_address(var_name)
     value_address = estructura.get_operand_address(valor)
     
-    estructura.linea += 1
-    estructura.cuadruplos.append((estructura.linea, '=', value_address, -1, var_address))
+    estructura.add_quad(Op.ASSIGN, value_address, -1, var_address)
     
     p[0] = ('assign', [('ID', var_name), p[3]])
 
 def p_print(p):
     'print : KEYWORD_PRINT LPAREN print_items RPAREN SEMICOLON'
+    estructura = p.parser.estructura
     
     # Count expressions in print items
     expr_count = 0
@@ -272,16 +292,14 @@ def p_print(p):
             # String literal
             string_val = item[1][0][1]
             const_address = estructura.get_operand_address(string_val)
-            estructura.linea += 1
-            estructura.cuadruplos.append((estructura.linea, 'PRINT', const_address, -1, -1))
+            estructura.add_quad(Op.PRINT, const_address, -1, -1)
         elif item[0] == 'expresion':
             # Expression result
             if operand_index < len(temp_operands):
                 operand, _ = temp_operands[operand_index]
                 operand_address = estructura.get_operand_address(operand)
                 operand_index += 1
-                estructura.linea += 1
-                estructura.cuadruplos.append((estructura.linea, 'PRINT', operand_address, -1, -1))
+                estructura.add_quad(Op.PRINT, operand_address, -1, -1)
     
     p[0] = ('print', [p[3]])
 
@@ -303,6 +321,7 @@ def p_print_item(p):
 
 def p_cycle(p):
     'cycle : KEYWORD_DO cuadr_do LBRACE body RBRACE KEYWORD_WHILE LPAREN expresion RPAREN SEMICOLON'
+    estructura = p.parser.estructura
 
     if not estructura.stack_operandos:
         estructura.semantic_errors.append("Error: No hay expresión para condición del ciclo.")
@@ -323,25 +342,27 @@ def p_cycle(p):
     condition_address = estructura.get_operand_address(valor)
 
     # Generate GOTOT to loop back
-    estructura.linea += 1
-    estructura.cuadruplos.append((estructura.linea, 'GOTOT', condition_address, -1, start_line))
+    estructura.add_quad(Op.GOTOT, condition_address, -1, start_line)
 
     p[0] = ('cycle', [p[4], ('expresion', p[8])])
 
 def p_cuadr_do(p):
     'cuadr_do :'
+    estructura = p.parser.estructura
     estructura.stack_saltos.append(estructura.linea + 1)
 
 def p_condition(p):
     'condition : KEYWORD_IF LPAREN expresion RPAREN cuadr_if LBRACE body RBRACE else_arg SEMICOLON'
-    if estructura.stack_saltos:
+    estructura = p.parser.estructura
+    # sin else el GOTOF ya se lleno en else_arg
+    if p[9] is not None and estructura.stack_saltos:
         salto_final_else = estructura.stack_saltos.pop()
-        old_quad = estructura.cuadruplos[salto_final_else]
-        estructura.cuadruplos[salto_final_else] = (old_quad[0], old_quad[1], old_quad[2], old_quad[3], estructura.linea + 1)
+        estructura.fill_jump(salto_final_else, estructura.linea + 1)
     p[0] = ('condition', [p[1], p[3], p[7], p[9]])
 
 def p_cuadr_if(p):
     'cuadr_if :'
+    estructura = p.parser.estructura
     if not estructura.stack_operandos:
         estructura.semantic_errors.append("Error: No hay operando para condición IF.")
         return
@@ -352,9 +373,8 @@ def p_cuadr_if(p):
         return
     
     condition_address = estructura.get_operand_address(valor)
-    estructura.linea += 1
-    estructura.cuadruplos.append((estructura.linea, 'GOTOF', condition_address, -1, -1))
-    estructura.stack_saltos.append(estructura.linea - 1)
+    gotof_quad = estructura.add_quad(Op.GOTOF, condition_address, -1, -1)
+    estructura.stack_saltos.append(gotof_quad)
 
 def p_else_arg(p):
     'else_arg : KEYWORD_ELSE cuadr_else LBRACE body RBRACE'
@@ -362,27 +382,26 @@ def p_else_arg(p):
 
 def p_cuadr_else(p):
     'cuadr_else :'
-    estructura.linea += 1
-    estructura.cuadruplos.append((estructura.linea, 'GOTO', -1, -1, -1))
-    goto_final_index = estructura.linea - 1
+    estructura = p.parser.estructura
+    goto_final_quad = estructura.add_quad(Op.GOTO, -1, -1, -1)
 
     if estructura.stack_saltos:
-        gotof_index = estructura.stack_saltos.pop()
-        old_quad = estructura.cuadruplos[gotof_index]
-        estructura.cuadruplos[gotof_index] = (old_quad[0], old_quad[1], old_quad[2], old_quad[3], estructura.linea + 1)
-        estructura.stack_saltos.append(goto_final_index)
+        gotof_quad = estructura.stack_saltos.pop()
+        estructura.fill_jump(gotof_quad, estructura.linea + 1)
+        estructura.stack_saltos.append(goto_final_quad)
     else:
         estructura.semantic_errors.append("Error: No hay salto para asignar en ELSE")
 
 def p_else_arg_empty(p):
     'else_arg : empty'
+    estructura = p.parser.estructura
     if estructura.stack_saltos:
-        gotof_index = estructura.stack_saltos.pop()
-        old_quad = estructura.cuadruplos[gotof_index]
-        estructura.cuadruplos[gotof_index] = (old_quad[0], old_quad[1], old_quad[2], old_quad[3], estructura.linea + 1)
+        gotof_quad = estructura.stack_saltos.pop()
+        estructura.fill_jump(gotof_quad, estructura.linea + 1)
 
 def p_f_call_simple(p):
     'f_call : ID LPAREN expresion_list_opt RPAREN SEMICOLON'
+    estructura = p.parser.estructura
     func_name = p[1]
     
     # Get expression list
@@ -408,8 +427,8 @@ def p_f_call_simple(p):
         estructura.semantic_errors.append(f"Funcion '{func_name}' necesita {len(expected_params)} argumentos, pero recibió {len(args)}.")
         return
 
-    estructura.linea += 1
-    estructura.cuadruplos.append((estructura.linea, 'ERA', func_name, -1, -1))
+    func_address = estructura.func_directory.functions[func_name].address
+    estructura.add_quad(Op.ERA, func_address, -1, -1)
 
     for i, (arg_value, arg_type) in enumerate(args):
         expected_param_name, expected_type = expected_params[i]
@@ -423,12 +442,10 @@ def p_f_call_simple(p):
         arg_address = estructura.get_operand_address(arg_value)
         param_address = estructura.func_directory.get_variable_address(expected_param_name, func_name)
         
-        estructura.linea += 1
-        estructura.cuadruplos.append((estructura.linea, 'PARAM', arg_address, -1, param_address))
+        estructura.add_quad(Op.PARAM, arg_address, -1, param_address)
 
     func_start_quad = estructura.func_directory.get_start_line(func_name)
-    estructura.linea += 1
-    estructura.cuadruplos.append((estructura.linea, 'GOSUB', func_name, -1, func_start_quad))
+    estructura.add_quad(Op.GOSUB, func_address, -1, func_start_quad)
     
     p[0] = ('f_call', {'function': func_name, 'args': args})
 
@@ -451,6 +468,7 @@ def p_expresion_list(p):
 def p_expresion(p):
     '''expresion : exp comparador exp
                  | exp'''
+    estructura = p.parser.estructura
     if len(p) == 4:
         if len(estructura.stack_operandos) < 2:
             estructura.semantic_errors.append("Error: Operandos insuficientes para comparación.")
@@ -465,14 +483,14 @@ def p_expresion(p):
             estructura.semantic_errors.append(f"Operación inválida: {left_type} {op} {right_type}")
             return
 
+        left_val, right_val = estructura.promote_constants(left_val, left_type, right_val, right_type)
         temp_var, temp_address = estructura.new_temp(resultado_tipo)
         estructura.stack_operandos.append((temp_var, resultado_tipo))
         
         left_address = estructura.get_operand_address(left_val)
         right_address = estructura.get_operand_address(right_val)
         
-        estructura.linea += 1
-        estructura.cuadruplos.append((estructura.linea, op, left_address, right_address, temp_address))
+        estructura.add_quad(op, left_address, right_address, temp_address)
         
         p[0] = ('expresion', [p[1], p[2], p[3]])
     else:
@@ -491,6 +509,7 @@ def p_exp(p):
     '''exp : exp OP_SUM termino
            | exp OP_SUB termino
            | termino'''
+    estructura = p.parser.estructura
     if len(p) == 4:
         if len(estructura.stack_operandos) < 2:
             estructura.semantic_errors.append("Error: Operandos insuficientes para operación.")
@@ -509,14 +528,14 @@ def p_exp(p):
             estructura.semantic_errors.append(f"No se puede hacer operacion de {tipo1} {op} {tipo2}")
             return
 
+        value1, value2 = estructura.promote_constants(value1, tipo1, value2, tipo2)
         temp_var, temp_address = estructura.new_temp(resultado_tipo)
         estructura.stack_operandos.append((temp_var, resultado_tipo))
 
         val1_address = estructura.get_operand_address(value1)
         val2_address = estructura.get_operand_address(value2)
 
-        estructura.linea += 1
-        estructura.cuadruplos.append((estructura.linea, op, val1_address, val2_address, temp_address))
+        estructura.add_quad(op, val1_address, val2_address, temp_address)
 
         p[0] = (temp_var, resultado_tipo)
     else:
@@ -526,6 +545,7 @@ def p_termino(p):
     '''termino : termino OP_MUL factor
                | termino OP_DIV factor
                | factor'''
+    estructura = p.parser.estructura
     if len(p) == 4:
         if len(estructura.stack_operandos) < 2:
             estructura.semantic_errors.append("Error: Operandos insuficientes para operación.")
@@ -544,14 +564,14 @@ def p_termino(p):
             estructura.semantic_errors.append(f"No se puede hacer operacion de {tipo1} {op} {tipo2}")
             return
 
+        value1, value2 = estructura.promote_constants(value1, tipo1, value2, tipo2)
         temp_var, temp_address = estructura.new_temp(resultado_tipo)
         estructura.stack_operandos.append((temp_var, resultado_tipo))
 
         val1_address = estructura.get_operand_address(value1)
         val2_address = estructura.get_operand_address(value2)
 
-        estructura.linea += 1
-        estructura.cuadruplos.append((estructura.linea, op, val1_address, val2_address, temp_address))
+        estructura.add_quad(op, val1_address, val2_address, temp_address)
 
         p[0] = (temp_var, resultado_tipo)
     else:
@@ -562,6 +582,7 @@ def p_factor(p):
               | OP_SUM varcte
               | OP_SUB varcte
               | varcte'''
+    estructura = p.parser.estructura
     if len(p) == 4:
         p[0] = p[2]
     elif len(p) == 3:
@@ -574,8 +595,7 @@ def p_factor(p):
         if p[1] == '-':
             temp_var, temp_address = estructura.new_temp(tipo)
             valor_address = estructura.get_operand_address(valor)
-            estructura.linea += 1
-            estructura.cuadruplos.append((estructura.linea, 'UMINUS', valor_address, -1, temp_address))
+            estructura.add_quad(Op.UMINUS, valor_address, -1, temp_address)
             estructura.stack_operandos.append((temp_var, tipo))
             p[0] = ('factor', [p[1], p[2]])
         else:
@@ -589,6 +609,7 @@ def p_varcte(p):
               | CTE_INT
               | CTE_FLOAT
               | CTE_STRING'''
+    estructura = p.parser.estructura
     
     if p.slice[1].type == 'ID':
         var_name = p[1]
@@ -606,22 +627,103 @@ def p_varcte(p):
         estructura.stack_operandos.append((p[1], 'float'))
         p[0] = ('varcte', [('CTE_FLOAT', p[1])])
     elif p.slice[1].type == 'CTE_STRING':
-        estructura.stack_operandos.append((p[1], 'string')) 
+        estructura.stack_operandos.append((CteString(p[1]), 'string'))
         p[0] =  ('varcte', [('CTE_STRING', p[1])])
 
 def p_empty(p):
     '''empty :'''
     p[0] = None
 
-def p_error(p):
-    global syntax_errors
+def syntax_error(parser, p):
+    estructura = parser.estructura
     if p:
         msg = f"Error de sintaxis: token inesperado '{p.value}' en línea {p.lineno}"
-        syntax_errors.append(msg)
+        estructura.syntax_errors.append(msg)
         parser.errok()
     else:
         msg = "Error de sintaxis: fin de archivo inesperado"
-        syntax_errors.append(msg)
+        estructura.syntax_errors.append(msg)
 
-parser = yacc.yacc(debug=True)
-syntax_errors = []
\ No newline at end of file
+def p_error(p):
+    # yacc pide p_error en el modulo, pero los parsers de new_parser() usan
+    # syntax_error ligado a su propia compilacion
+    raise RuntimeError("Usa parser_rules.new_parser(estructura) para compilar")
+
+_parser = None
+
+def table_cache_path(signature):
+    import ply.yacc as yacc
+    # crc32 + longitud basta para distinguir versiones de la gramatica, y zlib
+    # carga mucho mas rapido que hashlib
+    data = signature.encode('utf-8')
+    digest = f"{zlib.crc32(data):08x}{len(data):x}"
+    return os.path.join(TABLE_CACHE_DIR, f"parsetab-{yacc.__tabversion__}-{digest}.marshal")
+
+def load_cached_tables(module, cache_path):
+    """LRParser desde el cache (marshal), sin pasar por yacc.yacc()"""
+    import ply.yacc as yacc
+    with open(cache_path, 'rb') as f:
+        method, action, goto, productions = marshal.load(f)
+    lr = yacc.LRTable()
+    lr.lr_method = method
+    lr.lr_action = action
+    lr.lr_goto = goto
+    lr.lr_productions = [yacc.MiniProduction(*prod) for prod in productions]
+    lr.bind_callables(vars(module))
+    return yacc.LRParser(lr, module.p_error)
+
+def save_cached_tables(parser, cache_path):
+    productions = [
+        (str(prod), prod.name, prod.len, prod.func,
+         os.path.basename(prod.file) if prod.file else None, prod.line)
+        for prod in parser.productions
+    ]
+    # Se escribe a un temporal y se publica con os.replace, asi otros
+    # procesos nunca leen un archivo a medias
+    os.makedirs(TABLE_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        marshal.dump(('LALR', parser.action, parser.goto, productions), f)
+    os.replace(tmp_path, cache_path)
+
+def build_parser():
+    import ply.yacc as yacc
+    module = sys.modules[__name__]
+    if DEBUG_GRAMMAR:
+        return yacc.yacc(module=module, debug=True)
+
+    # El nombre del cache lleva la firma de la gramatica: si cambia la
+    # gramatica se usa otro archivo y nunca se leen tablas viejas
+    quiet = yacc.NullLogger()
+    pinfo = yacc.ParserReflect(vars(module), log=quiet)
+    pinfo.get_all()
+    cache_path = table_cache_path(pinfo.signature())
+
+    try:
+        return load_cached_tables(module, cache_path)
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        pass  # no hay cache o esta danado
+
+    parser = yacc.yacc(module=module, debug=False, write_tables=False, errorlog=quiet)
+    try:
+        save_cached_tables(parser, cache_path)
+    except OSError:
+        pass  # sin cache escribible, solo se pierde el ahorro
+    return parser
+
+def get_parser():
+    """Parser base con las tablas LALR; no se usa directo para compilar"""
+    global _parser
+    if _parser is None:
+        # si dos hilos llegan a la vez ambos lo construyen, sin otro efecto
+        _parser = build_parser()
+    return _parser
+
+def new_parser(estructura):
+    """Parser para una sola compilacion. Comparte con el parser base las
+    tablas (que nunca se modifican) pero tiene su propio estado de yacc,
+    su Estructura y su manejador de errores."""
+    parser = copy.copy(get_parser())
+    parser.estructura = estructura
+    parser.errorfunc = functools.partial(syntax_error, parser)
+    return parser
@@ -0,0 +1,451 @@
+"""Backend que traduce un objeto .ldo a un modulo de Python y lo ejecuta.
+
+    run_python(object_data, output=print_output)
+
+Cada funcion del programa se vuelve una funcion de Python (f_<direccion>)
+y main se vuelve main(). Las variables locales, los temporales y las
+globales que solo usa main son variables locales de Python; las globales
+que lee o escribe alguna funcion son globales del modulo. Las constantes
+se escriben como literales.
+
+Los saltos se reconstruyen como while/if cuando el codigo tiene la forma
+que genera el compilador (do-while con su GOTOT hacia atras, if/else con
+GOTOF y GOTO), tambien despues del optimizador. Si una funcion no tiene
+esa forma se traduce como un ciclo que despacha por bloque (pc = ...).
+
+El codigo de Python se compila una vez y su code object (marshal) se
+guarda como una entrada mas del cache de compilacion (compile_cache.py: el
+mismo directorio y el mismo limite LRU). La llave es el sha256 del objeto,
+de los archivos del compilador, de este modulo y de vm.py y de la version
+de Python, asi que nunca se carga codigo de un traductor distinto.
+Las operaciones dan los mismos valores que la VM, asi que PRINT imprime lo
+mismo. No hay tracer ni ExecutionLimits en este backend.
+"""
+import hashlib
+import marshal
+import math
+import os
+import sys
+import threading
+
+from bytecode import read_object
+from compile_cache import CompileCache, compiler_digest
+from ir import Op
+from semantic import MemoryManager
+from vm import SEGMENT_DEFAULTS, print_output
+
+# Archivos que cambian el codigo que se genera, ademas de los del compilador
+BACKEND_FILES = ('pybackend.py', 'vm.py')
+
+# Limite de recursion mientras corre un programa: sus llamadas son de Python
+RUN_RECURSION_LIMIT = 100000
+
+# Rangos de direcciones por segmento, los mismos del compilador
+MEMORY_RANGES = MemoryManager().MEMORY_RANGES
+
+BINARY_SYMBOLS = {
+    Op.ADD: '+', Op.SUB: '-', Op.MUL: '*',
+    Op.GT: '>', Op.LT: '<', Op.GE: '>=', Op.LE: '<=', Op.EQ: '==', Op.NE: '!=',
+}
+READS_ARG1 = frozenset([Op.ASSIGN, Op.PARAM, Op.PRINT, Op.GOTOF, Op.GOTOT, Op.DIV,
+                        Op.UMINUS, Op.INT_TO_FLOAT] + list(BINARY_SYMBOLS))
+READS_ARG2 = frozenset([Op.DIV] + list(BINARY_SYMBOLS))
+WRITES_RES = frozenset([Op.ASSIGN, Op.DIV, Op.UMINUS, Op.INT_TO_FLOAT] + list(BINARY_SYMBOLS))
+CONTROL_OPS = frozenset((Op.GOTO, Op.GOTOF, Op.GOTOT))
+
+# codigo ya cargado en este proceso, por llave del objeto
+_code_cache = {}
+_disk_cache = None
+_backend_digest = None
+
+# programas corriendo con el limite de recursion alto y el limite de antes
+_recursion_lock = threading.Lock()
+_recursion_users = 0
+_saved_recursion_limit = None
+
+
+class Unstructured(Exception):
+    """El codigo de una funcion no tiene forma de while/if"""
+
+
+def segment_of(address):
+    for name, (start, end) in MEMORY_RANGES.items():
+        if start <= address <= end:
+            return name
+    raise ValueError(f"Direccion invalida: {address}")
+
+
+def default_value(address):
+    return SEGMENT_DEFAULTS[segment_of(address).split('_')[1]]
+
+
+# ---------------- Traduccion ----------------
+
+class Translator:
+    def __init__(self, obj, structured=True):
+        self.structured = structured
+        self.constants = obj.constants
+        ops, args1, args2, results = obj.code.columns()
+        self.quads = list(zip(ops, args1, args2, results))   # quads[num - 1]
+        self.n = len(self.quads)
+
+        # regiones: cada funcion desde su inicio, main desde el destino de GOTOMAIN
+        main_start = results[0]
+        starts = sorted([(func.start_quad, func) for func in obj.functions.values()]
+                        + [(main_start, None)], key=lambda region: region[0])
+        self.regions = []
+        for k, (start, func) in enumerate(starts):
+            end = starts[k + 1][0] - 1 if k + 1 < len(starts) else self.n
+            self.regions.append((start, end, func))
+
+        # parametros de cada funcion: las direcciones que le llenan los PARAM
+        self.params = {address: set() for address in obj.functions}
+        pending = []
+        for op, arg1, _, res in self.quads:
+            if op == Op.PARAM:
+                pending.append(res)
+            elif op == Op.GOSUB:
+                self.params.setdefault(arg1, set()).update(pending)
+                pending = []
+        self.params = {address: sorted(params) for address, params in self.params.items()}
+
+        # globales compartidas: las que usa alguna funcion que no es main
+        self.shared_globals = set()
+        for start, end, func in self.regions:
+            if func is not None:
+                self.shared_globals.update(address for address in self.addresses(start, end)
+                                           if segment_of(address).startswith('global_'))
+
+    def addresses(self, start, end):
+        """Direcciones de memoria (no constantes) que usa el rango start..end"""
+        used = set()
+        for num in range(start, end + 1):
+            op, arg1, arg2, res = self.quads[num - 1]
+            if op in READS_ARG1:
+                used.add(arg1)
+            if op in READS_ARG2:
+                used.add(arg2)
+            if op in WRITES_RES:
+                used.add(res)
+        return {address for address in used if not segment_of(address).startswith('cte_')}
+
+    def name(self, address):
+        if address in self.constants:
+            value = self.constants[address]
+            if isinstance(value, float) and not math.isfinite(value):
+                # repr da inf/nan, que no son nombres en el modulo generado
+                return f"float('{value}')"
+            return f"({value!r})" if isinstance(value, (int, float)) and value < 0 else repr(value)
+        segment = segment_of(address)
+        if segment.startswith('cte_'):
+            raise ValueError(f"Constante sin valor: {address}")
+        return f"{segment[0]}{address}"   # g1000, l7000, t12000
+
+    def translate(self):
+        lines = ["# Generado por pybackend a partir de un objeto .ldo", ""]
+        for address in sorted(self.shared_globals):
+            lines.append(f"g{address} = {default_value(address)!r}")
+        lines.append("")
+        for start, end, func in self.regions:
+            lines.extend(self.function(start, end, func))
+            lines.append("")
+        return "\n".join(lines) + "\n"
+
+    def function(self, start, end, func):
+        if func is None:
+            header = ["def main():"]
+            params = []
+        else:
+            params = self.params.get(func.address, [])
+            signature = ", ".join(f"l{address}={default_value(address)!r}" for address in params)
+            header = [f"def f{func.address}({signature}):", f"    # {func.name}"]
+        used = self.addresses(start, end)
+        shared = sorted(address for address in used if address in self.shared_globals)
+        if shared:
+            header.append("    global " + ", ".join(f"g{address}" for address in shared))
+        for address in sorted(used - self.shared_globals - set(params)):
+            header.append(f"    {self.name(address)} = {default_value(address)!r}")
+
+        try:
+            if not self.structured:
+                raise Unstructured()
+            body = FunctionBody(self, start, end)
+            body.region(start, end + 1, 1, [])
+        except Unstructured:
+            body = FunctionBody(self, start, end)
+            body.dispatch()
+        return header + (body.lines or ["    pass"])
+
+    def statement(self, num):
+        """Cuadruplo sin salto -> lineas de Python (sin sangria)"""
+        op, arg1, arg2, res = self.quads[num - 1]
+        name = self.name
+        if op == Op.ASSIGN:
+            return [f"{name(res)} = {name(arg1)}"]
+        if op in BINARY_SYMBOLS:
+            return [f"{name(res)} = {name(arg1)} {BINARY_SYMBOLS[op]} {name(arg2)}"]
+        if op == Op.DIV:
+            # como la VM: dividir entre cero da 0
+            if self.constants.get(arg2, 0) != 0:
+                return [f"{name(res)} = {name(arg1)} / {name(arg2)}"]
+            return [f"{name(res)} = {name(arg1)} / {name(arg2)} if {name(arg2)} != 0 else 0"]
+        if op == Op.UMINUS:
+            return [f"{name(res)} = -{name(arg1)}"]
+        if op == Op.INT_TO_FLOAT:
+            return [f"{name(res)} = float({name(arg1)})"]
+        if op == Op.PRINT:
+            return [f"output({name(arg1)})"]
+        if op == Op.ERA:
+            return []
+        if op == Op.PARAM:
+            return [f"p{res} = {name(arg1)}"]
+        if op == Op.GOSUB:
+            args = ", ".join(f"p{address}" for address in self.params.get(arg1, []))
+            return [f"f{arg1}({args})"]
+        if op in (Op.ENDFUNC, Op.RETURN, Op.END):
+            return ["return"]
+        raise ValueError(f"Opcode sin traduccion en el cuadruplo {num}: {op}")
+
+
+class FunctionBody:
+    """Lineas del cuerpo de una funcion (start..end)"""
+    def __init__(self, translator, start, end):
+        self.t = translator
+        self.start = start
+        self.end = end
+        self.lines = []
+        # saltos hacia atras: destino -> fuentes
+        self.back_jumps = {}
+        for num in range(start, end + 1):
+            op, _, _, res = translator.quads[num - 1]
+            if op in CONTROL_OPS and res <= num:
+                self.back_jumps.setdefault(res, []).append(num)
+
+    def emit(self, indent, line):
+        self.lines.append("    " * indent + line)
+
+    def op(self, num):
+        return self.t.quads[num - 1][0]
+
+    def same_place(self, target, exit_num):
+        """True si saltar a target es lo mismo que llegar a exit_num (exit_num
+        o una cadena de GOTO que empieza ahi llega a target)"""
+        seen = set()
+        while target != exit_num:
+            if not self.start <= exit_num <= self.end or exit_num in seen:
+                return False
+            seen.add(exit_num)
+            op, _, _, res = self.t.quads[exit_num - 1]
+            if op != Op.GOTO:
+                return False
+            exit_num = res
+        return True
+
+    def region(self, a, b, indent, loops):
+        """Traduce a..b-1; al terminar el control sigue en b.
+        loops: [(inicio, salida)] de los while que encierran la region."""
+        num = a
+        while num < b:
+            ends = [source for source in self.back_jumps.get(num, ()) if source < b]
+            if ends:
+                end = max(ends)
+                op, arg1, _, _ = self.t.quads[end - 1]
+                self.emit(indent, "while True:")
+                body_start = len(self.lines)
+                self.region(num, end, indent + 1, loops + [(num, end + 1)])
+                if op == Op.GOTOT:
+                    self.emit(indent + 1, f"if not {self.t.name(arg1)}: break")
+                elif op == Op.GOTOF:
+                    self.emit(indent + 1, f"if {self.t.name(arg1)}: break")
+                elif len(self.lines) == body_start:
+                    self.emit(indent + 1, "pass")
+                num = end + 1
+                continue
+
+            op, arg1, _, target = self.t.quads[num - 1]
+            if op in (Op.GOTOF, Op.GOTOT):
+                # GOTOF salta si es falso: el "then" corre si es verdadero
+                test = self.t.name(arg1) if op == Op.GOTOF else f"not {self.t.name(arg1)}"
+                if self.same_place(target, b):
+                    target = b
+                if loops and target <= num:
+                    if target != loops[-1][0]:
+                        raise Unstructured()
+                    self.emit(indent, f"if not ({test}): continue")
+                    num += 1
+                    continue
+                if not num < target <= b:
+                    if loops and self.same_place(target, loops[-1][1]):
+                        self.emit(indent, f"if not ({test}): break")
+                        num += 1
+                        continue
+                    raise Unstructured()
+                then_end, after = target, target
+                if target - 1 > num and self.op(target - 1) == Op.GOTO:
+                    join = self.t.quads[target - 2][3]
+                    if self.same_place(join, b):
+                        join = b
+                    if target < join <= b:
+                        then_end, after = target - 1, join
+                self.emit(indent, f"if {test}:")
+                then_start = len(self.lines)
+                self.region(num + 1, then_end, indent + 1, loops)
+                if len(self.lines) == then_start:
+                    self.emit(indent + 1, "pass")
+                if after != target:
+                    self.emit(indent, "else:")
+                    else_start = len(self.lines)
+                    self.region(target, after, indent + 1, loops)
+                    if len(self.lines) == else_start:
+                        self.emit(indent + 1, "pass")
+                num = after
+                continue
+
+            if op == Op.GOTO:
+                if self.same_place(target, b) and num + 1 == b:
+                    pass
+                elif loops and target == loops[-1][0]:
+                    self.emit(indent, "continue")
+                elif loops and self.same_place(target, loops[-1][1]):
+                    self.emit(indent, "break")
+                else:
+                    raise Unstructured()
+                if num + 1 != b:
+                    # lo que sigue solo se alcanzaria por otro salto
+                    raise Unstructured()
+                num += 1
+                continue
+
+            for line in self.t.statement(num):
+                self.emit(indent, line)
+            num += 1
+
+    def dispatch(self):
+        """Un bloque por destino de salto y un ciclo que despacha por pc"""
+        start, end = self.start, self.end
+        leaders = {start}
+        for num in range(start, end + 1):
+            op, _, _, res = self.t.quads[num - 1]
+            if op in CONTROL_OPS:
+                leaders.add(res)
+                leaders.add(num + 1)
+        leaders = sorted(leader for leader in leaders if start <= leader <= end)
+
+        self.emit(1, f"pc = {start}")
+        self.emit(1, "while True:")
+        for k, leader in enumerate(leaders):
+            last = leaders[k + 1] - 1 if k + 1 < len(leaders) else end
+            self.emit(2, f"{'if' if k == 0 else 'elif'} pc == {leader}:")
+            falls_through = True
+            for num in range(leader, last + 1):
+                op, arg1, _, target = self.t.quads[num - 1]
+                if op == Op.GOTO:
+                    self.emit(3, f"pc = {target}")
+                    self.emit(3, "continue")
+                    falls_through = False
+                elif op in (Op.GOTOF, Op.GOTOT):
+                    test = f"not {self.t.name(arg1)}" if op == Op.GOTOF else self.t.name(arg1)
+                    self.emit(3, f"if {test}:")
+                    self.emit(4, f"pc = {target}")
+                    self.emit(4, "continue")
+                else:
+                    for line in self.t.statement(num):
+                        self.emit(3, line)
+                    if op in (Op.ENDFUNC, Op.RETURN, Op.END):
+                        falls_through = False
+            if falls_through:
+                self.emit(3, f"pc = {last + 1}")
+
+
+def translate(object_data, structured=True):
+    """Codigo fuente de Python para un objeto .ldo; structured=False traduce
+    todas las funciones con el ciclo de despacho"""
+    return Translator(read_object(object_data), structured).translate()
+
+
+# ---------------- Cache y ejecucion ----------------
+
+def backend_digest():
+    """sha256 del compilador, de este backend y de la version de Python"""
+    global _backend_digest
+    if _backend_digest is None:
+        digest = hashlib.sha256(compiler_digest().encode('ascii'))
+        digest.update(sys.implementation.cache_tag.encode('ascii'))
+        base = os.path.dirname(os.path.abspath(__file__))
+        for name in BACKEND_FILES:
+            with open(os.path.join(base, name), 'rb') as f:
+                digest.update(f.read())
+        _backend_digest = digest.hexdigest()
+    return _backend_digest
+
+
+def object_key(object_data):
+    digest = hashlib.sha256(backend_digest().encode('ascii'))
+    digest.update(object_data)
+    return digest.hexdigest()
+
+
+def disk_cache():
+    """CompileCache del proceso, en el directorio por omision"""
+    global _disk_cache
+    if _disk_cache is None:
+        _disk_cache = CompileCache()
+    return _disk_cache
+
+
+def compile_object(object_data, use_cache=True):
+    """Code object del modulo traducido; del cache si ya existe"""
+    key = object_key(object_data)
+    code = _code_cache.get(key)
+    if code is not None:
+        return code
+    if use_cache:
+        data = disk_cache().get(key)
+        try:
+            code = marshal.loads(data) if data is not None else None
+        except (ValueError, EOFError, TypeError):
+            code = None
+    if code is None:
+        filename = f"<ld {key[:12]}>"
+        try:
+            code = compile(translate(object_data), filename, 'exec')
+        except (SyntaxError, RecursionError, MemoryError):
+            # demasiados while/if anidados para el compilador de Python
+            code = compile(translate(object_data, structured=False), filename, 'exec')
+        if use_cache:
+            try:
+                disk_cache().put(key, marshal.dumps(code))
+            except OSError:
+                pass   # sin cache en disco solo se pierde el ahorro
+    _code_cache[key] = code
+    return code
+
+
+def raise_recursion_limit():
+    """El limite de recursion es de todo el proceso: se sube mientras corra
+    algun programa y el ultimo en terminar regresa el valor de antes"""
+    global _recursion_users, _saved_recursion_limit
+    with _recursion_lock:
+        if _recursion_users == 0:
+            _saved_recursion_limit = sys.getrecursionlimit()
+            sys.setrecursionlimit(max(_saved_recursion_limit, RUN_RECURSION_LIMIT))
+        _recursion_users += 1
+
+
+def restore_recursion_limit():
+    global _recursion_users
+    with _recursion_lock:
+        _recursion_users -= 1
+        if _recursion_users == 0:
+            sys.setrecursionlimit(_saved_recursion_limit)
+
+
+def run_python(object_data, output=None, use_cache=True):
+    """Ejecuta el programa traducido; output(value) recibe cada PRINT"""
+    namespace = {'output': output or print_output, '__name__': '__ldprogram__'}
+    exec(compile_object(object_data, use_cache), namespace)
+    raise_recursion_limit()
+    try:
+        namespace['main']()
+    finally:
+        restore_recursion_limit()
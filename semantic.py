@@ -1,3 +1,19 @@
+from ir import OPCODES, Op, QuadBuffer
+
+class Temporal(str):
+    """Nombre de un temporal (t1, t2, ...) que ademas guarda su direccion"""
+    def __new__(cls, name, address):
+        obj = super().__new__(cls, name)
+        obj.address = address
+        return obj
+
+    def __reduce__(self):
+        return (Temporal, (str(self), self.address))
+
+class CteString(str):
+    """Constante string del programa (para no confundirla con un ID)"""
+    pass
+
 class Variable:
     def __init__(self, name, tipo, is_param, address=None):
         self.name = name
@@ -34,6 +50,25 @@ class Function:
         self.local_var_count = 0
         self.address = address  
 
+    def frame_sizes(self):
+        """Cells needed per local segment (int, float, string) for one call"""
+        sizes = {'int': 0, 'float': 0, 'string': 0}
+        for var in self.var_table.variables.values():
+            sizes[var.tipo] += 1
+        return sizes['int'], sizes['float'], sizes['string']
+
+# Direcciones provisionales de temporales fuera de su segmento (ver allocate_temp)
+TEMP_OVERFLOW_BASE = 100000
+TEMP_SEGMENTS = ('temp_int', 'temp_float', 'temp_bool')
+
+# El objeto guarda las constantes int como int64 (array('q') en bytecode.py)
+INT_CONSTANT_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+
+def int_constant_fits(value):
+    return INT_CONSTANT_RANGE[0] <= value <= INT_CONSTANT_RANGE[1]
+
+
 class MemoryManager:
     def __init__(self):
         # Memory address ranges
@@ -72,6 +107,11 @@ class MemoryManager:
         
         # Constants table
         self.constants = {}
+        
+        # Temporales que ya no cabian en su segmento: direccion provisional
+        # (desde TEMP_OVERFLOW_BASE) -> segmento. optimizer.recycle_temps les
+        # da una direccion real reusando las de temporales que ya murieron.
+        self.overflow_temps = {}
     
     def get_memory_type(self, var_type, scope):
         """Determine memory category based on variable type and scope"""
@@ -112,12 +152,29 @@ class MemoryManager:
             memory_type = 'temp_int'  # default
             
         address = self.counters[memory_type]
+        if address > self.MEMORY_RANGES[memory_type][1]:
+            # segmento lleno: direccion provisional que no choca con nada
+            address = TEMP_OVERFLOW_BASE + len(self.overflow_temps)
+            self.overflow_temps[address] = memory_type
+            return address
         self.counters[memory_type] += 1
         return address
     
+    def temp_segment(self, address):
+        """Segmento temp_* de un temporal (real o provisional), None si no lo es"""
+        if address in self.overflow_temps:
+            return self.overflow_temps[address]
+        for memory_type in TEMP_SEGMENTS:
+            start, end = self.MEMORY_RANGES[memory_type]
+            if start <= address <= end:
+                return memory_type
+        return None
+    
     def get_constant_address(self, value, value_type):
-        """Get or create address for constant"""
-        const_key = str(value)
+        """Get or create address for constant; None if its segment is full or
+        an int does not fit in 64 bits"""
+        # los strings se guardan con comillas para que "5" no choque con 5
+        const_key = f'"{value}"' if value_type == 'string' else str(value)
         if const_key in self.constants:
             return self.constants[const_key]
         
@@ -129,12 +186,22 @@ class MemoryManager:
             memory_type = 'cte_str'
         else:
             memory_type = 'cte_int'
-            
+        if memory_type == 'cte_int' and not int_constant_fits(value):
+            return None
+
         address = self.counters[memory_type]
+        if address > self.MEMORY_RANGES[memory_type][1]:
+            # mas alla del segmento caeria en el de otro tipo
+            return None
         self.counters[memory_type] += 1
         self.constants[const_key] = address
         return address
     
+    def reset_local_counters(self):
+        """Each function numbers its locals from the start of the local ranges"""
+        for memory_type in ('local_int', 'local_float', 'local_str'):
+            self.counters[memory_type] = self.MEMORY_RANGES[memory_type][0]
+    
     def allocate_function(self):
         address = self.counters['global_void']
         self.counters['global_void'] += 1
@@ -152,6 +219,7 @@ class FunctionDirectory:
         
         func_address = self.memory_manager.allocate_function()
         self.functions[name] = Function(name, start_quad, address=func_address)
+        self.memory_manager.reset_local_counters()
 
     def add_variable(self, name, tipo, function_name, is_param):
         if function_name != "global" and function_name not in self.functions:
@@ -215,7 +283,8 @@ class FunctionDirectory:
             raise Exception(f"Function '{scope}' not found.")
         return self.functions[scope].start_quad
 
-# Main structure holding state across parsing
+# Estado de una compilacion (cuadruplos, pilas, directorio de funciones y
+# memoria). Cada compilacion crea la suya; no hay instancia global.
 class Estructura:
     def __init__(self):
         self.cubo = {
@@ -272,27 +341,46 @@ class Estructura:
         self.stack_scopes = ['global']
         self.stack_saltos = []
         self.call_stack = []  # For function call management
-        self.cuadruplos = []
+        # Cuadruplos en columnas (ir.QuadBuffer); el 1 se reserva para
+        # GOTOMAIN y su destino se rellena en p_programa
+        self.cuadruplos = QuadBuffer()
+        self.cuadruplos.append(Op.GOTOMAIN)
         self.semantic_errors = []
+        self.syntax_errors = []
         self.counter_temporales = 0
-        self.linea = 0
+        self.linea = 1   # numero del ultimo cuadruplo emitido
         self.main_start_line = 0
+        # nombre de funcion -> incremental.SavedBody con sus variables y
+        # cuadruplos, que el parser no vio y se pegan en p_func_end
+        self.reused_bodies = {}
+
+    def add_quad(self, op, arg1=-1, arg2=-1, res=-1):
+        """Agrega un cuadruplo al final y regresa su numero; op es un ir.Op
+        o su nombre ('+', 'GOTOF', ...)"""
+        if isinstance(op, str):
+            op = OPCODES[op]
+        self.linea = self.cuadruplos.append(op, arg1, arg2, res)
+        return self.linea
+
+    def fill_jump(self, quad_num, target):
+        """Backpatch del destino de un salto ya emitido"""
+        self.cuadruplos.set_res(quad_num, target)
 
     def new_temp(self, result_type='int'):
         self.counter_temporales += 1
-        temp_name = f't{self.counter_temporales}'
         address = self.func_directory.memory_manager.allocate_temp(result_type)
+        temp_name = Temporal(f't{self.counter_temporales}', address)
         return temp_name, address
     
     def get_operand_address(self, operand):
-        if isinstance(operand, str):
-            if operand.startswith('t'):  # temporary variable
-                # For temp variables, we'll use the temp name as identifier
-                # The VM will handle address mapping
-                return operand
-            else:  # regular variable
-                address = self.func_directory.get_variable_address(operand, self.current_function)
-                return address if address else operand
+        if isinstance(operand, Temporal):
+            return operand.address
+        elif isinstance(operand, CteString):
+            return self.constant_address(operand, 'string')
+        elif isinstance(operand, str):  # regular variable
+            address = self.func_directory.get_variable_address(operand, self.current_function)
+            # -1 solo si la variable no existe, y eso ya es error semantico
+            return address if address else -1
         else:  # constant value
             # Determine constant type
             if isinstance(operand, int):
@@ -302,12 +390,47 @@ class Estructura:
             else:
                 const_type = 'string'
             
-            address = self.func_directory.memory_manager.get_constant_address(operand, const_type)
-            return address
-
-estructura = Estructura()
+            return self.constant_address(operand, const_type)
+
+    def constant_address(self, value, const_type):
+        """Direccion de una constante del programa; -1 y error semantico si un
+        int no cabe en 64 bits o ya no cabe en su segmento"""
+        address = self.func_directory.memory_manager.get_constant_address(value, const_type)
+        if address is None:
+            if const_type == 'int' and not int_constant_fits(value):
+                error = f"Error semántico: la constante {value} no cabe en un int de 64 bits."
+            else:
+                error = f"Error: demasiadas constantes de tipo {const_type} en el programa."
+            if error not in self.semantic_errors:
+                self.semantic_errors.append(error)
+            return -1
+        return address
 
-def get_operand_and_type(operand):
+    def promote_constants(self, value1, tipo1, value2, tipo2):
+        """Constante int junto a un float -> la constante float con el mismo valor.
+
+        La VM no convierte nada en cada operacion: float + float es mas rapido
+        que float + int. Solo se cambian constantes cuyo float es exacto, asi
+        que sumas y comparaciones dan lo mismo que antes. Una variable int se
+        queda como esta; un INT_TO_FLOAT aparte cuesta mas que mezclar tipos.
+        """
+        if {tipo1, tipo2} != {'int', 'float'}:
+            return value1, value2
+        if tipo1 == 'int':
+            return self.exact_float(value1), value2
+        return value1, self.exact_float(value2)
+
+    @staticmethod
+    def exact_float(value):
+        if not isinstance(value, int):
+            return value
+        try:
+            promoted = float(value)
+        except OverflowError:
+            return value
+        return promoted if promoted == value else value
+
+def get_operand_and_type(estructura, operand):
     try:
         if operand[0] == 'factor':
             operand = operand[1][0] 
@@ -332,17 +455,15 @@ def get_operand_and_type(operand):
         print(f"Error extrayendo tipo de operando: {operand}")
         raise e
 
-def print_quadruples():
+def print_quadruples(estructura):
     print("\nCuádruplos generados:\n")
     print(f"{'No.':<4} {'Operador':<10} {'Arg1':<12} {'Arg2':<12} {'Resultado':<12}")
     print("-" * 60)
     
-    for quad in estructura.cuadruplos:
-        if len(quad) >= 5:
-            num, op, arg1, arg2, res = quad[:5]
-            print(f"{num:<4} {op:<10} {str(arg1):<12} {str(arg2):<12} {str(res):<12}")
+    for num, op, arg1, arg2, res in estructura.cuadruplos:
+        print(f"{num:<4} {op:<10} {str(arg1):<12} {str(arg2):<12} {str(res):<12}")
 
-def print_symbol_table():
+def print_symbol_table(estructura):
     print("\nTabla de símbolos globales:")
     print(f"{'Variable':<10} {'Tipo':<10} {'Dirección':<10}")
     for name, var in estructura.func_directory.global_var_table.variables.items():
@@ -361,7 +482,7 @@ def print_symbol_table():
     for const_val, address in estructura.func_directory.memory_manager.constants.items():
         print(f"{const_val:<15} {address:<10}")
 
-def print_function_table():
+def print_function_table(estructura):
     print("\n=== Tabla de funciones===")
     print(f"{'Función':<15} {'Registro':<10} {'Parámetros':<12} {'Locales':<30}")
     print("-" * 80)
@@ -397,7 +518,7 @@ def print_function_table():
         
         print(f"{func_name:<15} {func.start_quad:<10} {params_str:<12} {locals_str:<30}")
 
-def print_function_memory_layout():
+def print_function_memory_layout(estructura):
     print("\n=== Memoria por funcion ===")
     
     for func_name, func in estructura.func_directory.functions.items():
@@ -442,7 +563,7 @@ def print_function_memory_layout():
         total_locals = sum(local_counts.values())
         print(f"  Memoria requerida: {total_params + total_locals} variables")
 
-def generate_function_data():
+def generate_function_data(estructura):
     print("\n-------------- Datos de Functiones ------")
     
     for func_name, func in estructura.func_directory.functions.items():
@@ -478,7 +599,7 @@ def generate_function_data():
         print(f"Dirección de función: {func.address}")
         print(f"Memoria de : {total_params + sum(local_counts.values())} variables")
 
-def print_memory_allocation():
+def print_memory_allocation(estructura):
     print("\nAsignación de memoria:")
     mm = estructura.func_directory.memory_manager
     for mem_type, counter in mm.counters.items():
@@ -1,7 +1,6 @@
-from lexer import PlyTokenizer
-from parser_rules import parser, syntax_errors
+from compiler import Compiler
 from utils import print_tree
-from semantic import estructura, print_quadruples, print_symbol_table
+from semantic import print_quadruples, print_symbol_table
 
 # Crear archivo ld
 input_text = """program proquacks;
@@ -58,23 +57,23 @@ with open("semantica.ld", "r") as f:
     test_code = f.read()
 
 
-# ----------------LEXER------------------
-tokenizer = PlyTokenizer()
+# ----------------COMPILAR------------------
+program = Compiler().compile(test_code)
+estructura = program.estructura
+syntax_errors = program.syntax_errors
 
-syntax_errors = []
-
-parse_tree = parser.parse(test_code, lexer=tokenizer.lexer)
+parse_tree = program.parse_tree
 print("\n--- PARSE TREE ---")
 print_tree(parse_tree)
 
 
 print(estructura.stack_operandos)
-print_quadruples()
-print_symbol_table()
+print_quadruples(estructura)
+print_symbol_table(estructura)
 
-if tokenizer.errors:
+if program.lexical_errors:
     print("\n--- ERRORES DE LEXICO DETECTADOS ---")
-    for err in tokenizer.errors:
+    for err in program.lexical_errors:
         lineno, lexpos, char = err
         print(f"Lexer error: Unrecognized character '{char}' at line {lineno}, position {lexpos}")
 else:
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# los modulos del compilador estan en la raiz del repo (como en benchmarks/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
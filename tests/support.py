@@ -0,0 +1,174 @@
+"""Utilidades compartidas por las pruebas: compilar y correr capturando PRINT."""
+
+from compiler import Compiler, CompileError
+
+
+def compile_source(source, opt_level=0, disabled=()):
+    program = Compiler(opt_level, disabled).compile(source)
+    if not program.ok:
+        raise CompileError(program.errors)
+    return program
+
+
+def run_output(program, **kwargs):
+    """Lista de valores impresos por el programa"""
+    output = []
+    Compiler().run(program, output=output.append, **kwargs)
+    return output
+
+
+def output_of(source, opt_level=0, **kwargs):
+    return run_output(compile_source(source, opt_level), **kwargs)
+
+
+def main_program(body, declarations="var a, b : int;"):
+    return f"program prueba;\n{declarations}\nmain {{\n{body}\n}}\nend;"
+
+
+def read_program(name):
+    import os
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    with open(os.path.join(root, name), encoding='utf-8') as f:
+        return f.read()
+
+
+# Programas de prueba: recursion, ciclos anidados, floats mezclados con int,
+# strings, if/else y expresiones constantes (para el optimizador)
+SAMPLES = {
+    'recursion': """
+program recursion;
+var r : int;
+void fact(n : int, a : int)
+[ var b : int;
+  {
+    if (n > 1) {
+      b = a * n;
+      fact(n - 1, b);
+    } else {
+      print(a);
+    };
+  }
+];
+void walk(n : int)
+[ var i : int;
+  {
+    i = 0;
+    do {
+      if (n > 0) { walk(n - 1); };
+      print(n * 3 + i);
+      i = i + 1;
+    } while (i < 2);
+  }
+];
+main
+{
+  fact(5, 1);
+  fact(10, 1);
+  walk(3);
+}
+end;
+""",
+    'loops': """
+program loops;
+var i, j, total : int;
+    acc, step : float;
+main
+{
+  i = 0;
+  total = 0;
+  acc = 0.5;
+  step = 1.25;
+  do {
+    j = i;
+    do {
+      total = total + i * j - 3;
+      acc = acc + step * j / 4;
+      j = j + 1;
+    } while (j < 6);
+    if (total > 20) { total = total - 7; } else { total = total + 2; };
+    i = i + 1;
+  } while (i < 5);
+  print(total, acc);
+  print(acc / 3, total / 4, 7 / 2);
+}
+end;
+""",
+    'constants': """
+program constants;
+var a, b, c : int;
+    x : float;
+    s : string;
+main
+{
+  a = 2 + 3 * 4;
+  b = a * 2 - 10;
+  x = 10 / 4;
+  x = x + a + 0.5 * 4;
+  s = "texto";
+  if (a > 10) { c = a + b; } else { c = 0; };
+  if (3 < 2) { c = c + 100; };
+  c = c + 1;
+  c = c * 1;
+  print(a, b, c, x, s);
+  print(1.5 * 2, 9 / 3);
+}
+end;
+""",
+    'invariant': """
+program invariant;
+var n, k, base : int;
+    f : float;
+void count(m : int, scale : float)
+[ var i, lim : int;
+      out : float;
+  {
+    i = 0;
+    out = 0.0;
+    do {
+      lim = m * 2 + 1;
+      out = out + scale * lim + i;
+      i = i + 1;
+      if (m > 0) { if (i == 1) { count(m - 1, scale); }; };
+    } while (i < 3);
+    print(out);
+  }
+];
+main
+{
+  base = 4;
+  k = 0;
+  f = 0.0;
+  do {
+    n = base * 3 + 2;
+    f = f + n / 2;
+    k = k + 1;
+  } while (k < 10);
+  print(n, f);
+  count(2, 1.5);
+}
+end;
+""",
+}
+SAMPLES['semantica'] = read_program('semantica.ld')
+
+
+# 300 llamadas anidadas; imprime k de la mas profunda y de la de afuera
+RECURSIVE = """
+program deep;
+var r : int;
+void down(n : int)
+[ var k : int;
+  {
+    k = n * 2;
+    if (n > 0) { down(n - 1); };
+    if (n == 0) { print(k); };
+    if (n == 300) { print(k); };
+  }
+];
+main
+{
+  down(300);
+  down(2);
+}
+end;
+"""
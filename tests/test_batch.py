@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+
+import batch
+from support import SAMPLES, main_program, output_of
+
+PROGRAM = main_program("  a = 2; b = 3;\n  print(a * b);")
+
+
+def test_run_job_reports_output():
+    result = batch.run_job({'id': 1, 'source': PROGRAM})
+    assert result['ok'] and result['stage'] is None
+    assert result['output'] == ['6']
+
+
+def test_run_job_keeps_unexpected_run_errors_in_its_record(monkeypatch):
+    class BrokenVM(batch.VirtualMachine):
+        def run(self):
+            raise TypeError("falla inesperada")
+
+    monkeypatch.setattr(batch, 'VirtualMachine', BrokenVM)
+    result = batch.run_job({'id': 2, 'source': PROGRAM})
+    assert not result['ok']
+    assert result['stage'] == 'run'
+    assert result['errors'] == ["TypeError: falla inesperada"]
+
+
+def test_importing_batch_does_not_load_the_python_backend():
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    code = "import sys, batch; print('pybackend' in sys.modules)"
+    out = subprocess.run([sys.executable, '-c', code], cwd=root, check=True,
+                         capture_output=True, text=True).stdout
+    assert out.strip() == 'False'
+
+
+def test_run_job_reports_compile_errors():
+    result = batch.run_job({'id': 3, 'source': main_program("  c = 1;")})
+    assert not result['ok'] and result['stage'] == 'compile'
+    assert result['errors']
+
+
+def test_pool_keeps_job_order_and_matches_a_direct_run():
+    jobs = [{'id': name, 'source': SAMPLES[name]} for name in sorted(SAMPLES)]
+    results = list(batch.run_batch(jobs, workers=2, chunksize=1, opt_level=2))
+    assert [result['id'] for result in results] == sorted(SAMPLES)
+    for result in results:
+        assert result['ok']
+        assert result['output'] == [str(value) for value in output_of(SAMPLES[result['id']])]
+
+
+def test_python_backend_in_the_pool():
+    jobs = [{'id': name, 'source': SAMPLES[name]} for name in ('loops', 'recursion')]
+    vm_results = list(batch.run_batch(jobs, workers=2))
+    python_results = list(batch.run_batch(jobs, workers=2, backend='python'))
+    assert [r['output'] for r in python_results] == [r['output'] for r in vm_results]
+
+
+def test_manifest_paths_are_relative_to_it(tmp_path):
+    (tmp_path / 'uno.ld').write_text(PROGRAM)
+    manifest = tmp_path / 'jobs.ndjson'
+    manifest.write_text('"uno.ld"\n\n{"id": "inline", "source": "program p; main { } end;"}\n')
+    entries = list(batch.read_manifest(str(manifest)))
+    assert entries[0]['path'] == str(tmp_path / 'uno.ld')
+    assert entries[1]['id'] == 'inline'
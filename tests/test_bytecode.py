@@ -0,0 +1,65 @@
+import pytest
+
+from bytecode import (HEADER, MAGIC, VERSION, BytecodeError, disassemble, load_object,
+                      read_object, save_object)
+from compiler import Compiler
+from support import SAMPLES, compile_source, main_program, run_output
+
+
+def test_round_trip_keeps_quads_constants_and_functions():
+    program = compile_source(SAMPLES['recursion'])
+    obj = read_object(program.object_data)
+    assert obj.code.columns() == program.estructura.cuadruplos.columns()
+
+    functions = program.estructura.func_directory.functions
+    assert sorted(f.name for f in obj.functions.values()) == sorted(functions)
+    for func in obj.functions.values():
+        assert func.address == functions[func.name].address
+        assert func.start_quad == functions[func.name].start_quad
+
+
+def test_constants_keep_their_type():
+    obj = read_object(compile_source(SAMPLES['constants']).object_data)
+    values = set(obj.constants.values())
+    assert {3, 0.5, 'texto'} <= values
+    for address, value in obj.constants.items():
+        expected = int if address < 18000 else float if address < 19000 else str
+        assert type(value) is expected
+
+
+@pytest.mark.parametrize('level', [0, 1, 2])
+def test_int_literal_beyond_int64_is_a_semantic_error(level):
+    program = Compiler(level).compile(main_program("  a = 99999999999999999999;"))
+    assert not program.ok and program.object_data is None
+    assert program.semantic_errors == [
+        "Error semántico: la constante 99999999999999999999 no cabe en un int de 64 bits."]
+
+
+@pytest.mark.parametrize('level', [1, 2])
+def test_folds_beyond_int64_are_left_to_the_vm(level):
+    source = main_program("  a = 3037000500 * 3037000500;\n  b = 9223372036854775807 + 1;\n"
+                          "  print(a, b);")
+    expected = [9223372037000250000, 9223372036854775808]
+    assert run_output(compile_source(source)) == expected
+    assert run_output(compile_source(source, level)) == expected
+
+
+def test_save_and_load(tmp_path):
+    object_data = compile_source(SAMPLES['loops']).object_data
+    path = str(tmp_path / 'loops.ldo')
+    save_object(path, object_data)
+    assert disassemble(load_object(path)) == disassemble(read_object(object_data))
+
+
+def test_rejects_other_files_versions_and_truncated_objects():
+    object_data = compile_source(SAMPLES['loops']).object_data
+    with pytest.raises(BytecodeError):
+        read_object(b'XXXX' + object_data[4:])
+    header = list(HEADER.unpack(object_data[:HEADER.size]))
+    header[1] = VERSION + 1
+    with pytest.raises(BytecodeError):
+        read_object(HEADER.pack(*header) + object_data[HEADER.size:])
+    with pytest.raises(BytecodeError):
+        read_object(object_data[:-10])
+    with pytest.raises(BytecodeError):
+        read_object(MAGIC)
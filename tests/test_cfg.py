@@ -0,0 +1,97 @@
+import pytest
+
+from bytecode import write_object
+from cfg import (address_type, build_cfg, compute_dominators, dominates, from_ssa, lower,
+                 round_trip, to_ssa)
+from ir import Op
+from optimizer import PURE_OPS
+from support import SAMPLES, compile_source, output_of
+from vm import VirtualMachine
+
+
+def run_estructura(estructura):
+    output = []
+    machine = VirtualMachine(output=output.append)
+    machine.load_and_initialize_memory(write_object(estructura.cuadruplos, estructura.func_directory))
+    machine.run()
+    return output
+
+
+@pytest.mark.parametrize('level', [0, 2])
+@pytest.mark.parametrize('name', sorted(SAMPLES))
+def test_round_trip_through_ssa_keeps_the_output(name, level):
+    estructura = compile_source(SAMPLES[name], level).estructura
+    timings = round_trip(estructura)
+    assert set(timings) == {'build', 'dominators', 'to_ssa', 'from_ssa', 'lower'}
+    assert run_estructura(estructura) == output_of(SAMPLES[name], level)
+
+
+@pytest.mark.parametrize('name', sorted(SAMPLES))
+def test_ssa_writes_each_version_once(name):
+    program = build_cfg(compile_source(SAMPLES[name]).estructura)
+    phis = 0
+    for fn in program.functions:
+        idom = compute_dominators(fn)
+        assert all(dominates(fn, fn.entry, block) for block in idom)
+        to_ssa(fn)
+        written = [phi.res for block in fn.blocks for phi in block.phis]
+        phis += len(written)
+        written += [instr.res for block in idom for instr in block.instrs if instr.op in PURE_OPS]
+        assert len(written) == len(set(written))
+        assert all(isinstance(value, tuple) and value[1] > 0 for value in written)
+    # todas tienen un ciclo o un if que junta dos versiones
+    assert phis
+
+
+SWAP_BODY = """
+  s = "a"; t = "b"; i = 0;
+  do {
+    print(s, t);
+    s = s; t = t;
+    i = i + 1;
+  } while (i < 3);"""
+
+SWAP_PROGRAMS = {
+    'main': f"program swap;\nvar s, t : string; i : int;\nmain {{{SWAP_BODY}\n}}\nend;",
+    'funcion': f"""program swap;
+void f()
+[ var s, t : string; i : int;
+  {{{SWAP_BODY}
+  }}
+];
+main {{
+  f();
+}}
+end;""",
+}
+
+
+@pytest.mark.parametrize('where', sorted(SWAP_PROGRAMS))
+def test_phi_cycle_swaps_two_strings(where):
+    estructura = compile_source(SWAP_PROGRAMS[where]).estructura
+    directory = estructura.func_directory
+    scope = 'global' if where == 'main' else 'f'
+    s = directory.get_variable_address('s', scope)
+    t = directory.get_variable_address('t', scope)
+
+    program = build_cfg(estructura)
+    for fn in program.functions:
+        to_ssa(fn)
+    fn = next(fn for fn in program.functions if fn.name == ('main' if where == 'main' else 'f'))
+    loop = next(block for block in fn.blocks if {phi.base for phi in block.phis} >= {s, t})
+    phi_s = next(phi for phi in loop.phis if phi.base == s)
+    phi_t = next(phi for phi in loop.phis if phi.base == t)
+    # por la arista de regreso s recibe la t de la vuelta anterior y t la s
+    back = next(pred for pred in loop.preds if pred is loop)
+    phi_s.args[back], phi_t.args[back] = phi_t.args[back], phi_s.args[back]
+    for fn in program.functions:
+        from_ssa(fn, directory.memory_manager)
+    lower(program)
+
+    # el ciclo se rompe con un lugar string, no con un temporal de otro tipo
+    mm = directory.memory_manager
+    slots = {res for op, arg1, _, res in zip(*estructura.cuadruplos.columns())
+             if op == Op.ASSIGN and arg1 in (s, t) and res not in (s, t)}
+    assert len(slots) == 1
+    assert address_type(mm, slots.pop()) == 'string'
+    assert run_estructura(estructura) == ['a', 'b', 'b', 'a', 'a', 'b']
@@ -0,0 +1,26 @@
+import pytest
+
+from ir import JUMP_OPS, Op
+from support import SAMPLES, compile_source
+
+
+@pytest.mark.parametrize('name', sorted(SAMPLES))
+def test_gotomain_is_the_first_quad_and_points_at_main(name):
+    estructura = compile_source(SAMPLES[name]).estructura
+    code = estructura.cuadruplos
+    assert code[0].op == Op.GOTOMAIN
+    assert code[0].res == estructura.main_start_line
+    # main empieza despues del ENDFUNC de la ultima funcion
+    if estructura.func_directory.functions:
+        assert code[estructura.main_start_line - 2].op == Op.ENDFUNC
+
+
+@pytest.mark.parametrize('name', sorted(SAMPLES))
+def test_functions_and_jumps_point_inside_the_program(name):
+    estructura = compile_source(SAMPLES[name]).estructura
+    code = estructura.cuadruplos
+    for func in estructura.func_directory.functions.values():
+        assert code[func.start_quad - 2].op in (Op.GOTOMAIN, Op.ENDFUNC)
+    for quad in code:
+        if quad.op in JUMP_OPS:
+            assert 1 <= quad.res <= len(code)
@@ -0,0 +1,76 @@
+import os
+
+import compile_cache
+from compile_cache import ENTRY_HEADER, CompileCache
+from compiler import CachedProgram, Compiler
+from support import SAMPLES, compile_source, main_program, output_of, run_output
+
+
+def test_hit_returns_the_same_object(tmp_path):
+    cache = CompileCache(str(tmp_path))
+    compiler = Compiler(1, cache=cache)
+    first = compiler.compile(SAMPLES['loops'])
+    second = compiler.compile(SAMPLES['loops'])
+    assert isinstance(second, CachedProgram)
+    assert second.object_data == first.object_data == compile_source(SAMPLES['loops'], 1).object_data
+    assert (cache.hits, cache.misses, cache.stores) == (1, 1, 1)
+
+
+def test_options_are_part_of_the_key(tmp_path):
+    cache = CompileCache(str(tmp_path))
+    assert cache.key('x', 1) != cache.key('x', 2)
+    assert cache.key('x', 1, ('fold_constants',)) != cache.key('x', 1)
+
+
+def test_damaged_entry_is_a_miss(tmp_path):
+    cache = CompileCache(str(tmp_path))
+    cache.put('k', b'objeto')
+    with open(cache.path('k'), 'r+b') as f:
+        f.seek(ENTRY_HEADER.size)
+        f.write(b'X')
+    assert cache.get('k') is None
+
+
+def test_store_does_not_scan_the_directory_every_time(tmp_path):
+    cache = CompileCache(str(tmp_path))
+    for i in range(50):
+        cache.put(f'k{i}', b'x' * 100)
+    assert cache.scans == 1
+
+
+def test_evicts_least_recently_used_over_max_bytes(tmp_path):
+    entry = ENTRY_HEADER.size + 100
+    cache = CompileCache(str(tmp_path), max_bytes=entry * 5)
+    for i in range(5):
+        cache.put(f'k{i}', b'x' * 100)
+        # mtime distinto para que el orden LRU no dependa de la resolucion del reloj
+        os.utime(cache.path(f'k{i}'), (i, i))
+    cache.get('k0')   # k0 pasa a ser el mas reciente
+    cache.put('k5', b'x' * 100)
+    assert cache.get('k1') is None
+    assert cache.get('k0') is not None
+    stats = cache.stats()
+    assert stats['bytes'] <= cache.max_bytes and stats['evictions'] == 1
+
+
+def test_cached_program_runs_and_rebuilds_its_tables_on_demand(tmp_path):
+    compiler = Compiler(2, cache=CompileCache(str(tmp_path)))
+    compiler.compile(SAMPLES['invariant'])
+    cached = compiler.compile(SAMPLES['invariant'])
+    assert isinstance(cached, CachedProgram) and cached.ok
+    assert run_output(cached) == output_of(SAMPLES['invariant'], 2)
+    assert cached.estructura.cuadruplos.columns() == \
+        compile_source(SAMPLES['invariant'], 2).estructura.cuadruplos.columns()
+
+
+def test_programs_with_errors_are_not_stored(tmp_path):
+    cache = CompileCache(str(tmp_path))
+    program = Compiler(cache=cache).compile(main_program("  c = 1;"))
+    assert not program.ok and cache.stores == 0
+
+
+def test_a_different_compiler_changes_the_key(tmp_path, monkeypatch):
+    cache = CompileCache(str(tmp_path))
+    key = cache.key('x', 1)
+    monkeypatch.setattr(compile_cache, '_compiler_digest', '0' * 64)
+    assert cache.key('x', 1) != key
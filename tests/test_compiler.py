@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from compiler import Compiler
+from support import SAMPLES, main_program
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def test_compile_writes_nothing_to_stdout(capsys):
+    program = Compiler().compile(main_program("  a = 1;\n  print(a);"))
+    assert program.ok
+    assert capsys.readouterr().out == ''
+
+
+def test_importing_compiler_does_not_load_the_python_backend():
+    code = "import sys, compiler; print('pybackend' in sys.modules)"
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    assert out.strip() == 'False'
+
+
+def test_compilations_do_not_share_state():
+    compiler = Compiler()
+    broken = compiler.compile(main_program("  a = c;"))
+    assert not broken.ok and broken.semantic_errors
+    program = compiler.compile(SAMPLES['loops'])
+    assert program.ok and program.errors == []
+    assert program.object_data == Compiler().compile(SAMPLES['loops']).object_data
+
+
+def test_compile_from_many_threads():
+    expected = {name: Compiler().compile(source).object_data for name, source in SAMPLES.items()}
+    compiler = Compiler()
+    names = sorted(SAMPLES) * 8
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        objects = list(pool.map(lambda name: compiler.compile(SAMPLES[name]).object_data, names))
+    assert objects == [expected[name] for name in names]
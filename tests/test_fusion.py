@@ -0,0 +1,48 @@
+import pytest
+
+from support import RECURSIVE, SAMPLES, compile_source
+from tracing import RingBufferSink, Tracer
+from vm import FUSION_RULES, VirtualMachine
+
+
+def run(program, fusion=None, tracer=None):
+    output = []
+    machine = VirtualMachine(tracer=tracer, output=output.append, fusion=fusion)
+    machine.load_and_initialize_memory(program.object_data)
+    executed = machine.run()
+    return [repr(value) for value in output], executed, machine.fused
+
+
+@pytest.mark.parametrize('level', [0, 1, 2])
+@pytest.mark.parametrize('name', sorted(SAMPLES) + ['deep'])
+def test_fusion_keeps_the_output_and_runs_fewer_steps(name, level):
+    program = compile_source(SAMPLES.get(name, RECURSIVE), level)
+    plain, plain_steps, _ = run(program, fusion=())
+    fused, fused_steps, counts = run(program)
+    assert fused == plain
+    assert fused_steps < plain_steps and sum(counts.values()) > 0
+
+
+@pytest.mark.parametrize('rule', sorted(FUSION_RULES))
+def test_each_rule_alone(rule):
+    for source in list(SAMPLES.values()) + [RECURSIVE]:
+        program = compile_source(source, 1)
+        output, _, counts = run(program, fusion=(rule,))
+        assert output == run(program, fusion=())[0]
+        assert set(counts) == {rule}
+
+
+def test_every_rule_fires_somewhere():
+    totals = dict.fromkeys(FUSION_RULES, 0)
+    for source in list(SAMPLES.values()) + [RECURSIVE]:
+        for level in (0, 2):
+            for rule, count in run(compile_source(source, level))[2].items():
+                totals[rule] += count
+    assert all(totals.values()), totals
+
+
+def test_tracing_instructions_turns_fusion_off():
+    program = compile_source(SAMPLES['loops'])
+    tracer = Tracer('instructions', RingBufferSink(capacity=10))
+    _, executed, counts = run(program, tracer=tracer)
+    assert counts == {} and executed == run(program, fusion=())[1]
@@ -0,0 +1,74 @@
+import pytest
+
+from compiler import Compiler
+from incremental import IncrementalCompiler
+
+TEMPLATE = """
+program editado;
+var g : int;
+    h : float;
+void scale(p : int, q : float)
+[ var r : int;
+      s : float;
+  {{
+    r = p * {k} + 1;
+    s = q / 2 + r;
+    if (s > 3.5) {{ print("scale", r, s); }};
+  }}
+];
+void twice({param} : int)
+[ var i : int;
+  {{
+    i = 0;
+    do {{
+      scale({param} + i, 1.5);
+      i = i + 1;
+    }} while (i < 2);
+  }}
+];
+{extra}
+main
+{{
+  g = {main};
+  h = 0.25;
+  twice(g);
+  print(g, h);
+}}
+end;
+"""
+EXTRA = """void extra(p : int)
+[ var t : int;
+  { t = p - 1; print("extra", t); }
+];"""
+
+BASE = dict(k=3, param='p', extra='', main=4)
+EDITS = [
+    BASE,
+    dict(BASE, main=5),                     # solo main
+    dict(BASE, main=5, k=7),                # cuerpo de la primera funcion
+    dict(BASE, main=5, k=7, param='n'),     # firma de la segunda
+    dict(BASE, main=5, k=7, param='n', extra=EXTRA),
+    dict(BASE, main=5, k=7, param='n', extra='void roto( [ ;'),   # error de sintaxis
+    dict(BASE, main=6, k=7),
+]
+
+
+@pytest.mark.parametrize('level', [0, 1, 2])
+def test_each_edit_gives_the_object_of_a_full_compile(level):
+    compiler = IncrementalCompiler(level)
+    for fields in EDITS:
+        source = TEMPLATE.format(**fields)
+        program = compiler.compile(source)
+        full = Compiler(level).compile(source)
+        assert program.object_data == full.object_data
+        assert program.errors == full.errors
+
+
+def test_unchanged_functions_are_not_parsed_again():
+    compiler = IncrementalCompiler(1)
+    compiler.compile(TEMPLATE.format(**BASE))
+    compiler.compile(TEMPLATE.format(**dict(BASE, main=5)))
+    assert compiler.stats['reused'] == 2 and compiler.stats['parsed'] == 0
+    # cambiar la primera funcion no invalida a la segunda (solo ve su firma)
+    compiler.compile(TEMPLATE.format(**dict(BASE, main=5, k=7)))
+    assert compiler.stats['reused'] == 1 and compiler.stats['parsed'] == 1
@@ -0,0 +1,21 @@
+from ir import OPCODE_NAMES, OPCODES, Op, QuadBuffer
+
+
+def test_opcode_names_follow_the_enum():
+    assert len(OPCODE_NAMES) == len(Op)
+    assert all(OPCODES[name] == code for code, name in enumerate(OPCODE_NAMES))
+    assert OPCODES['+'] == Op.ADD and OPCODES['GOTOF'] == Op.GOTOF
+
+
+def test_quads_are_views_over_the_columns():
+    code = QuadBuffer()
+    assert code.append(Op.GOTOMAIN) == 1
+    assert code.append(Op.ADD, 1000, 17000, 12000) == 2
+    num, name, arg1, arg2, res = code[1]
+    assert (num, name, arg1, arg2, res) == (2, '+', 1000, 17000, 12000)
+    code[1].arg2 = 17001
+    code.set_res(1, 2)
+    assert code.arg2[1] == 17001 and code[0].res == 2 and code[-1].num == 2
+    assert list(code.rows()) == [(1, Op.GOTOMAIN, -1, -1, 2), (2, Op.ADD, 1000, 17001, 12000)]
+    assert code.nbytes == 2 * 16
+
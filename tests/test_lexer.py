@@ -0,0 +1,64 @@
+import pytest
+
+from lexer import PlyTokenizer, read_line_chunks, split_line_ranges
+from support import read_program
+
+# varias copias de semantica.ld con un caracter invalido en cada una
+SOURCE = (read_program('semantica.ld') + "\n  @ x = 1;\n") * 20
+
+
+def token_list(tokens):
+    return [(t.type, t.value, t.lineno, t.lexpos) for t in tokens]
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / 'fuente.ld'
+    path.write_text(SOURCE)
+    return str(path)
+
+
+def whole_buffer():
+    tokenizer = PlyTokenizer()
+    return token_list(tokenizer.iter_chunk_tokens([SOURCE])), tokenizer
+
+
+def test_line_chunks_end_at_a_newline(source_file):
+    with open(source_file) as f:
+        chunks = list(read_line_chunks(f, chunk_size=100))
+    assert ''.join(chunks) == SOURCE
+    assert all(chunk.endswith('\n') for chunk in chunks)
+
+
+@pytest.mark.parametrize('lean', [False, True])
+def test_small_chunks_give_the_same_tokens(source_file, lean):
+    expected, reference = whole_buffer()
+    tokenizer = PlyTokenizer()
+    assert token_list(tokenizer.iter_tokens(source_file, lean=lean, chunk_size=300)) == expected
+    assert tokenizer.errors == reference.errors and len(tokenizer.errors) == 20
+    if lean:
+        assert tokenizer.tokens_by_line == []
+    else:
+        assert tokenizer.tokens_by_line == reference.tokens_by_line
+
+
+@pytest.mark.parametrize('lean', [False, True])
+def test_parallel_lexing_matches_a_single_process(source_file, lean):
+    serial = PlyTokenizer()
+    expected = token_list(serial.iter_tokens(source_file, lean=lean))
+    parallel = PlyTokenizer()
+    tokens = token_list(parallel.iter_tokens_parallel(source_file, workers=2, lean=lean,
+                                                      min_chunk_size=1000))
+    assert tokens == expected
+    assert parallel.errors == serial.errors
+    assert parallel.tokens_by_line == serial.tokens_by_line
+    assert parallel.symbol_table == serial.symbol_table
+
+
+def test_ranges_cover_the_file_on_line_boundaries(source_file):
+    ranges = split_line_ranges(source_file, 8, min_chunk_size=500)
+    assert len(ranges) == 8
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(SOURCE.encode())
+    assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+    data = SOURCE.encode()
+    assert all(data[end - 1:end] == b'\n' for _, end in ranges)
@@ -0,0 +1,48 @@
+import pytest
+
+from compiler import Compiler
+from support import RECURSIVE, compile_source, main_program
+from vm import (CallDepthExceeded, DeadlineExceeded, ExecutionLimits, InstructionLimitExceeded,
+                MemoryLimitExceeded, VirtualMachine)
+
+FOREVER = main_program("  a = 0;\n  do { a = a + 1; } while (a > 0);")
+SHORT = main_program("  a = 0;\n  do { a = a + 1; } while (a < 3);\n  print(a);")
+
+
+def run(source, **limits):
+    return Compiler().run(compile_source(source), output=lambda value: None,
+                          limits=ExecutionLimits(**limits))
+
+
+def test_instruction_budget():
+    with pytest.raises(InstructionLimitExceeded) as info:
+        run(FOREVER, max_instructions=5000, check_interval=1000)
+    assert info.value.executed == 5000 and info.value.pc is not None
+
+
+def test_budget_that_is_just_enough_does_not_trip():
+    # el presupuesto cuenta steps: una superinstruccion cuenta una vez
+    machine = VirtualMachine(output=lambda value: None)
+    machine.load_and_initialize_memory(compile_source(SHORT).object_data)
+    needed = machine.run()
+    run(SHORT, max_instructions=needed)
+    with pytest.raises(InstructionLimitExceeded):
+        run(SHORT, max_instructions=needed - 1)
+
+
+def test_deadline():
+    with pytest.raises(DeadlineExceeded):
+        run(FOREVER, max_seconds=0.05, check_interval=1000)
+
+
+def test_call_depth():
+    with pytest.raises(CallDepthExceeded) as info:
+        run(RECURSIVE, max_call_depth=50)
+    assert info.value.call_depth == 50
+
+
+def test_memory_cells_at_load_and_at_each_call():
+    with pytest.raises(MemoryLimitExceeded):
+        run(SHORT, max_memory_cells=1)
+    with pytest.raises(MemoryLimitExceeded):
+        run(RECURSIVE, max_memory_cells=100)
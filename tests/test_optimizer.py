@@ -0,0 +1,166 @@
+import pytest
+
+from bytecode import read_object
+from ir import Op
+from optimizer import PEEPHOLE_RULES
+from semantic import MemoryManager
+from support import SAMPLES, compile_source, main_program, output_of, run_output
+from vm import VirtualMachine
+
+
+def ops_of(program):
+    return [quad.op.name for quad in program.estructura.cuadruplos]
+
+
+def printed(source, level, **kwargs):
+    # repr: 7 y 7.0 no son la misma salida
+    return [repr(value) for value in output_of(source, level, **kwargs)]
+
+
+@pytest.mark.parametrize('level', [1, 2])
+@pytest.mark.parametrize('name', sorted(SAMPLES))
+def test_same_output_at_every_level(name, level):
+    assert printed(SAMPLES[name], level) == printed(SAMPLES[name], 0)
+
+
+def chain(count, statement):
+    return main_program("  a = 0; b = 3;\n" + "\n".join(["  " + statement] * count)
+                        + "\n  print(a);")
+
+
+@pytest.mark.parametrize('count, statement', [(1000, 'a = a + 1;'), (1200, 'a = a + b * 7;')])
+def test_long_assignment_chain_same_output_at_every_level(count, statement):
+    # el plegado crea una constante por valor intermedio: no deben salirse
+    # del segmento cte_int (antes caian en cte_float y se imprimian como float)
+    source = chain(count, statement)
+    expected = output_of(source, 0)
+    assert output_of(source, 1) == expected
+    program = compile_source(source, 1, disabled=('eliminate_dead_code',))
+    assert run_output(program) == expected
+
+
+def test_constant_segment_is_never_overrun():
+    mm = MemoryManager()
+    start, end = mm.MEMORY_RANGES['cte_int']
+    for value in range(end - start + 1):
+        assert mm.get_constant_address(value, 'int') == start + value
+    assert mm.get_constant_address(10 ** 6, 'int') is None
+    # las que ya existen se siguen encontrando
+    assert mm.get_constant_address(5, 'int') == start + 5
+
+
+def test_constant_expressions_and_branches_fold_away():
+    program = compile_source(main_program(
+        "  a = 2 + 3 * 4;\n  b = a * 2;\n  if (3 < 2) { print(b); };\n  print(a, b);"), 1)
+    assert ops_of(program) == ['GOTOMAIN', 'ASSIGN', 'ASSIGN', 'PRINT', 'PRINT', 'END']
+    constants = read_object(program.object_data).constants
+    assert sorted(constants.values()) == [14, 28]
+    assert run_output(program) == [14, 28]
+
+
+DEAD = """
+program dead;
+var a, b : int;
+void unused(n : int)
+[ var k : int;
+  { k = n; print(k); }
+];
+main
+{
+  a = 5;
+  b = a * 2;
+  b = b + 1;
+  a = 7;
+  print(a);
+}
+end;
+"""
+
+
+def test_dead_code_and_uncalled_functions_are_removed():
+    program = compile_source(DEAD, 1, disabled=('fold_constants',))
+    assert ops_of(program) == ['GOTOMAIN', 'ASSIGN', 'PRINT', 'END']
+    assert 'unused' not in program.estructura.func_directory.functions
+    assert run_output(program) == [7]
+
+
+@pytest.mark.parametrize('name', sorted(SAMPLES))
+def test_dead_code_alone_keeps_the_output(name):
+    passes = ('fold_constants', 'peephole', 'recycle_temps')
+    program = compile_source(SAMPLES[name], 1, disabled=passes)
+    assert run_output(program) == output_of(SAMPLES[name])
+
+
+@pytest.mark.parametrize('level', [0, 1])
+def test_more_temps_than_the_segment_holds(level):
+    # 3000 temporales int: sin reusar direcciones no caben en temp_int
+    source = main_program("  a = 0; b = 3;\n" + "\n".join(["  a = a + b * 2;"] * 1500)
+                          + "\n  print(a);")
+    program = compile_source(source, level, disabled=('fold_constants',))
+    assert read_object(program.object_data).segment_sizes['temp_int'] == 1
+    assert run_output(program) == [9000]
+
+
+@pytest.mark.parametrize('name', sorted(SAMPLES))
+def test_recycled_temps_keep_the_output(name):
+    program = compile_source(SAMPLES[name], 1, disabled=('fold_constants', 'peephole'))
+    assert run_output(program) == output_of(SAMPLES[name])
+
+
+BRANCHES = main_program("""  a = 2; b = 0;
+  do {
+    if (a > 1) { if (b > 1) { print(1); } else { print(2); }; } else { print(3); };
+    if (b < 1) { } else { print(4); };
+    b = b + 1;
+  } while (b < 3);""")
+
+
+def test_peephole_rules_fire_on_nested_branches():
+    program = compile_source(BRANCHES, 1, disabled=('fold_constants',))
+    stats = program.opt_stats['peephole']
+    assert stats['thread_jumps'] and stats['invert_branch_over_goto'] and stats['retarget_temp_copy']
+    code = program.estructura.cuadruplos
+    # ya no queda un salto a un GOTO
+    assert not [quad for quad in code if quad.op in (Op.GOTO, Op.GOTOF, Op.GOTOT)
+                and code[quad.res - 1].op == Op.GOTO]
+    assert run_output(program) == [2, 2, 4, 1, 4]
+
+
+@pytest.mark.parametrize('rule', sorted(PEEPHOLE_RULES))
+def test_each_peephole_rule_alone_keeps_the_output(rule):
+    others = [name for name in PEEPHOLE_RULES if name != rule]
+    for source in [BRANCHES] + list(SAMPLES.values()):
+        program = compile_source(source, 1, disabled=['fold_constants'] + others)
+        assert run_output(program) == output_of(source)
+
+
+def test_common_subexpression_is_reused_until_an_operand_changes():
+    source = main_program("  a = 4;\n  b = a * 3 + 1;\n  c = a * 3 + 2;\n  a = a + 1;\n"
+                          "  c = c + a * 3;\n  print(b, c);", "var a, b, c : int;")
+    program = compile_source(source, 2, disabled=('fold_constants',))
+    assert program.opt_stats['eliminate_common_subexpressions'] == 1
+    # a * 3 se calcula una vez antes de a = a + 1 y otra despues
+    assert ops_of(program).count('MUL') == 2
+    assert run_output(program) == [13, 29]
+
+
+def executed_steps(program):
+    machine = VirtualMachine(output=lambda value: None, fusion=())
+    machine.load_and_initialize_memory(program.object_data)
+    return machine.run()
+
+
+def test_loop_invariants_are_computed_once():
+    source = main_program("  a = 3; c = 0;\n  do {\n    b = a * 7 + 1;\n    c = c + b;\n"
+                          "  } while (c < 1000);\n  print(c);", "var a, b, c : int;")
+    hoisted = compile_source(source, 2, disabled=('fold_constants',))
+    kept = compile_source(source, 2, disabled=('fold_constants', 'hoist_loop_invariants'))
+    assert hoisted.opt_stats['hoist_loop_invariants'] == 2
+    assert executed_steps(hoisted) < executed_steps(kept)
+    assert run_output(hoisted) == run_output(kept) == [1012]
+
+
+def test_nothing_is_hoisted_from_a_loop_that_calls_its_own_function():
+    # count se llama a si misma dentro del ciclo: m y lim cambian por llamada
+    program = compile_source(SAMPLES['invariant'], 2)
+    assert run_output(program) == output_of(SAMPLES['invariant'])
@@ -0,0 +1,87 @@
+import sys
+
+import pytest
+
+import pybackend
+from compile_cache import CompileCache
+from support import SAMPLES, compile_source, main_program, run_output
+
+# el literal se sale de float: x es inf, y es -inf y z es nan
+NON_FINITE = main_program(f"  x = 1{'0' * 400}.0 * 10.0;\n  y = 0.0 - x;\n  z = x + y;\n"
+                          "  print(x, y, z);", declarations="var x, y, z : float;")
+
+
+def python_output(object_data, **kwargs):
+    output = []
+    pybackend.run_python(object_data, output=output.append, **kwargs)
+    return output
+
+
+@pytest.fixture
+def disk_cache(tmp_path, monkeypatch):
+    cache = CompileCache(str(tmp_path))
+    monkeypatch.setattr(pybackend, '_disk_cache', cache)
+    monkeypatch.setattr(pybackend, '_code_cache', {})
+    return cache
+
+
+@pytest.mark.parametrize('level', [0, 1, 2])
+@pytest.mark.parametrize('name', sorted(SAMPLES))
+def test_same_output_as_vm(name, level, disk_cache):
+    program = compile_source(SAMPLES[name], level)
+    assert python_output(program.object_data) == run_output(program)
+
+
+@pytest.mark.parametrize('level', [0, 1, 2])
+def test_non_finite_floats(level, disk_cache):
+    # nan != nan: se comparan con repr
+    program = compile_source(NON_FINITE, level)
+    expected = run_output(program)
+    assert list(map(repr, expected)) == ['inf', '-inf', 'nan']
+    assert list(map(repr, python_output(program.object_data))) == ['inf', '-inf', 'nan']
+
+
+@pytest.mark.parametrize('name', sorted(SAMPLES))
+def test_dispatch_translation_same_output(name):
+    # el ciclo de despacho es el respaldo cuando no se reconocen while/if
+    program = compile_source(SAMPLES[name], 1)
+    source = pybackend.translate(program.object_data, structured=False)
+    output = []
+    namespace = {'output': output.append, '__name__': '__ldprogram__'}
+    exec(compile(source, '<ld>', 'exec'), namespace)
+    namespace['main']()
+    assert output == run_output(program)
+
+
+def test_code_is_stored_in_the_compile_cache(disk_cache, monkeypatch):
+    object_data = compile_source(SAMPLES['loops']).object_data
+    expected = python_output(object_data)
+    assert disk_cache.stats()['stores'] == 1
+
+    monkeypatch.setattr(pybackend, '_code_cache', {})
+    assert python_output(object_data) == expected
+    assert disk_cache.stats()['hits'] == 1
+
+
+def test_key_changes_with_the_backend_sources(monkeypatch):
+    object_data = compile_source(SAMPLES['loops']).object_data
+    key = pybackend.object_key(object_data)
+    monkeypatch.setattr(pybackend, '_backend_digest', 'otro traductor')
+    assert pybackend.object_key(object_data) != key
+
+
+def test_recursion_limit_is_restored(disk_cache):
+    limit = sys.getrecursionlimit()
+    python_output(compile_source(SAMPLES['recursion']).object_data)
+    assert sys.getrecursionlimit() == limit
+
+
+def test_overlapping_runs_restore_the_limit_once():
+    limit = sys.getrecursionlimit()
+    pybackend.raise_recursion_limit()
+    pybackend.raise_recursion_limit()
+    assert sys.getrecursionlimit() >= pybackend.RUN_RECURSION_LIMIT
+    pybackend.restore_recursion_limit()
+    assert sys.getrecursionlimit() >= pybackend.RUN_RECURSION_LIMIT
+    pybackend.restore_recursion_limit()
+    assert sys.getrecursionlimit() == limit
@@ -0,0 +1,44 @@
+import pytest
+
+from compiler import Compiler
+from support import SAMPLES, compile_source, run_output
+from tracing import TRACE_OFF, RingBufferSink, Tracer
+from vm import VirtualMachine
+
+
+def traced(program, level):
+    sink = RingBufferSink(capacity=100000)
+    output = []
+    Compiler().run(program, tracer=Tracer(level, sink), output=output.append)
+    return sink.lines(), output
+
+
+@pytest.mark.parametrize('level', ['off', 'calls', 'instructions', 'memory'])
+def test_tracing_does_not_change_output(level):
+    program = compile_source(SAMPLES['recursion'])
+    assert traced(program, level)[1] == run_output(program)
+
+
+def test_off_writes_nothing():
+    assert traced(compile_source(SAMPLES['recursion']), TRACE_OFF)[0] == []
+
+
+def test_calls_trace_one_line_per_call_and_return():
+    lines, _ = traced(compile_source(SAMPLES['recursion']), 'calls')
+    calls = [line for line in lines if line.startswith('Call ')]
+    returns = [line for line in lines if line.startswith('Return from ')]
+    assert calls and len(calls) == len(returns)
+
+
+def test_instructions_trace_every_executed_quad():
+    program = compile_source(SAMPLES['loops'])
+    machine = VirtualMachine(output=lambda value: None, fusion=())
+    machine.load_and_initialize_memory(program.object_data)
+    executed = machine.run()
+    lines, _ = traced(program, 'instructions')
+    assert len([line for line in lines if line.startswith('PC=')]) == executed
+
+
+def test_memory_trace_shows_writes():
+    lines, _ = traced(compile_source(SAMPLES['constants']), 'memory')
+    assert any(line.startswith('Memory[1000] (global_int) := ') for line in lines)
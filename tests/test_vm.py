@@ -0,0 +1,68 @@
+import pytest
+
+import vm
+from bytecode import write_object
+from ir import Op
+from support import RECURSIVE, compile_source, main_program
+from vm import VirtualMachine, VMError
+
+GLOBALS = "var a, b : int;\n    x : float;\n    s : string;"
+
+
+def test_final_memory_by_address():
+    program = compile_source(main_program("  a = 7;\n  b = a * 3;\n  x = 2.5;", GLOBALS))
+    memory = vm.test_interpreter(program.object_data, output=lambda value: None)
+    assert (memory[1000], memory[1001], memory[2000], memory[3000]) == (7, 21, 2.5, '')
+
+
+def test_segments_start_with_their_type_default():
+    vm = VirtualMachine(output=lambda value: None)
+    vm.load_and_initialize_memory(compile_source(main_program("  print(a);", GLOBALS)).object_data)
+    assert vm.get_memory_value(1001) == 0
+    assert type(vm.get_memory_value(2000)) is float
+    assert vm.get_memory_value(3000) == ''
+
+
+def test_each_call_keeps_its_own_locals():
+    # k de la llamada de afuera sigue valiendo 600 despues de 300 llamadas
+    output = []
+    machine = VirtualMachine(output=output.append)
+    machine.load_and_initialize_memory(compile_source(RECURSIVE).object_data)
+    cells = machine.live_cells
+    machine.run()
+    assert output == [0, 600, 0]
+    assert machine.call_stack == []
+    assert machine.live_cells == cells
+
+
+def test_released_frames_are_reused():
+    machine = VirtualMachine(output=lambda value: None)
+    machine.load_and_initialize_memory(compile_source(RECURSIVE).object_data)
+    machine.run()
+    # la segunda llamada (profundidad 3) no crea frames nuevos
+    assert sum(len(frames) for frames in machine.free_frames.values()) == 301
+
+
+def broken_object(source, index, field, value):
+    """Objeto con un campo de un cuadruplo cambiado"""
+    program = compile_source(source)
+    code = program.estructura.cuadruplos
+    getattr(code, field)[index] = value
+    return write_object(code, program.estructura.func_directory)
+
+
+def test_decoding_rejects_bad_jumps_and_calls():
+    source = main_program("  a = 1;\n  do { a = a + 1; } while (a < 3);\n  print(a);")
+    with pytest.raises(VMError, match="jump destination"):
+        VirtualMachine().load_and_initialize_memory(broken_object(source, 0, 'res', 999))
+    era = list(compile_source(RECURSIVE).estructura.cuadruplos.ops).index(Op.ERA)
+    with pytest.raises(VMError, match="ERA"):
+        VirtualMachine().load_and_initialize_memory(broken_object(RECURSIVE, era, 'arg1', 4999))
+
+
+def test_run_counts_executed_quads():
+    # GOTOMAIN, 2 asignaciones, 3 vueltas de 4 cuadruplos, PRINT y END
+    source = main_program("  a = 0;\n  b = 0;\n  do { a = a + 1; } while (a < 3);\n  print(a);")
+    machine = VirtualMachine(output=lambda value: None, fusion=())
+    machine.load_and_initialize_memory(compile_source(source).object_data)
+    assert machine.run() == 1 + 2 + 3 * 4 + 2
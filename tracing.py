@@ -0,0 +1,83 @@
+"""Niveles de traza y destinos (sinks) para la VM.
+
+La VM decide al cargar / al correr que version de sus funciones usa segun el
+nivel, asi que con TRACE_OFF el ciclo principal no revisa nada por cuadruplo.
+"""
+import collections
+import sys
+
+TRACE_OFF = 0
+TRACE_CALLS = 1          # llamadas y regresos de funcion
+TRACE_INSTRUCTIONS = 2   # cada cuadruplo ejecutado
+TRACE_MEMORY = 3         # cada escritura a memoria (y carga de constantes)
+
+TRACE_LEVELS = {
+    'off': TRACE_OFF,
+    'calls': TRACE_CALLS,
+    'instructions': TRACE_INSTRUCTIONS,
+    'memory': TRACE_MEMORY,
+}
+
+
+class CallbackSink:
+    """Manda cada linea a una funcion"""
+    def __init__(self, callback):
+        self.callback = callback
+
+    def write(self, message):
+        self.callback(message)
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    """Escribe a una ruta o a un archivo abierto (sys.stdout si no se da)"""
+    def __init__(self, target=None):
+        self.owns_file = isinstance(target, str)
+        self.file = open(target, 'w') if self.owns_file else target
+
+    def write(self, message):
+        (self.file or sys.stdout).write(message + '\n')
+
+    def close(self):
+        if self.owns_file:
+            self.file.close()
+        else:
+            (self.file or sys.stdout).flush()
+
+
+class RingBufferSink:
+    """Guarda solo las ultimas `capacity` lineas en memoria"""
+    def __init__(self, capacity=1000):
+        self.buffer = collections.deque(maxlen=capacity)
+
+    def write(self, message):
+        self.buffer.append(message)
+
+    def lines(self):
+        return list(self.buffer)
+
+    def close(self):
+        pass
+
+
+class Tracer:
+    def __init__(self, level=TRACE_OFF, sink=None):
+        if isinstance(level, str):
+            level = TRACE_LEVELS[level]
+        self.level = level
+        self.sink = sink if sink is not None else FileSink()
+
+    def enabled(self, level):
+        return self.level >= level
+
+    def emit(self, message):
+        self.sink.write(message)
+
+    def close(self):
+        self.sink.close()
+
+
+# Tracer por omision: apagado
+NO_TRACE = Tracer(TRACE_OFF)
@@ -1,101 +1,132 @@
-def convert_quadruples_to_test(cuads):
-    # Memory address ranges
-    constants_map = {}
-    
-    # Counters for each memory type
-    const_int_counter = 17000
-    const_float_counter = 18000
-    const_str_counter = 19000
-    
-    global_int_counter = 1000
-    global_float_counter = 2000
-    global_str_counter = 3000
-    
-    temp_int_counter = 12000
-    temp_float_counter = 13000
-    temp_bool_counter = 14000
+import operator
+import sys
+import time
 
-    def get_address(operand, context="operand"):
-        if operand in (None, 'None', '-', -1):
-            return -1
-        
-        # For jump destinations, return as-is
-        if context == "jump":
-            return str(operand)
-        
-        # If it's already an address, return it
-        if isinstance(operand, int) and 1000 <= operand <= 19999:
-            return str(operand)
-        
-        return str(operand)
-
-    # Memory allocation tracking
-    memory_regions = {
-        'global_int': 0,
-        'global_float': 0,
-        'global_str': 0,
-        'global_void': 0,
-        'local_int': 0,
-        'local_float': 0,
-        'local_str': 0,
-        'temp_int': 0,
-        'temp_float': 0,
-        'temp_bool': 0,
-        'cte_int': 0,
-        'cte_float': 0,
-        'cte_str': 0
-    }
-
-    # Count memory usage from semantic analysis
-    from semantic import estructura
-    mm = estructura.func_directory.memory_manager
-    
-    for mem_type, counter in mm.counters.items():
-        start_addr = mm.MEMORY_RANGES[mem_type][0]
-        used = counter - start_addr
-        memory_regions[mem_type] = used
+from bytecode import JUMP_OPS, OPCODE_NAMES, OPCODES, SEGMENTS, read_object
+from tracing import NO_TRACE, TRACE_CALLS, TRACE_INSTRUCTIONS, TRACE_MEMORY
+
+
+# Valor inicial de cada celda segun el tipo del segmento
+SEGMENT_DEFAULTS = {
+    'int': 0,
+    'float': 0.0,
+    'str': '',
+    'bool': False,
+    'void': None,
+}
+
+# Los segmentos empiezan en multiplos de 1000
+BLOCK_SIZE = 1000
+
+
+class VMError(Exception):
+    pass
+
+
+class Halt(Exception):
+    """Raised by the halt step to leave the dispatch loop"""
+    pass
+
+
+class VMLimitError(VMError):
+    """An execution limit tripped; carries the PC and counters at that moment"""
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+        self.pc = None
+        self.executed = None
+        self.call_depth = None
+        self.live_cells = None
+        self.elapsed = None
+
+    def __str__(self):
+        if self.pc is None:  # tripped while loading
+            return self.message
+        return (f"{self.message} (PC={self.pc}, executed={self.executed}, "
+                f"call depth={self.call_depth}, live cells={self.live_cells}, "
+                f"elapsed={self.elapsed:.3f}s)")
+
+
+class InstructionLimitExceeded(VMLimitError):
+    pass
+
+
+class DeadlineExceeded(VMLimitError):
+    pass
+
+
+class CallDepthExceeded(VMLimitError):
+    pass
+
+
+class MemoryLimitExceeded(VMLimitError):
+    pass
+
+
+class ExecutionLimits:
+    """Per-run budgets; None means unlimited.
+
+    Instruction count and wall time are checked every `check_interval`
+    quads, call depth at GOSUB and live memory cells at ERA. A fused step
+    (see FUSION_RULES) counts as one instruction.
+    """
+    def __init__(self, max_instructions=None, max_seconds=None, max_call_depth=None,
+                 max_memory_cells=None, check_interval=10000):
+        self.max_instructions = max_instructions
+        self.max_seconds = max_seconds
+        self.max_call_depth = max_call_depth
+        self.max_memory_cells = max_memory_cells
+        self.check_interval = check_interval
+
+
+NO_LIMITS = ExecutionLimits()
+
+
+# Local segments are contiguous in SEGMENTS; a frame holds exactly these
+LOCAL_SEGMENT_START = SEGMENTS.index('local_int')
+LOCAL_SEGMENT_END = SEGMENTS.index('local_str') + 1
+
+
+class Frame:
+    """Activation record: local int/float/str cells of one function call"""
+    __slots__ = ('function', 'segments', 'return_address', 'size')
+
+    def __init__(self, function, segments=None):
+        self.function = function
+        self.return_address = None
+        if segments is None:
+            segments = [[0] * function.frame_sizes[0],
+                        [0.0] * function.frame_sizes[1],
+                        [''] * function.frame_sizes[2]]
+        self.segments = segments
+        self.size = sum(len(seg) for seg in segments)
+
+    def reset(self):
+        ints, floats, strs = self.segments
+        ints[:] = [0] * len(ints)
+        floats[:] = [0.0] * len(floats)
+        strs[:] = [''] * len(strs)
 
-    # Generate output sections
-    sections = []
-    
-    # Constants section
-    if mm.constants:
-        constants_lines = []
-        for const_val, addr in sorted(mm.constants.items(), key=lambda x: x[1]):
-            constants_lines.append(f"{const_val} {addr}")
-        sections.append("\n".join(constants_lines))
-    else:
-        sections.append("")  # Empty constants section
-    
-    # Memory allocation section
-    memory_lines = [f"{k} {v}" for k, v in memory_regions.items()]
-    sections.append("\n".join(memory_lines))
-    
-    # Quadruples section
-    cuad_lines = []
-    for quad in cuads:
-        if len(quad) >= 5:
-            num, op, arg1, arg2, dest = quad[:5]
-            
-            op_name = op.lower()
-            
-            if op_name in ['gotomain', 'goto', 'gotof', 'gotot', 'gosub']:
-                op1 = get_address(arg1, "operand") if arg1 not in (None, 'None', '-', -1) else -1
-                op2 = get_address(arg2, "operand") if arg2 not in (None, 'None', '-', -1) else -1
-                dst = get_address(dest, "jump")
-            else:
-                op1 = get_address(arg1, "operand") if arg1 not in (None, 'None', '-', -1) else -1
-                op2 = get_address(arg2, "operand") if arg2 not in (None, 'None', '-', -1) else -1
-                dst = get_address(dest, "operand") if dest not in (None, 'None', '-', -1) else -1
-            
-            cuad_lines.append(f"{num} {op_name} {op1} {op2} {dst}")
-    
-    sections.append("\n".join(cuad_lines))
-    
-    return "\n".join(sections)
 
 class VirtualMachine:
-    def __init__(self):
+    def __init__(self, tracer=None, limits=None, output=None, fusion=None):
+        # Tracing is decided at load/run time, see tracing.py
+        self.tracer = tracer or NO_TRACE
+        # Superinstructions to build at decode time (names in FUSION_RULES);
+        # tracing instructions or calls needs one step per quad
+        if fusion is None:
+            fusion = tuple(FUSION_RULES)
+        if self.tracer.enabled(TRACE_INSTRUCTIONS) or self.tracer.enabled(TRACE_CALLS):
+            fusion = ()
+        self.fusion = fusion
+        self.fused = {}
+        # PRINT calls output(value); by default it goes to stdout
+        self.output = output or print_output
+        self.limits = limits or NO_LIMITS
+        self.max_call_depth = self.limits.max_call_depth or sys.maxsize
+        self.max_memory_cells = self.limits.max_memory_cells or sys.maxsize
+        self.live_cells = 0
+        
         # Memory allocation ranges
         self.MEMORY_RANGES = {
             'global_int': (1000, 1999),
@@ -113,12 +144,35 @@ class VirtualMachine:
             'cte_str': (19000, 19999)
         }
         
-        # Virtual memory
-        self.virtual_memory = {}
+        # One preallocated list per segment, in SEGMENTS order
+        self.segments = [[] for _ in SEGMENTS]
+        self.segment_index = {name: i for i, name in enumerate(SEGMENTS)}
+        self.segment_base = [self.MEMORY_RANGES[name][0] for name in SEGMENTS]
         
-        # Function call stack for handling recursion
+        # Block of 1000 addresses -> segment index, for O(1) decoding
+        last_block = max(end for _, end in self.MEMORY_RANGES.values()) // BLOCK_SIZE
+        self.block_segment = [-1] * (last_block + 1)
+        for i, name in enumerate(SEGMENTS):
+            start, end = self.MEMORY_RANGES[name]
+            for block in range(start // BLOCK_SIZE, end // BLOCK_SIZE + 1):
+                self.block_segment[block] = i
+        
+        # Activation records: caller frames, the frame built by ERA, and
+        # released frames per function address for reuse
         self.call_stack = []
-        self.local_memory_stack = []
+        self.current_frame = None
+        self.pending_frame = None
+        self.free_frames = {}
+        
+        # Function table from the object file, by function address
+        self.functions = {}
+        
+        # Decoded program: one step function per quad, see decode_program
+        self.object = None
+        self.program = []
+        self.halt_pc = 0
+        self.pc = 0
+        self.instruction_count = 0
         
         # Memory allocation tracking
         self.memory_allocation = {
@@ -137,373 +191,603 @@ class VirtualMachine:
             'cte_str': 0,
         }
         
+    def decode_address(self, address):
+        """Address -> (segment index, offset)"""
+        block = address // BLOCK_SIZE
+        if address < 0 or block >= len(self.block_segment) or self.block_segment[block] < 0:
+            raise IndexError(f"Invalid memory address: {address}")
+        seg = self.block_segment[block]
+        return seg, address - self.segment_base[seg]
+    
     def get_memory_type(self, address):
         """Determine memory type based on address range"""
-        if isinstance(address, str):
-            try:
-                addr = int(address)
-            except:
-                return "temp"  # Assume temp variables for non-numeric addresses
+        try:
+            seg, _ = self.decode_address(int(address))
+        except (ValueError, IndexError):
+            return "unknown"
+        return SEGMENTS[seg]
+    
+    def new_segment(self, name):
+        """Preallocated list for a segment, sized from the object file"""
+        default = SEGMENT_DEFAULTS[name.split('_')[1]]
+        return [default] * self.memory_allocation[name]
+    
+    def allocate_frame(self, func_address):
+        """ERA: get a frame for the function, reusing a released one if possible"""
+        free = self.free_frames.get(func_address)
+        if free:
+            frame = free.pop()
+            frame.reset()
         else:
-            addr = address
-            
-        for mem_type, (start, end) in self.MEMORY_RANGES.items():
-            if start <= addr <= end:
-                return mem_type
-        return "unknown"
+            frame = Frame(self.functions[func_address])
+        self.live_cells += frame.size
+        if self.live_cells > self.max_memory_cells:
+            raise MemoryLimitExceeded(f"Memory limit of {self.max_memory_cells} cells exceeded")
+        self.pending_frame = frame
+        return frame
     
-    def push_local_context(self, func_name):
-        """Push new local memory context for function call"""
-        # Save current local memory state
-        local_snapshot = {}
-        for addr_str, value in self.virtual_memory.items():
-            if addr_str.isdigit():
-                addr = int(addr_str)
-                if 7000 <= addr <= 11999:  # Local memory range
-                    local_snapshot[addr_str] = value
-        
-        self.local_memory_stack.append(local_snapshot)
-        
-        # Clear local memory for new function
-        to_remove = []
-        for addr_str in self.virtual_memory:
-            if addr_str.isdigit():
-                addr = int(addr_str)
-                if 7000 <= addr <= 11999:
-                    to_remove.append(addr_str)
-        
-        for addr_str in to_remove:
-            del self.virtual_memory[addr_str]
-            
-        print(f"Pushed local context for {func_name}")
+    def set_param_value(self, address, value):
+        """PARAM: write an argument into the pending frame"""
+        seg, offset = self.decode_address(address)
+        self.pending_frame.segments[seg - LOCAL_SEGMENT_START][offset] = value
+    
+    def push_frame(self, return_address):
+        """GOSUB: activate the pending frame"""
+        if len(self.call_stack) >= self.max_call_depth:
+            raise CallDepthExceeded(f"Call depth limit of {self.max_call_depth} exceeded")
+        frame = self.pending_frame
+        self.pending_frame = None
+        frame.return_address = return_address
+        self.call_stack.append(self.current_frame)
+        self.activate_frame(frame)
+    
+    def pop_frame(self):
+        """ENDFUNC: release the current frame and return to the caller"""
+        frame = self.current_frame
+        self.activate_frame(self.call_stack.pop())
+        self.free_frames.setdefault(frame.function.address, []).append(frame)
+        self.live_cells -= frame.size
+        return frame.return_address
     
-    def pop_local_context(self):
-        """Restore previous local memory context"""
-        if self.local_memory_stack:
-            local_snapshot = self.local_memory_stack.pop()
-            
-            # Clear current local memory
-            to_remove = []
-            for addr_str in self.virtual_memory:
-                if addr_str.isdigit():
-                    addr = int(addr_str)
-                    if 7000 <= addr <= 11999:
-                        to_remove.append(addr_str)
-            
-            for addr_str in to_remove:
-                del self.virtual_memory[addr_str]
-            
-            # Restore previous local memory
-            for addr_str, value in local_snapshot.items():
-                self.virtual_memory[addr_str] = value
-                
-            print("Popped local context")
+    def activate_frame(self, frame):
+        self.current_frame = frame
+        self.segments[LOCAL_SEGMENT_START:LOCAL_SEGMENT_END] = frame.segments
         
-    def load_and_initialize_memory(self, quadruple_string):
-        """Load intermediate representation and initialize virtual memory"""
-        test_split = quadruple_string.strip().split('\n')
-        section = 0
+    def load_and_initialize_memory(self, object_data):
+        """Load binary object and initialize virtual memory"""
+        obj = read_object(object_data)
+        self.object = obj
         
-        print("=== LOADING MEMORY ===")
+        self.memory_allocation.update(obj.segment_sizes)
+        self.functions = obj.functions
+        self.program = decode_program(self, obj)
+        self.fused = fuse_program(self, obj, self.program, self.fusion)
+        for i, name in enumerate(SEGMENTS):
+            self.segments[i] = self.new_segment(name)
+        self.current_frame = Frame(None, self.segments[LOCAL_SEGMENT_START:LOCAL_SEGMENT_END])
+        self.live_cells = sum(len(segment) for segment in self.segments)
+        if self.live_cells > self.max_memory_cells:
+            raise MemoryLimitExceeded(f"Program needs {self.live_cells} cells, "
+                                      f"limit is {self.max_memory_cells}")
         
-        for line in test_split:
-            if line.strip() == "":
-                section += 1
-                continue
-
-            parts = line.strip().split()
-
-            if section == 0 and len(parts) == 2:  # Constants section
-                try:
-                    value, address = parts
-                    address = int(address)
-                    
-                    # Load constants into their proper memory ranges
-                    if 17000 <= address <= 17999:  # Integer constants
-                        try:
-                            const_value = int(value)
-                        except:
-                            const_value = value.strip('"').strip("'")
-                        self.virtual_memory[str(address)] = const_value
-                        print(f"Constant INT -> Memory[{address}] = {const_value}")
-                        
-                    elif 18000 <= address <= 18999:  # Float constants
-                        const_value = float(value)
-                        self.virtual_memory[str(address)] = const_value
-                        print(f"Constant FLOAT -> Memory[{address}] = {const_value}")
-                        
-                    elif 19000 <= address <= 19999:  # String constants
-                        const_value = value.strip('"').strip("'")
-                        self.virtual_memory[str(address)] = const_value
-                        print(f"Constant STRING -> Memory[{address}] = '{const_value}'")
-                        
-                except ValueError:
-                    continue
-
-            elif section == 1 and len(parts) == 2:  # Memory allocation section
-                memory_type, count = parts
-                self.memory_allocation[memory_type] = int(count)
+        # Load constants into their proper memory ranges
+        for address, const_value in obj.constants.items():
+            seg, offset = self.decode_address(address)
+            self.segments[seg][offset] = const_value
         
-        return test_split, section
-
-    def get_memory_value(self, address_str):
-        """Access virtual memory with proper handling for temp variables"""
-        if address_str is None or address_str == '-1':
-            return None
+        if self.tracer.enabled(TRACE_MEMORY):
+            for address, const_value in sorted(obj.constants.items()):
+                self.tracer.emit(f"Constant {self.get_memory_type(address)} -> Memory[{address}] = {const_value!r}")
         
-        # Handle temporary variable names like 't1', 't2', etc.
-        if isinstance(address_str, str) and address_str.startswith('t') and address_str[1:].isdigit():
-            # Map temp variable to its memory address
-            temp_num = int(address_str[1:])
-            temp_address = str(12000 + temp_num - 1)  # Map t1->12000, t2->12001, etc.
-            if temp_address in self.virtual_memory:
-                return self.virtual_memory[temp_address]
-            else:
-                self.virtual_memory[temp_address] = 0
-                return 0
-            
-        if str(address_str) in self.virtual_memory:
-            return self.virtual_memory[str(address_str)]
+        return obj
+
+    def run(self):
+        """Execute the decoded program, returns the number of executed steps
+        (quads, with each superinstruction counted once).
+
+        Steps run in chunks of limits.check_interval with no per-quad checks;
+        the program ends when the halt step raises Halt.
+        """
+        if self.tracer.enabled(TRACE_INSTRUCTIONS):
+            return self.run_traced()
+        program = self.program
+        limits = self.limits
+        budget = limits.max_instructions
+        start = time.perf_counter()
+        deadline = start + limits.max_seconds if limits.max_seconds is not None else None
+        pc = self.pc
+        executed = 0
+        i = 0
+        try:
+            while True:
+                chunk = limits.check_interval
+                if budget is not None:
+                    if executed >= budget:
+                        if pc == self.halt_pc:
+                            break
+                        raise InstructionLimitExceeded(f"Instruction budget of {budget} exhausted")
+                    chunk = min(chunk, budget - executed)
+                for i in range(chunk):
+                    pc = program[pc](pc)
+                executed += chunk
+                i = 0
+                if deadline is not None and time.perf_counter() > deadline:
+                    raise DeadlineExceeded(f"Deadline of {limits.max_seconds}s exceeded")
+        except Halt:
+            executed += i
+        except VMLimitError as e:
+            executed += i
+            self.annotate_limit_error(e, pc, executed, start)
+            raise
+        finally:
+            self.pc = pc
+            self.instruction_count += executed
+        return executed
+
+    def run_traced(self):
+        """Same as run, emitting every quad (and memory write) to the tracer"""
+        program = self.program
+        quads = list(self.object.quads())
+        emit = self.tracer.emit
+        trace_memory = self.tracer.enabled(TRACE_MEMORY)
+        limits = self.limits
+        budget = limits.max_instructions
+        start = time.perf_counter()
+        deadline = start + limits.max_seconds if limits.max_seconds is not None else None
+        pc = self.pc
+        executed = 0
+        try:
+            while pc != self.halt_pc:
+                if budget is not None and executed >= budget:
+                    raise InstructionLimitExceeded(f"Instruction budget of {budget} exhausted")
+                if deadline is not None and executed % limits.check_interval == 0 \
+                        and time.perf_counter() > deadline:
+                    raise DeadlineExceeded(f"Deadline of {limits.max_seconds}s exceeded")
+                num, opcode, arg1, arg2, dest = quads[pc]
+                emit(f"PC={num}: {OPCODE_NAMES[opcode].lower()} {arg1} {arg2} {dest}")
+                next_pc = program[pc](pc)
+                executed += 1
+                if trace_memory and opcode in WRITE_OPCODES:
+                    self.trace_write(opcode, dest)
+                pc = next_pc
+        except VMLimitError as e:
+            self.annotate_limit_error(e, pc, executed, start)
+            emit(f"Limit: {e}")
+            raise
+        finally:
+            self.pc = pc
+            self.instruction_count += executed
+        return executed
+
+    def annotate_limit_error(self, error, pc, executed, start):
+        error.pc = pc + 1
+        error.executed = executed
+        error.call_depth = len(self.call_stack)
+        error.live_cells = self.live_cells
+        error.elapsed = time.perf_counter() - start
+
+    def trace_write(self, opcode, address):
+        seg, offset = self.decode_address(address)
+        if opcode == OPCODES['PARAM']:
+            value = self.pending_frame.segments[seg - LOCAL_SEGMENT_START][offset]
+            self.tracer.emit(f"Param[{address}] ({SEGMENTS[seg]}) := {value}")
         else:
-            # Initialize memory location if accessing for first time
-            self.virtual_memory[str(address_str)] = 0
-            return 0
+            self.tracer.emit(f"Memory[{address}] ({SEGMENTS[seg]}) := {self.segments[seg][offset]}")
+
+    def get_memory_value(self, address):
+        """Read a memory cell"""
+        if address is None or address == -1:
+            return None
+        seg, offset = self.decode_address(address)
+        return self.segments[seg][offset]
     
-    def set_memory_value(self, address_str, value):
-        """Set value in virtual memory with proper handling for temp variables"""
-        if address_str is None or address_str == '-1':
+    def set_memory_value(self, address, value):
+        """Write a memory cell"""
+        if address is None or address == -1:
             return
-        
-        # Handle temporary variable names
-        if isinstance(address_str, str) and address_str.startswith('t') and address_str[1:].isdigit():
-            temp_num = int(address_str[1:])
-            temp_address = str(12000 + temp_num - 1)
-            self.virtual_memory[temp_address] = value
-            mem_type = self.get_memory_type(temp_address)
-            print(f"Memory[{temp_address}] ({mem_type}) := {value}")
-            return
-            
-        self.virtual_memory[str(address_str)] = value
-        mem_type = self.get_memory_type(address_str)
-        print(f"Memory[{address_str}] ({mem_type}) := {value}")
+        seg, offset = self.decode_address(address)
+        self.segments[seg][offset] = value
+        if self.tracer.enabled(TRACE_MEMORY):
+            self.tracer.emit(f"Memory[{address}] ({SEGMENTS[seg]}) := {value}")
+
+    def dump_memory(self):
+        """{address: value} of every allocated cell"""
+        memory = {}
+        for i, segment in enumerate(self.segments):
+            base = self.segment_base[i]
+            for offset, value in enumerate(segment):
+                memory[base + offset] = value
+        return memory
+
+
+def print_output(value):
+    print(f"OUTPUT: {value}")
 
 
-def test_interpreter(test_quadruples):
+def test_interpreter(program_object, tracer=None, limits=None, output=None):
     """Execute quadruples using proper memory allocation and function calls"""
     
     # Create VM instance
-    vm = VirtualMachine()
+    vm = VirtualMachine(tracer, limits, output)
+    tracer = vm.tracer
     
-    # Load and initialize memory
-    test_split, _ = vm.load_and_initialize_memory(test_quadruples)
-    
-    # Parse quadruples
-    quadruples = []
-    section = 0
-    
-    for line in test_split:
-        if line.strip() == "":
-            section += 1
-            continue
-            
-        parts = line.strip().split()
-        
-        if section == 2 and len(parts) == 5:  # Quadruples section
-            num, op, arg1, arg2, dest = parts
-            quadruples.append((int(num), op, arg1, arg2, dest))
+    # Load, initialize memory and decode the program
+    obj = vm.load_and_initialize_memory(program_object)
 
-    print("")
-    for i, quad in enumerate(quadruples):
-        print(f"  {i}: {quad}")
-    
-    print(f"")
-    print(f"Total quads: {len(quadruples)}")
-    
-    # Find starting point (gotomain)
-    start_pc = 0
-    for i, (num, op, arg1, arg2, dest) in enumerate(quadruples):
-        if op == 'gotomain':
-            start_pc = int(dest) - 1
-            break
-    
+    if tracer.enabled(TRACE_INSTRUCTIONS):
+        for i, (num, opcode, arg1, arg2, dest) in enumerate(obj.quads()):
+            tracer.emit(f"  {i}: {(num, OPCODE_NAMES[opcode].lower(), arg1, arg2, dest)}")
+        tracer.emit(f"Total quads: {len(obj)}")
     
     # Execute quadruples
-    pc = start_pc
-    max_iterations = 1000
-    iteration = 0
-    
-    while pc < len(quadruples) and iteration < max_iterations:
-        iteration += 1
-        if pc < 0 or pc >= len(quadruples):
-            print(f"Error: PC out of bounds: {pc}")
-            break
-            
-        num, op, arg1, arg2, dest = quadruples[pc]
-        
-        print(f"PC={pc+1}: {op} {arg1} {arg2} {dest}")
-        
-        if op == 'gotomain':
-            new_pc = int(dest) - 1
-            if 0 <= new_pc < len(quadruples):
-                print(f"Jumping to main at PC={new_pc+1}")
-                pc = new_pc
-                continue
-            else:
-                print(f"Error: Invalid jump destination {dest}")
-                break
-            
-        elif op == 'int_to_float':
-            # Convert integer to float
-            int_val = vm.get_memory_value(arg1)
-            float_val = float(int_val)
-            vm.set_memory_value(dest, float_val)
-            
-        elif op == '=':
-            value = vm.get_memory_value(arg1)
-            vm.set_memory_value(dest, value)
-            
-        elif op == '+':
-            val1 = vm.get_memory_value(arg1)
-            val2 = vm.get_memory_value(arg2)
-            result = val1 + val2
-            vm.set_memory_value(dest, result)
-            
-        elif op == '-':
-            val1 = vm.get_memory_value(arg1)
-            val2 = vm.get_memory_value(arg2)
-            result = val1 - val2
-            vm.set_memory_value(dest, result)
-            
-        elif op == '*':
-            val1 = vm.get_memory_value(arg1)
-            val2 = vm.get_memory_value(arg2)
-            result = val1 * val2
-            vm.set_memory_value(dest, result)
-            
-        elif op == '/':
-            val1 = vm.get_memory_value(arg1)
-            val2 = vm.get_memory_value(arg2)
-            result = val1 / val2 if val2 != 0 else 0
-            vm.set_memory_value(dest, result)
-            
-        elif op == 'uminus':
-            val = vm.get_memory_value(arg1)
-            vm.set_memory_value(dest, -val)
-            
-        elif op == '>':
-            val1 = vm.get_memory_value(arg1)
-            val2 = vm.get_memory_value(arg2)
-            vm.set_memory_value(dest, val1 > val2)
-            
-        elif op == '<':
-            val1 = vm.get_memory_value(arg1)
-            val2 = vm.get_memory_value(arg2)
-            vm.set_memory_value(dest, val1 < val2)
-            
-        elif op == '>=':
-            val1 = vm.get_memory_value(arg1)
-            val2 = vm.get_memory_value(arg2)
-            vm.set_memory_value(dest, val1 >= val2)
-            
-        elif op == '<=':
-            val1 = vm.get_memory_value(arg1)
-            val2 = vm.get_memory_value(arg2)
-            vm.set_memory_value(dest, val1 <= val2)
-            
-        elif op == '==':
-            val1 = vm.get_memory_value(arg1)
-            val2 = vm.get_memory_value(arg2)
-            vm.set_memory_value(dest, val1 == val2)
-            
-        elif op == '!=':
-            val1 = vm.get_memory_value(arg1)
-            val2 = vm.get_memory_value(arg2)
-            vm.set_memory_value(dest, val1 != val2)
-            
-        elif op == 'gotof':
-            condition = vm.get_memory_value(arg1)
-            if not condition:
-                pc = int(dest) - 1
-                continue
-                
-        elif op == 'gotot':
-            condition = vm.get_memory_value(arg1)
-            if condition:
-                pc = int(dest) - 1
-                continue
-                
-        elif op == 'goto':
-            pc = int(dest) - 1
-            continue
-            
-        elif op == 'era':
-            # Allocate space for function call
-            func_name = arg1
-            vm.push_local_context(func_name)
-            
-        elif op == 'param':
-            # Assign parameter value
-            param_value = vm.get_memory_value(arg1)
-            vm.set_memory_value(dest, param_value)
-            
-        elif op == 'gosub':
-            # Function call
-            func_name = arg1
-            return_address = pc + 1
-            vm.call_stack.append(return_address)
-            pc = int(dest) - 1
-            continue
-            
-        elif op == 'endfunc':
-            # End of void function - return to caller
-            if vm.call_stack:
-                print(f"Void function ended naturally, returning to caller")
-                return_address = vm.call_stack.pop()
-                vm.pop_local_context()
-                pc = return_address
-                continue
-            else:
-                print("Warning: ENDFUNC without call stack")
-        
-        elif op == 'return':
-            # Explicit return (shouldn't happen in void functions, but handle it)
-            if vm.call_stack:
-                return_address = vm.call_stack.pop()
-                vm.pop_local_context()
-                pc = return_address
-                continue
-            else:
-                print("Program ended with RETURN")
-                break
-            
-        elif op == 'print':
-            value = vm.get_memory_value(arg1)
-            print(f"OUTPUT: {value}")
-            
-        elif op == 'end':
-            print("Program ended normally")
-            break
-            
-        else:
-            print(f"Unknown operation: {op}")
-        
-        pc += 1
+    executed = vm.run()
+    if tracer.enabled(TRACE_CALLS):
+        tracer.emit(f"Executed quads: {executed}")
     
     # Show final memory state organized by ranges
-    print(f"\n===  Memoria estado final===")
-    for mem_type, (start, end) in sorted(vm.MEMORY_RANGES.items(), key=lambda x: x[1][0]):
-        values_in_range = []
-        for addr_str in vm.virtual_memory:
-            try:
-                addr = int(addr_str)
-                if start <= addr <= end:
-                    values_in_range.append((addr, vm.virtual_memory[addr_str]))
-            except:
-                continue
-        
-        if values_in_range:
-            print(f"\n{mem_type} ({start}-{end}):")
-            for addr, value in sorted(values_in_range):
-                print(f"  [{addr}] = {value}")
+    if tracer.enabled(TRACE_MEMORY):
+        tracer.emit(f"===  Memoria estado final===")
+        for i, name in enumerate(SEGMENTS):
+            if vm.segments[i]:
+                start, end = vm.MEMORY_RANGES[name]
+                tracer.emit(f"{name} ({start}-{end}):")
+                for offset, value in enumerate(vm.segments[i]):
+                    tracer.emit(f"  [{start + offset}] = {value}")
     
-    return vm.virtual_memory
\ No newline at end of file
+    return vm.dump_memory()
+
+
+# ---------------- Decodificacion ----------------
+# Cada cuadruplo se convierte una sola vez en una funcion step(pc) -> siguiente
+# pc, con sus operandos ya resueltos a (segmento, offset) y los saltos a indices
+# absolutos. Las funciones capturan vm.segments, cuya lista se modifica en sitio
+# al cambiar de frame, asi que los locales siempre apuntan al frame activo.
+
+BINARY_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+
+def _binary(fn):
+    def factory(vm, arg1, arg2, dest, target):
+        segments = vm.segments
+        s1, o1 = vm.decode_address(arg1)
+        s2, o2 = vm.decode_address(arg2)
+        sd, od = vm.decode_address(dest)
+        def step(pc):
+            segments[sd][od] = fn(segments[s1][o1], segments[s2][o2])
+            return pc + 1
+        return step
+    return factory
+
+
+def _divide(vm, arg1, arg2, dest, target):
+    segments = vm.segments
+    s1, o1 = vm.decode_address(arg1)
+    s2, o2 = vm.decode_address(arg2)
+    sd, od = vm.decode_address(dest)
+    def step(pc):
+        val2 = segments[s2][o2]
+        segments[sd][od] = segments[s1][o1] / val2 if val2 != 0 else 0
+        return pc + 1
+    return step
+
+
+def _unary(fn):
+    def factory(vm, arg1, arg2, dest, target):
+        segments = vm.segments
+        s1, o1 = vm.decode_address(arg1)
+        sd, od = vm.decode_address(dest)
+        def step(pc):
+            segments[sd][od] = fn(segments[s1][o1])
+            return pc + 1
+        return step
+    return factory
+
+
+def _assign(vm, arg1, arg2, dest, target):
+    segments = vm.segments
+    s1, o1 = vm.decode_address(arg1)
+    sd, od = vm.decode_address(dest)
+    def step(pc):
+        segments[sd][od] = segments[s1][o1]
+        return pc + 1
+    return step
+
+
+def _goto(vm, arg1, arg2, dest, target):
+    def step(pc):
+        return target
+    return step
+
+
+def _gotof(vm, arg1, arg2, dest, target):
+    segments = vm.segments
+    s1, o1 = vm.decode_address(arg1)
+    def step(pc):
+        return pc + 1 if segments[s1][o1] else target
+    return step
+
+
+def _gotot(vm, arg1, arg2, dest, target):
+    segments = vm.segments
+    s1, o1 = vm.decode_address(arg1)
+    def step(pc):
+        return target if segments[s1][o1] else pc + 1
+    return step
+
+
+def _era(vm, arg1, arg2, dest, target):
+    if arg1 not in vm.functions:
+        raise VMError(f"ERA of unknown function {arg1}")
+    def step(pc):
+        vm.allocate_frame(arg1)
+        return pc + 1
+    return step
+
+
+def _param(vm, arg1, arg2, dest, target):
+    segments = vm.segments
+    s1, o1 = vm.decode_address(arg1)
+    sd, od = vm.decode_address(dest)
+    if not LOCAL_SEGMENT_START <= sd < LOCAL_SEGMENT_END:
+        raise VMError(f"PARAM destination {dest} is not a local address")
+    sd -= LOCAL_SEGMENT_START
+    def step(pc):
+        vm.pending_frame.segments[sd][od] = segments[s1][o1]
+        return pc + 1
+    return step
+
+
+def _gosub(vm, arg1, arg2, dest, target):
+    if vm.tracer.enabled(TRACE_CALLS):
+        emit = vm.tracer.emit
+        def traced_step(pc):
+            vm.push_frame(pc + 1)
+            emit(f"Call {vm.current_frame.function.name} (depth {len(vm.call_stack)})")
+            return target
+        return traced_step
+    def step(pc):
+        vm.push_frame(pc + 1)
+        return target
+    return step
+
+
+def _endfunc(vm, arg1, arg2, dest, target):
+    if vm.tracer.enabled(TRACE_CALLS):
+        emit = vm.tracer.emit
+        def traced_step(pc):
+            if vm.call_stack:
+                name = vm.current_frame.function.name
+                return_pc = vm.pop_frame()
+                emit(f"Return from {name} to PC={return_pc + 1}")
+                return return_pc
+            emit("Warning: ENDFUNC without call stack")
+            return pc + 1
+        return traced_step
+    def step(pc):
+        if vm.call_stack:
+            return vm.pop_frame()
+        return pc + 1
+    return step
+
+
+def _return(vm, arg1, arg2, dest, target):
+    def step(pc):
+        if vm.call_stack:
+            return vm.pop_frame()
+        return vm.halt_pc
+    return step
+
+
+def _print(vm, arg1, arg2, dest, target):
+    segments = vm.segments
+    output = vm.output
+    s1, o1 = vm.decode_address(arg1)
+    def step(pc):
+        output(segments[s1][o1])
+        return pc + 1
+    return step
+
+
+def _end(vm, arg1, arg2, dest, target):
+    def step(pc):
+        return vm.halt_pc
+    return step
+
+
+def _halt(pc):
+    raise Halt()
+
+
+# Opcode name -> factory of its step function
+HANDLERS = {
+    'GOTOMAIN': _goto,
+    'GOTO': _goto,
+    'GOTOF': _gotof,
+    'GOTOT': _gotot,
+    'ERA': _era,
+    'PARAM': _param,
+    'GOSUB': _gosub,
+    'ENDFUNC': _endfunc,
+    'RETURN': _return,
+    '=': _assign,
+    '/': _divide,
+    'UMINUS': _unary(operator.neg),
+    'INT_TO_FLOAT': _unary(float),
+    'PRINT': _print,
+    'END': _end,
+}
+HANDLERS.update((op, _binary(fn)) for op, fn in BINARY_OPERATORS.items())
+
+# Opcodes whose result field is a memory write (for TRACE_MEMORY)
+WRITE_OPCODES = {OPCODES[op] for op in ('=', '/', 'UMINUS', 'INT_TO_FLOAT', 'PARAM')}
+WRITE_OPCODES.update(OPCODES[op] for op in BINARY_OPERATORS)
+
+
+# Indexed by opcode number
+HANDLER_TABLE = [HANDLERS[name] for name in OPCODE_NAMES]
+
+
+def decode_program(vm, obj):
+    """Decode every quad once into its step function"""
+    n = len(obj)
+    program = []
+    for num, opcode, arg1, arg2, dest in obj.quads():
+        target = None
+        if opcode in JUMP_OPS:
+            target = dest - 1
+            if not 0 <= target < n:
+                raise VMError(f"Invalid jump destination {dest} in quad {num}")
+        try:
+            program.append(HANDLER_TABLE[opcode](vm, arg1, arg2, dest, target))
+        except IndexError as e:
+            raise VMError(f"Quad {num}: {e}") from None
+    # Running off the end (or END/RETURN) lands on the halt step
+    vm.halt_pc = n
+    program.append(_halt)
+    return program
+
+
+
+# ---------------- Superinstrucciones ----------------
+# Secuencias frecuentes de cuadruplos (ver benchmarks/bench_fusion.py) que se
+# ejecutan en un solo step. El step fusionado reemplaza al del primer
+# cuadruplo y regresa el pc que sigue al ultimo; los steps de los demas se
+# quedan donde estaban, asi que un salto a la mitad de la secuencia sigue
+# funcionando igual. El .ldo no cambia: todo se decide al decodificar.
+
+COMPARE_OPCODES = {OPCODES[op]: BINARY_OPERATORS[op] for op in ('>', '<', '>=', '<=', '==', '!=')}
+ARITHMETIC_OPCODES = {OPCODES[op]: BINARY_OPERATORS[op] for op in ('+', '-', '*')}
+ARITHMETIC_OPCODES[OPCODES['/']] = lambda a, b: a / b if b != 0 else 0
+
+
+def _fuse_compare_branch(vm, quads, i):
+    """a < b -> t; GOTOF/GOTOT t: compara y salta en un step"""
+    _, opcode, arg1, arg2, dest = quads[i]
+    if opcode not in COMPARE_OPCODES or i + 1 >= len(quads):
+        return None
+    _, branch, condition, _, jump = quads[i + 1]
+    if branch not in (OPCODES['GOTOF'], OPCODES['GOTOT']) or condition != dest:
+        return None
+    fn = COMPARE_OPCODES[opcode]
+    segments = vm.segments
+    s1, o1 = vm.decode_address(arg1)
+    s2, o2 = vm.decode_address(arg2)
+    sd, od = vm.decode_address(dest)
+    target = jump - 1
+    if branch == OPCODES['GOTOF']:
+        def step(pc):
+            value = segments[sd][od] = fn(segments[s1][o1], segments[s2][o2])
+            return pc + 2 if value else target
+    else:
+        def step(pc):
+            value = segments[sd][od] = fn(segments[s1][o1], segments[s2][o2])
+            return target if value else pc + 2
+    return step
+
+
+def _fuse_arithmetic_assign(vm, quads, i):
+    """a + b -> t; t -> x: calcula y copia en un step"""
+    _, opcode, arg1, arg2, dest = quads[i]
+    if opcode not in ARITHMETIC_OPCODES or i + 1 >= len(quads):
+        return None
+    _, assign, source, _, copy = quads[i + 1]
+    if assign != OPCODES['='] or source != dest:
+        return None
+    fn = ARITHMETIC_OPCODES[opcode]
+    segments = vm.segments
+    s1, o1 = vm.decode_address(arg1)
+    s2, o2 = vm.decode_address(arg2)
+    sd, od = vm.decode_address(dest)
+    sc, oc = vm.decode_address(copy)
+    def step(pc):
+        segments[sc][oc] = segments[sd][od] = fn(segments[s1][o1], segments[s2][o2])
+        return pc + 2
+    return step
+
+
+def _fuse_arithmetic_pair(vm, quads, i):
+    """a * b -> t1; t1 + c -> t2 (o dos operaciones seguidas cualquiera)"""
+    _, first, arg1, arg2, dest = quads[i]
+    if first not in ARITHMETIC_OPCODES or i + 1 >= len(quads):
+        return None
+    _, second, next1, next2, next_dest = quads[i + 1]
+    if second not in ARITHMETIC_OPCODES:
+        return None
+    fn1 = ARITHMETIC_OPCODES[first]
+    fn2 = ARITHMETIC_OPCODES[second]
+    segments = vm.segments
+    s1, o1 = vm.decode_address(arg1)
+    s2, o2 = vm.decode_address(arg2)
+    sd, od = vm.decode_address(dest)
+    t1, p1 = vm.decode_address(next1)
+    t2, p2 = vm.decode_address(next2)
+    td, pd = vm.decode_address(next_dest)
+    def step(pc):
+        segments[sd][od] = fn1(segments[s1][o1], segments[s2][o2])
+        segments[td][pd] = fn2(segments[t1][p1], segments[t2][p2])
+        return pc + 2
+    return step
+
+
+def _fuse_call(vm, quads, i):
+    """ERA f; PARAM*; GOSUB f: crea el frame, pasa argumentos y entra"""
+    _, opcode, func, _, _ = quads[i]
+    if opcode != OPCODES['ERA']:
+        return None
+    segments = vm.segments
+    params = []
+    j = i + 1
+    while j < len(quads) and quads[j][1] == OPCODES['PARAM']:
+        _, _, arg1, _, dest = quads[j]
+        s1, o1 = vm.decode_address(arg1)
+        sd, od = vm.decode_address(dest)
+        params.append((s1, o1, sd - LOCAL_SEGMENT_START, od))
+        j += 1
+    if j >= len(quads) or quads[j][1] != OPCODES['GOSUB'] or quads[j][2] != func:
+        return None
+    target = quads[j][4] - 1
+    return_pc = j + 1
+    allocate_frame = vm.allocate_frame
+    push_frame = vm.push_frame
+    def step(pc):
+        frame_segments = allocate_frame(func).segments
+        for s1, o1, sd, od in params:
+            frame_segments[sd][od] = segments[s1][o1]
+        push_frame(return_pc)
+        return target
+    return step
+
+
+# Nombre -> fn(vm, quads, i) que regresa el step fusionado o None
+FUSION_RULES = {
+    'compare_branch': _fuse_compare_branch,
+    'arithmetic_assign': _fuse_arithmetic_assign,
+    'arithmetic_pair': _fuse_arithmetic_pair,
+    'call': _fuse_call,
+}
+
+
+def fuse_program(vm, obj, program, rules):
+    """Reemplaza steps por superinstrucciones; regresa {regla: cuantas}"""
+    fused = {name: 0 for name in rules}
+    if not rules:
+        return fused
+    quads = list(obj.quads())
+    for i in range(len(quads)):
+        for name in rules:
+            step = FUSION_RULES[name](vm, quads, i)
+            if step is not None:
+                program[i] = step
+                fused[name] += 1
+                break
+    return fused